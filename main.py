@@ -1,29 +1,189 @@
-from secops.alert_simulator import HIPSAlertSimulator
-from secops.syslog_vectorization import SyslogAlertAnalyzer
+# Only light modules are imported here: the analysis stack (NumPy, SciPy,
+# scikit-learn, pandas) is imported where it is first needed, so --help and
+# --mode explain start instantly (see `python -m secops.benchmark --startup`)
+from secops.retention import RetentionPolicy
+from secops.scoring import ScoringConfig, ScoringConfigWatcher, load_scoring_config
 from datetime import datetime
+import math
 import time
 import argparse
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from secops.correlation import BurstDetector
+
+def explain_scoring_system(config: Optional[ScoringConfig] = None) -> None:
+    """Explain the label-based scoring system (default config unless given)"""
+    config = config or ScoringConfig()
+    mix = config.mix
+    print("\n" + "="*80)
+    print(f"🎯 LABEL-BASED SCORING SYSTEM ({config.name})")
+    print("="*80)
+
+    # Type Weights
+    print(f"\n1️⃣  TYPE-SPECIFIC BASE WEIGHTS ({mix['type']:.0%})")
+    print("-"*40)
+    for alert_type, weight in config.type_weights.items():
+        print(f"  • {alert_type:<20} {weight:.2f}")
+    print(f"  • {'(other types)':<20} {config.default_type_weight:.2f}")
+
+    # Severity Weights
+    print(f"\n2️⃣  SEVERITY WEIGHTS ({mix['severity']:.0%})")
+    print("-"*40)
+    for severity, weight in config.severity_weights.items():
+        print(f"  • {severity:<10} {weight:.2f}")
+    print(f"  • {'(other)':<10} {config.default_severity_weight:.2f}")
+
+    # Uniqueness Scoring
+    print(f"\n3️⃣  UNIQUENESS SCORING ({mix['uniqueness']:.0%})")
+    print("-"*40)
+    print("Based on type-specific pattern analysis:")
+    print("  • Similarity Check: Within same alert type")
+    print("  • Frequency Impact: Logarithmic decay per type")
+    print("  • Uniqueness Formula: (similarity_factor + frequency_factor) / 2")
+
+    print("\nExample Uniqueness Scores:")
+    print("  • First occurrence:          1.000")
+    print("  • Similar but different:     0.600")
+    print("  • Repeated pattern:          0.300")
+    print("  • Nearly identical:          0.150")
+
+    print("\n📈 FINAL SCORE CALCULATION")
+    print("-"*40)
+    print(f"Score = (TypeWeight × {mix['type']:g}) + (SeverityWeight × {mix['severity']:g}) + "
+          f"(Uniqueness × {mix['uniqueness']:g})")
+    print(f"Priority: HIGH above {config.thresholds['high']:.2f}, "
+          f"MEDIUM above {config.thresholds['medium']:.2f}, otherwise LOW")
+    print("="*80)
 
 class AlertMonitor:
-    def __init__(self):
+    def __init__(self, retention: Optional[RetentionPolicy] = None, similarity_backend=None,
+                 vectorizer_mode: str = 'tfidf', instrument: bool = False,
+                 correlation: Optional['BurstDetector'] = None,
+                 scoring: Optional[ScoringConfig] = None):
+        from secops.alert_simulator import HIPSAlertSimulator
+        from secops.sinks import PRIORITY_EMOJI
+        from secops.syslog_vectorization import SyslogAlertAnalyzer
+
         self.simulator = HIPSAlertSimulator()
-        self.analyzer = SyslogAlertAnalyzer()
+        self._analyzer_kwargs = {
+            'retention': retention,
+            'similarity_backend': similarity_backend,
+            'vectorizer_mode': vectorizer_mode,
+            'instrument': instrument,
+            'correlation': correlation,
+            'scoring': scoring
+        }
+        self.analyzer = SyslogAlertAnalyzer(**self._analyzer_kwargs)
+        self._reported_capture = None
+        self.snapshots = None
+        self.output = None
+        self.scoring_watcher = None
         
         # Cache emoji mappings
-        self._priority_emoji = {
-            "HIGH": "🔴",
-            "MEDIUM": "🟡",
-            "LOW": "🟢"
-        }
+        self._priority_emoji = PRIORITY_EMOJI
         
+    def enable_snapshots(self, directory: str, interval: float = 300,
+                         restore: bool = False) -> None:
+        """Snapshot the analyzer periodically, optionally resuming from the latest snapshot"""
+        from secops.snapshot import SnapshotScheduler, latest_snapshot, load_snapshot
+
+        if restore and latest_snapshot(directory):
+            # The vectorizer comes from the snapshot; retention and similarity from our config
+            self.analyzer = load_snapshot(
+                directory,
+                retention=self._analyzer_kwargs['retention'],
+                similarity_backend=self._analyzer_kwargs['similarity_backend']
+            )
+            if self._analyzer_kwargs['correlation'] is None:
+                self.analyzer.correlation = None
+            elif self.analyzer.correlation is None:
+                self.analyzer.correlation = self._analyzer_kwargs['correlation']
+            if self._analyzer_kwargs['instrument']:
+                self.analyzer.enable_instrumentation()
+            if self._analyzer_kwargs['scoring'] is not None:
+                self.analyzer.set_scoring(self._analyzer_kwargs['scoring'])
+            print(f"♻️  Restored {self.analyzer.get_statistics()['total_alerts']} alerts "
+                  f"from {latest_snapshot(directory)}")
+        self.snapshots = SnapshotScheduler(self.analyzer, directory, interval)
+
+    def enable_output(self, console: bool = True, quiet: bool = False, paths=(),
+                      block: bool = True) -> None:
+        """Write alert reports through a background `SinkWriter` instead of printing inline.
+
+        Args:
+            console: Print alert reports to stdout
+            quiet: Console reports for HIGH-priority alerts only
+            paths: Output files (.csv: CSV, otherwise JSON lines)
+            block: Wait for the writer when its queue is full (False: drop and count)
+        """
+        from secops.sinks import ConsoleSink, SinkWriter, open_sink
+
+        sinks = [open_sink(path) for path in paths]
+        if console:
+            sinks.append(ConsoleSink(high_only=quiet))
+        self.output = SinkWriter(sinks, block=block)
+
+    def set_scoring(self, config: ScoringConfig) -> None:
+        """Score subsequent alerts under `config` (used by the config file watcher)"""
+        self._analyzer_kwargs['scoring'] = config
+        self.analyzer.set_scoring(config)
+
+    def watch_scoring_config(self, path: str, interval: float = 1.0) -> None:
+        """Reload the scoring config from `path` whenever the file changes"""
+        self.scoring_watcher = ScoringConfigWatcher(self, path, interval)
+
+    def _maybe_reload_scoring(self) -> None:
+        watcher = self.scoring_watcher
+        errors = watcher.errors
+        if watcher.maybe_reload():
+            self._flush_output()
+            print(f"🔄 Scoring config '{self.analyzer.scoring_config.name}' reloaded from {watcher.path}")
+        elif watcher.errors != errors:
+            print(f"⚠️  Scoring config not reloaded ({watcher.last_error}); "
+                  f"keeping '{self.analyzer.scoring_config.name}'")
+
+    def emit(self, alerts, results) -> None:
+        """Report analyzed alerts (an `analyze_alerts` frame or one `analyze_alert` dict)"""
+        if self.output is not None:
+            self.output.submit(alerts, results, self.analyzer.scoring_config)
+        elif isinstance(results, dict):
+            self.print_alert_details(alerts[0], results)
+        else:
+            for alert, analysis in zip(alerts, results.to_dict('records')):
+                # First alerts of a type carry no similarity (NaN in the frame)
+                if math.isnan(analysis['similarity']):
+                    del analysis['similarity']
+                self.print_alert_details(alert, analysis)
+
+    def _flush_output(self) -> None:
+        # Keep queued alert reports ahead of statistics on the console
+        if self.output is not None:
+            self.output.flush()
+
+    def _after_analysis(self, alerts=None, results=None) -> None:
+        if alerts is not None:
+            self.emit(alerts, results)
+        if self.scoring_watcher is not None:
+            self._maybe_reload_scoring()
+        if self.snapshots is not None:
+            self.snapshots.maybe_snapshot()
+
+    def close(self) -> None:
+        """Drain pending output and write a final snapshot (if enabled)"""
+        if self.output is not None:
+            self.output.close()
+            stats = self.output.stats()
+            if stats['dropped'] or stats['errors']:
+                print(f"⚠️  Output: {stats['dropped']} alerts dropped, {stats['failed']} not written, "
+                      f"{stats['errors']} write errors (last: {self.output.last_error})")
+        if self.snapshots is not None:
+            self.snapshots.close()
+            print(f"💾 Snapshot written to {self.snapshots.last_path}")
+
     def _get_priority(self, score: float) -> str:
         """Determine priority level based on score"""
-        if score > 0.7:
-            return "HIGH"
-        elif score > 0.4:
-            return "MEDIUM"
-        return "LOW"
+        return self.analyzer.scoring_config.priority_of(score)
 
     def print_header(self) -> None:
         """Print application header"""
@@ -34,33 +194,12 @@ class AlertMonitor:
 
     def print_alert_details(self, alert: Dict, analysis: Dict) -> None:
         """Print detailed analysis of a single alert"""
-        priority = self._get_priority(analysis['score'])
-        
-        print("\n" + "="*80)
-        print(f"{self._priority_emoji[priority]} PRIORITY: {priority} | Type: {alert['type']}")
-        print("-"*80)
-        
-        # Alert Information
-        print("📝 Alert Details:")
-        print(f"  • Pattern: {alert['pattern']}")
-        print(f"  • Process: {alert['process']} (PID: {alert['pid']})")
-        print(f"  • Severity: {alert['severity']}")
-        print(f"  • Source IP: {alert['source_ip']}")
-        print(f"  • Timestamp: {alert['timestamp']}")
-        
-        # Analysis Results
-        print("\n📊 Risk Analysis:")
-        print(f"  • Final Score: {analysis['score']:.3f}")
-        print(f"  • Type Base Score: {analysis['type_score']:.3f}")
-        print(f"  • Severity Weight: {analysis['severity_score']:.3f}")
-        print(f"  • Uniqueness Score: {analysis['uniqueness']:.3f}")
-        print(f"  • Type Frequency: #{analysis['type_frequency']}")
-        if 'similarity' in analysis:
-            print(f"  • Similarity to Previous: {analysis['similarity']:.3f}")
-        print("="*80)
+        from secops.sinks import format_alert_details
+        print(format_alert_details(alert, analysis, self.analyzer.scoring_config))
 
     def print_type_statistics(self, stats: Dict) -> None:
         """Print type-based analysis statistics"""
+        self._flush_output()
         print("\n" + "="*80)
         print("📊 ALERT TYPE ANALYSIS")
         print("-"*80)
@@ -82,46 +221,90 @@ class AlertMonitor:
             print(f"  • Count: {count} ({percentage:.1f}%) {bar}")
             print(f"  • Unique Patterns: {unique}")
             print(f"  • Repetition Ratio: {ratio:.2f}")
-        
+            if type_stat['evicted_alerts']:
+                print(f"  • Live / Evicted: {type_stat['live_alerts']} / {type_stat['evicted_alerts']}")
+            scores = type_stat['scores']
+            print(f"  • Scores: mean {scores['mean']:.3f} | p50 {scores['p50']:.3f} | "
+                  f"p90 {scores['p90']:.3f} | p99 {scores['p99']:.3f}")
+
+        print("\n🎚️  Severity Breakdown:")
+        for severity, entry in stats['severities'].items():
+            share = entry['count'] / total_alerts * 100 if total_alerts else 0.0
+            print(f"  • {severity}: {entry['count']} ({share:.1f}%), mean score {entry['mean_score']:.3f}")
+        scores = stats['scores']
+        print(f"  • All: p50 {scores['p50']:.3f} | p90 {scores['p90']:.3f} | p99 {scores['p99']:.3f}")
+
+        print(f"\n💾 Memory: {stats['memory_bytes'] / 1024:.1f} KiB "
+              f"({stats['live_alerts']} live, {stats['evicted_alerts']} evicted)")
+        cache = stats['template_cache']
+        print(f"♻️  Template Cache: {cache['hit_rate']:.1%} hit rate "
+              f"({cache['hits']}/{cache['lookups']}, {cache['entries']} patterns)")
         print("="*80)
 
-    def explain_scoring_system(self) -> None:
-        """Explain the label-based scoring system"""
-        print("\n" + "="*80)
-        print("🎯 LABEL-BASED SCORING SYSTEM")
+        if 'clusters' in stats:
+            self.print_clusters(stats['clusters'])
+        if 'correlation' in stats:
+            self.print_correlation(stats['correlation'])
+
+        metrics = self.analyzer.metrics
+        if metrics is not None and (metrics.counters['alerts'] or metrics.counters['batches']):
+            self.print_instrumentation(metrics)
+
+    def print_clusters(self, clusters: List[Dict]) -> None:
+        """Print the largest live incident clusters"""
+        print("\n🧩 INCIDENT CLUSTERS")
+        print("-"*80)
+        for cluster in clusters:
+            # Skip the masked timestamp prefix shared by every message
+            exemplar = (cluster['exemplar'] or '').split('timestamp] ', 1)[-1]
+            if len(exemplar) > 48:
+                exemplar = exemplar[:45] + '...'
+            print(f"  {cluster['alert_type']:<22}#{cluster['cluster']:<6}{cluster['members']:>7}  {exemplar}")
         print("="*80)
 
-        # Type Weights
-        print("\n1️⃣  TYPE-SPECIFIC BASE WEIGHTS (30%)")
-        print("-"*40)
-        for alert_type, weight in self.analyzer.type_weights.items():
-            print(f"  • {alert_type:<20} {weight:.2f}")
-
-        # Severity Weights
-        print("\n2️⃣  SEVERITY WEIGHTS (30%)")
-        print("-"*40)
-        for severity, weight in self.analyzer.severity_weights.items():
-            print(f"  • {severity:<10} {weight:.2f}")
-
-        # Uniqueness Scoring
-        print("\n3️⃣  UNIQUENESS SCORING (40%)")
-        print("-"*40)
-        print("Based on type-specific pattern analysis:")
-        print("  • Similarity Check: Within same alert type")
-        print("  • Frequency Impact: Logarithmic decay per type")
-        print("  • Uniqueness Formula: (similarity_factor + frequency_factor) / 2")
-        
-        print("\nExample Uniqueness Scores:")
-        print("  • First occurrence:          1.000")
-        print("  • Similar but different:     0.600")
-        print("  • Repeated pattern:          0.300")
-        print("  • Nearly identical:          0.150")
-        
-        print("\n📈 FINAL SCORE CALCULATION")
-        print("-"*40)
-        print("Score = (TypeWeight × 0.3) + (SeverityWeight × 0.3) + (Uniqueness × 0.4)")
+    def print_correlation(self, correlation: Dict) -> None:
+        """Print burst detection counters and the heaviest keys of the current window"""
+        print("\n🔥 BURST DETECTION")
+        print("-"*80)
+        print(f"  • Bursting alerts: {correlation['bursts']} of {correlation['alerts']} "
+              f"({correlation['burst_rate']:.1%})")
+        if correlation['heavy_hitters']:
+            print(f"  {'dimension':<11}{'type':<22}{'key':<24}{'count':>7}{'expected':>10}{'burst':>7}")
+            for hitter in correlation['heavy_hitters']:
+                print(f"  {hitter['dimension']:<11}{hitter['alert_type']:<22}{hitter['value']:<24}"
+                      f"{hitter['count']:>7}{hitter['expected']:>10.1f}{hitter['burst']:>7.2f}")
         print("="*80)
 
+    def print_instrumentation(self, metrics) -> None:
+        """Print per-stage timings collected by the analyzer"""
+        from secops.instrumentation import STAGES
+
+        print("\n⏱️  STAGE TIMINGS (analyze_alert)")
+        print("-"*80)
+        latency = metrics.latency
+        print(f"  {'stage':<14}{'mean':>10}{'p50 ≤':>10}{'p99 ≤':>10}{'share':>8}")
+        for stage in STAGES:
+            histogram = metrics.stages[stage]
+            share = histogram.total / latency.total if latency.total else 0.0
+            print(f"  {stage:<14}{histogram.mean / 1e3:>8.1f}us{histogram.quantile(0.5) / 1e3:>8.0f}us"
+                  f"{histogram.quantile(0.99) / 1e3:>8.0f}us{share:>8.1%}")
+        print(f"  {'total':<14}{latency.mean / 1e3:>8.1f}us{latency.quantile(0.5) / 1e3:>8.0f}us"
+              f"{latency.quantile(0.99) / 1e3:>8.0f}us")
+        counters = metrics.counters
+        print(f"  • Alerts: {counters['alerts']} single ({counters['template_hits']} template hits, "
+              f"{counters['first_alerts']} first of type), "
+              f"{counters['batch_alerts']} in {counters['batches']} batches "
+              f"(mean {metrics.batch_latency.mean / 1e6:.1f} ms per batch)")
+        if metrics.last_capture and metrics.last_capture is not self._reported_capture:
+            self._reported_capture = metrics.last_capture
+            print("\n🔬 Capture report:")
+            print(metrics.last_capture)
+        print("="*80)
+
+    def explain_scoring_system(self) -> None:
+        """Explain the label-based scoring system with this analyzer's config"""
+        explain_scoring_system(self.analyzer.scoring_config)
+
     def simulate_realtime(self, interval: float = 2, duration: Optional[float] = None) -> None:
         """Simulate real-time alert monitoring"""
         start_time = time.time()
@@ -134,8 +317,7 @@ class AlertMonitor:
                     
                 alert = self.simulator.generate_alert()
                 analysis = self.analyzer.analyze_alert(alert)
-                
-                self.print_alert_details(alert, analysis)
+                self._after_analysis([alert], analysis)
                 alert_count += 1
                 
                 # Print periodic statistics
@@ -154,38 +336,258 @@ class AlertMonitor:
             print(f"\nTotal monitoring time: {time.time() - start_time:.1f} seconds")
             print(f"Alerts processed: {alert_count}")
 
-    def batch_analysis(self, num_alerts: int) -> None:
+    def listen(self, host: str = "127.0.0.1", udp_port: Optional[int] = 5514,
+               tcp_port: Optional[int] = 5514, stats_interval: float = 5,
+               duration: Optional[float] = None) -> None:
+        """Analyze live syslog traffic received over UDP/TCP"""
+        import asyncio
+
+        from secops.syslog_server import SyslogIngestServer
+
+        server = SyslogIngestServer(self.analyzer, host=host, udp_port=udp_port, tcp_port=tcp_port,
+                                    on_results=self._after_analysis)
+
+        async def run():
+            await server.start()
+            print(f"📡 Listening on {host} (UDP {server.udp_port}, TCP {server.tcp_port})")
+            start_time = time.time()
+            while not duration or time.time() - start_time < duration:
+                await asyncio.sleep(stats_interval)
+                ingest = server.stats()
+                print(f"📥 received {ingest['received']} | analyzed {ingest['analyzed']} | "
+                      f"queue {ingest['queue_depth']} | dropped {ingest['dropped_queue_full']} | "
+                      f"unparsed {ingest['unparsed']} | {ingest['alerts_per_second']:.0f} alerts/s")
+            await server.drain()
+            await server.stop()
+
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            print("\n\n🛑 Listener stopped by user")
+        finally:
+            self.print_type_statistics(self.analyzer.get_statistics())
+            print(f"Ingest counters: {server.stats()}")
+
+    def replay(self, path: str, speed: float = 1.0, fmt: str = 'auto',
+               stats_interval: float = 5) -> None:
+        """Replay a recorded JSONL/syslog alert file through the analyzer"""
+        from secops.replay import AlertReplayer, read_alerts
+
+        file_counters = {}
+        replayer = AlertReplayer(self.analyzer, speed=speed, on_results=self._after_analysis)
+        pace = f"{speed:g}x recorded speed" if speed else "as fast as possible"
+        print(f"⏯️  Replaying {path} at {pace}")
+
+        def progress(stats):
+            print(f"⏩ {stats['alerts']} alerts | {stats['alerts_per_second']:.0f} alerts/s | "
+                  f"{stats['effective_speed']:.1f}x | lag p99 {stats['lag_p99']:.3f}s "
+                  f"max {stats['lag_max']:.3f}s | unparsed {file_counters.get('unparsed', 0)}")
+
+        try:
+            replayer.run(read_alerts(path, fmt, counters=file_counters), progress, stats_interval)
+        except KeyboardInterrupt:
+            print("\n\n🛑 Replay stopped by user")
+        finally:
+            self.print_type_statistics(self.analyzer.get_statistics())
+            stats = replayer.stats()
+            print(f"\nReplayed {stats['alerts']} alerts ({file_counters.get('unparsed', 0)} "
+                  f"unparsed lines) in {stats['elapsed']:.1f}s: "
+                  f"{stats['alerts_per_second']:.0f} alerts/s, "
+                  f"{stats['recorded_span']:.0f}s of recorded time "
+                  f"({stats['effective_speed']:.1f}x)")
+            if speed:
+                print(f"Lag behind schedule: mean {stats['lag_mean']:.3f}s, "
+                      f"p99 {stats['lag_p99']:.3f}s, max {stats['lag_max']:.3f}s")
+
+    def batch_analysis(self, num_alerts: int, workers: int = 1) -> None:
         """Perform batch analysis of alerts"""
         print(f"\nGenerating and analyzing {num_alerts} alerts...")
-        alerts = self.simulator.generate_batch(num_alerts, include_similar=True)
-        
-        for alert in alerts:
-            analysis = self.analyzer.analyze_alert(alert)
-            self.print_alert_details(alert, analysis)
+        # Compact records interned in the analyzer's vocabulary (dicts for the shards)
+        vocabulary = self.analyzer.vocabulary if workers <= 1 else None
+        alerts = self.simulator.generate_batch(num_alerts, include_similar=True,
+                                               vocabulary=vocabulary)
+        if workers > 1:
+            from secops.sharding import ShardedAnalyzer
+
+            # Shard by alert type across worker processes
+            with ShardedAnalyzer(workers, analyzer_kwargs=self._analyzer_kwargs) as engine:
+                results = engine.analyze_alerts(alerts)
+                stats = engine.get_statistics()
+        else:
+            results = self.analyzer.analyze_alerts(alerts)
+            self._after_analysis()
+            stats = self.analyzer.get_statistics()
         
-        stats = self.analyzer.get_statistics()
+        self.emit(alerts, results)
         self.print_type_statistics(stats)
 
+def parse_speed(value: str) -> float:
+    """--speed argument type; defers importing the replay module"""
+    from secops import replay
+    return replay.parse_speed(value)
+
 def main():
     parser = argparse.ArgumentParser(description='HIPS Alert Analysis System')
-    parser.add_argument('--mode', choices=['batch', 'realtime'], default='batch',
-                      help='Analysis mode: batch or realtime')
+    parser.add_argument('--mode', choices=['batch', 'realtime', 'listen', 'replay', 'explain'],
+                      default='batch',
+                      help='Analysis mode: batch, realtime, listen (syslog server), '
+                           'replay (recorded file) or explain (print the scoring system)')
     parser.add_argument('--count', type=int, default=15,
                       help='Number of alerts to generate in batch mode')
     parser.add_argument('--interval', type=float, default=2,
                       help='Interval between alerts in realtime mode (seconds)')
     parser.add_argument('--duration', type=int,
                       help='Duration to run in realtime mode (seconds)')
+    parser.add_argument('--max-history', type=int,
+                      help='Keep at most this many alerts per type')
+    parser.add_argument('--max-age', type=float,
+                      help='Evict alerts older than this many seconds per type')
+    parser.add_argument('--decay-half-life', type=float,
+                      help='Half-life (seconds) for exponential decay of pattern frequencies; '
+                           'alerts older than ~10 half-lives are evicted')
+    parser.add_argument('--similarity', choices=['exact', 'lsh', 'cluster'], default='exact',
+                      help='Similarity backend: exact scan, approximate LSH index, or online '
+                           'centroid clustering (assigns incident cluster IDs)')
+    parser.add_argument('--lsh-bits', type=int, default=12,
+                      help='Hyperplanes per LSH table (more bits: faster, lower recall)')
+    parser.add_argument('--lsh-tables', type=int, default=8,
+                      help='Number of LSH tables (more tables: higher recall, slower)')
+    parser.add_argument('--vectorizer', choices=['tfidf', 'hashing'], default='tfidf',
+                      help='tfidf: vocabulary fitted on the first alert; '
+                           'hashing: streaming feature hashing with online IDF')
+    parser.add_argument('--burst-window', type=float,
+                      help='Enable burst detection over a sliding window of this many seconds')
+    parser.add_argument('--burst-min-count', type=int, default=20,
+                      help='Alerts per window below which a key never counts as bursting')
+    parser.add_argument('--burst-weight', type=float, default=0.5,
+                      help='How far a full burst raises an alert score towards 1')
+    parser.add_argument('--host', default='127.0.0.1',
+                      help='Interface to bind in listen mode')
+    parser.add_argument('--udp-port', type=int, default=5514,
+                      help='Syslog UDP port in listen mode (-1 disables)')
+    parser.add_argument('--tcp-port', type=int, default=5514,
+                      help='Syslog TCP port in listen mode (-1 disables)')
+    parser.add_argument('--replay-file',
+                      help='Recorded alerts for replay mode (JSONL or syslog lines, .gz ok)')
+    parser.add_argument('--replay-format', choices=['auto', 'jsonl', 'syslog'], default='auto',
+                      help='Line format of --replay-file (auto: JSON if a line starts with {)')
+    parser.add_argument('--speed', type=parse_speed, default=1.0,
+                      help="Replay speed: 'original', a factor such as 10 or 10x, "
+                           "or 'fast' (as fast as possible)")
+    parser.add_argument('--quiet', action='store_true',
+                      help='Print only HIGH-priority alert reports (listen/replay: print those)')
+    parser.add_argument('--output', action='append', default=[], metavar='PATH',
+                      help='Also write analyzed alerts to PATH (.csv: CSV, otherwise JSON lines); '
+                           'may be repeated')
+    parser.add_argument('--workers', type=int, default=1,
+                      help='Worker processes for batch mode (alerts sharded by type); each type '
+                           'fits its own TF-IDF vocabulary, so scores differ from --workers 1')
+    parser.add_argument('--metrics', action='store_true',
+                      help='Collect per-stage timings and counters')
+    parser.add_argument('--metrics-port', type=int,
+                      help='Serve Prometheus metrics on this port (implies --metrics)')
+    parser.add_argument('--metrics-json',
+                      help='Periodically dump metrics as JSON to this file (implies --metrics)')
+    parser.add_argument('--metrics-interval', type=float, default=10,
+                      help='Seconds between JSON metrics dumps')
+    parser.add_argument('--profile', type=int, metavar='N',
+                      help='Capture a cProfile/tracemalloc report over the first N alerts')
+    parser.add_argument('--profile-mode', choices=['cprofile', 'tracemalloc'], default='cprofile',
+                      help='Capture type for --profile')
+    parser.add_argument('--profile-output',
+                      help='Write the capture to this file (pstats dump or text report)')
+    parser.add_argument('--scoring-config', metavar='PATH',
+                      help='JSON file with type/severity weights, score mix and priority '
+                           'thresholds; reloaded while running when the file changes')
+    parser.add_argument('--snapshot-dir',
+                      help='Periodically snapshot analyzer state into this directory')
+    parser.add_argument('--snapshot-interval', type=float, default=300,
+                      help='Seconds between snapshots')
+    parser.add_argument('--restore', action='store_true',
+                      help='Resume from the latest snapshot in --snapshot-dir')
     
     args = parser.parse_args()
-    
-    monitor = AlertMonitor()
+    try:
+        scoring = load_scoring_config(args.scoring_config) if args.scoring_config else None
+    except (OSError, ValueError) as exc:
+        parser.error(f"--scoring-config: {exc}")
+    if args.mode == 'explain':
+        # No analyzer, so none of the ML imports
+        explain_scoring_system(scoring)
+        return
+
+    from secops.correlation import BurstDetector
+    from secops.similarity import get_backend
+
+    retention = RetentionPolicy(
+        max_rows=args.max_history,
+        max_age=args.max_age,
+        decay_half_life=args.decay_half_life
+    )
+    if args.similarity == 'lsh':
+        backend = get_backend('lsh', n_bits=args.lsh_bits, n_tables=args.lsh_tables)
+    elif args.similarity == 'cluster':
+        backend = get_backend('cluster')
+    else:
+        backend = get_backend('exact')
+    correlation = None
+    if args.burst_window:
+        correlation = BurstDetector(window=args.burst_window, min_count=args.burst_min_count,
+                                    weight=args.burst_weight)
+    instrument = bool(args.metrics or args.metrics_port is not None or args.metrics_json
+                      or args.profile)
+    monitor = AlertMonitor(retention=retention, similarity_backend=backend,
+                           vectorizer_mode=args.vectorizer, instrument=instrument,
+                           correlation=correlation, scoring=scoring)
     monitor.print_header()
+    if args.mode == 'replay' and not args.replay_file:
+        parser.error('--mode replay requires --replay-file')
+    if args.snapshot_dir and args.workers > 1:
+        parser.error('--snapshot-dir is not supported with --workers')
+    # Per-alert console reports are off for the high-volume modes unless --quiet.
+    # Live modes must not wait on a slow sink (it would back up ingestion), so
+    # their writer drops and counts batches when its queue is full; batch and
+    # replay read from a source that can wait, so their output stays lossless.
+    monitor.enable_output(console=args.mode in ('batch', 'realtime') or args.quiet,
+                          quiet=args.quiet, paths=args.output,
+                          block=args.mode in ('batch', 'replay'))
+    if args.snapshot_dir:
+        monitor.enable_snapshots(args.snapshot_dir, args.snapshot_interval, restore=args.restore)
+    elif args.restore:
+        parser.error('--restore requires --snapshot-dir')
+    if args.scoring_config:
+        monitor.watch_scoring_config(args.scoring_config)
+
+    exporters = []
+    if args.metrics_port is not None or args.metrics_json:
+        from secops.instrumentation import JsonMetricsDumper, MetricsServer
+    if args.metrics_port is not None:
+        exporters.append(MetricsServer(monitor.analyzer, args.host, args.metrics_port).start())
+        print(f"📈 Prometheus metrics on http://{args.host}:{exporters[-1].port}/metrics")
+    if args.metrics_json:
+        exporters.append(JsonMetricsDumper(monitor.analyzer, args.metrics_json,
+                                           args.metrics_interval).start())
+    if args.profile:
+        monitor.analyzer.metrics.start_capture(args.profile, args.profile_mode, args.profile_output)
     
-    if args.mode == 'realtime':
-        monitor.simulate_realtime(args.interval, args.duration)
-    else:
-        monitor.batch_analysis(args.count)
+    try:
+        if args.mode == 'realtime':
+            monitor.simulate_realtime(args.interval, args.duration)
+        elif args.mode == 'listen':
+            monitor.listen(
+                args.host,
+                args.udp_port if args.udp_port >= 0 else None,
+                args.tcp_port if args.tcp_port >= 0 else None,
+                duration=args.duration
+            )
+        elif args.mode == 'replay':
+            monitor.replay(args.replay_file, args.speed, args.replay_format)
+        else:
+            monitor.batch_analysis(args.count, args.workers)
+    finally:
+        for exporter in exporters:
+            exporter.stop()
+        monitor.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""Running statistics maintained as alerts are scored.
+
+`AnalyzerAggregates` keeps, per alert type, a fixed-bin histogram of final
+scores (streaming quantiles with `1 / SCORE_BINS` resolution) and per-
+severity counts and score sums. Updates cost O(1) per alert (one bincount
+per type and batch on the vectorized path); reading is O(types).
+
+Reads are lock-free: the writer only ever increments existing counters or
+publishes a new container by rebinding one attribute (copy-on-write when a
+type or severity is first seen), so a reader on another thread never sees
+a container change size under it. Counters read during an update may be
+one alert apart from each other.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+SCORE_BINS = 200
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def score_quantile(histogram, q: float) -> float:
+    """Quantile `q` of a score histogram, interpolated within its bin"""
+    histogram = np.asarray(histogram)
+    total = histogram.sum()
+    if total == 0:
+        return 0.0
+    cumulative = np.cumsum(histogram)
+    rank = q * total
+    i = int(np.searchsorted(cumulative, rank))
+    i = min(i, len(histogram) - 1)
+    below = cumulative[i] - histogram[i]
+    fraction = (rank - below) / histogram[i] if histogram[i] else 0.0
+    return float((i + fraction) / len(histogram))
+
+
+def summarize_scores(histogram, total: float, with_histogram: bool = False) -> Dict:
+    """count / mean / quantiles of a score histogram (`total` is the score sum)"""
+    count = int(np.sum(histogram))
+    summary = {'count': count, 'mean': total / count if count else 0.0}
+    for q in QUANTILES:
+        summary[f'p{round(q * 100)}'] = score_quantile(histogram, q)
+    if with_histogram:
+        # Kept in overall summaries so shards can be merged exactly
+        summary['histogram'] = [int(c) for c in histogram]
+    return summary
+
+
+def _bins(scores):
+    return np.minimum((np.asarray(scores, dtype=float) * SCORE_BINS).astype(np.int64),
+                      SCORE_BINS - 1).clip(0)
+
+
+class TypeAggregate:
+    """Score histogram and severity breakdown of one alert type"""
+
+    __slots__ = ('histogram', 'score_sum', 'severities')
+
+    def __init__(self):
+        self.histogram = np.zeros(SCORE_BINS, dtype=np.int64)
+        self.score_sum = 0.0
+        # severity -> [count, score sum]; replaced (never resized) on a new severity
+        self.severities = {}
+
+    def _severity(self, severity) -> List:
+        entry = self.severities.get(severity)
+        if entry is None:
+            entry = [0, 0.0]
+            self.severities = {**self.severities, severity: entry}
+        return entry
+
+    def observe(self, severity, score: float) -> None:
+        score = float(score)
+        self.histogram[min(max(int(score * SCORE_BINS), 0), SCORE_BINS - 1)] += 1
+        self.score_sum += score
+        entry = self._severity(severity)
+        entry[0] += 1
+        entry[1] += score
+
+    def observe_many(self, severities, scores) -> None:
+        scores = np.asarray(scores, dtype=float)
+        self.histogram += np.bincount(_bins(scores), minlength=SCORE_BINS)
+        self.score_sum += float(scores.sum())
+        severities = np.asarray(severities, dtype=object)
+        for severity in dict.fromkeys(severities.tolist()):
+            mask = severities == severity
+            entry = self._severity(severity)
+            entry[0] += int(np.count_nonzero(mask))
+            entry[1] += float(scores[mask].sum())
+
+    def snapshot(self) -> Dict:
+        severities = {severity: {'count': count, 'mean_score': total / count if count else 0.0}
+                      for severity, (count, total) in list(self.severities.items())}
+        return {'scores': summarize_scores(self.histogram.copy(), self.score_sum),
+                'severities': severities}
+
+    def __getstate__(self):
+        return self.histogram, self.score_sum, self.severities
+
+    def __setstate__(self, state):
+        self.histogram, self.score_sum, self.severities = state
+
+
+class AnalyzerAggregates:
+    """Per-type running aggregates, in first-seen type order"""
+
+    def __init__(self):
+        self._types = {}
+
+    def register(self, alert_type: str) -> TypeAggregate:
+        aggregate = self._types.get(alert_type)
+        if aggregate is None:
+            aggregate = TypeAggregate()
+            # Publish a new dict so readers iterating the old one are unaffected
+            self._types = {**self._types, alert_type: aggregate}
+        return aggregate
+
+    def observe(self, alert_type: str, severity, score: float) -> None:
+        self.register(alert_type).observe(severity, score)
+
+    def observe_batch(self, alert_types, severities, scores) -> None:
+        """Record analyze_alerts result columns (any type order)"""
+        alert_types = np.asarray(alert_types, dtype=object)
+        severities = np.asarray(severities, dtype=object)
+        scores = np.asarray(scores, dtype=float)
+        for alert_type in dict.fromkeys(alert_types.tolist()):
+            mask = alert_types == alert_type
+            self.register(alert_type).observe_many(severities[mask], scores[mask])
+
+    def types(self) -> Tuple[Tuple[str, TypeAggregate], ...]:
+        """Stable view of (type, aggregate) pairs for readers"""
+        return tuple(self._types.items())
+
+    def summary(self) -> Dict:
+        """Scores and severity breakdown over all types"""
+        histogram = np.zeros(SCORE_BINS, dtype=np.int64)
+        score_sum = 0.0
+        severities = {}
+        for _, aggregate in self.types():
+            histogram += aggregate.histogram
+            score_sum += aggregate.score_sum
+            for severity, (count, total) in list(aggregate.severities.items()):
+                merged = severities.setdefault(severity, [0, 0.0])
+                merged[0] += count
+                merged[1] += total
+        return {
+            'scores': summarize_scores(histogram, score_sum, with_histogram=True),
+            'severities': {severity: {'count': count, 'mean_score': total / count if count else 0.0}
+                           for severity, (count, total) in severities.items()}
+        }
+
+
+def merge_summaries(summaries: Iterable[Dict]) -> Dict:
+    """Combine `AnalyzerAggregates.summary()` outputs of analyzers with disjoint types"""
+    histogram = np.zeros(SCORE_BINS, dtype=np.int64)
+    score_sum = 0.0
+    severities = {}
+    for summary in summaries:
+        scores = summary['scores']
+        histogram += np.asarray(scores['histogram'], dtype=np.int64)
+        score_sum += scores['mean'] * scores['count']
+        for severity, entry in summary['severities'].items():
+            merged = severities.setdefault(severity, [0, 0.0])
+            merged[0] += entry['count']
+            merged[1] += entry['mean_score'] * entry['count']
+    return {
+        'scores': summarize_scores(histogram, score_sum, with_histogram=True),
+        'severities': {severity: {'count': count, 'mean_score': total / count if count else 0.0}
+                       for severity, (count, total) in severities.items()}
+    }
@@ -3,19 +3,24 @@ from datetime import datetime, timedelta
 import ipaddress
 from typing import Dict, List, Optional
 
+from secops.records import AlertRecord, AlertVocabulary
+
+# Message formats of the simulated HIPS agents
+ALERT_TEMPLATES = (
+    "[{timestamp}] HIPS Alert [{alert_type}]: {pattern} detected from process {process} "
+    "(PID: {pid}). Source IP: {source_ip}. Severity: {severity}",
+
+    "[{timestamp}] Security Warning [{alert_type}]: {process} (PID: {pid}) triggered {pattern}. "
+    "Origin: {source_ip}. Risk Level: {severity}",
+
+    "[{timestamp}] Threat Detected [{alert_type}]: {pattern} involving {process}. "
+    "Process ID: {pid}, Source: {source_ip}, Priority: {severity}"
+)
+
 class HIPSAlertSimulator:
     def __init__(self):
         # Cache alert templates for better performance
-        self._alert_templates = [
-            "[{timestamp}] HIPS Alert [{alert_type}]: {pattern} detected from process {process} "
-            "(PID: {pid}). Source IP: {source_ip}. Severity: {severity}",
-            
-            "[{timestamp}] Security Warning [{alert_type}]: {process} (PID: {pid}) triggered {pattern}. "
-            "Origin: {source_ip}. Risk Level: {severity}",
-            
-            "[{timestamp}] Threat Detected [{alert_type}]: {pattern} involving {process}. "
-            "Process ID: {pid}, Source: {source_ip}, Priority: {severity}"
-        ]
+        self._alert_templates = ALERT_TEMPLATES
         
         # Pre-calculate alert types list for better performance
         self._alert_type_list = list(self._get_alert_types().keys())
@@ -144,13 +149,17 @@ class HIPSAlertSimulator:
             "timestamp": timestamp
         }
     
-    def generate_batch(self, num_alerts: int, include_similar: bool = True) -> List[Dict]:
+    def generate_batch(self, num_alerts: int, include_similar: bool = True,
+                       similar_ratio: float = 0.3,
+                       vocabulary: Optional[AlertVocabulary] = None) -> List[Dict]:
         """
         Generate a batch of alerts, optionally including similar alerts
         
         Args:
             num_alerts: Number of alerts to generate
             include_similar: If True, some alerts will be variations of the same event
+            similar_ratio: Probability that an alert is a variation of an earlier one
+            vocabulary: If given, return compact AlertRecords interned in it
         
         Returns:
             List of generated alerts
@@ -159,7 +168,7 @@ class HIPSAlertSimulator:
         base_alerts = []
         
         for _ in range(num_alerts):
-            if include_similar and base_alerts and random.random() < 0.3:
+            if include_similar and base_alerts and random.random() < similar_ratio:
                 # Generate a variation of an existing alert
                 base_alert = random.choice(base_alerts)
                 modified_alert = base_alert.copy()
@@ -186,4 +195,6 @@ class HIPSAlertSimulator:
                 alerts.append(new_alert)
                 base_alerts.append(new_alert)
                 
+        if vocabulary is not None:
+            return [AlertRecord.from_dict(alert, vocabulary) for alert in alerts]
         return alerts
\ No newline at end of file
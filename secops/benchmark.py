@@ -0,0 +1,418 @@
+"""Reproducible throughput / latency / memory benchmarks for the analyzer.
+
+Each case (stream size x alert mix) runs in a fresh spawned process so its
+peak RSS is not polluted by earlier cases. Alerts are generated with a fixed
+seed through `HIPSAlertSimulator.generate_batch`; generation time is not
+measured.
+
+    python -m secops.benchmark --sizes 1000 10000 --output bench.json
+    python -m secops.benchmark --sizes 1000 10000 --compare bench.json
+
+Results are written as JSON so runs can be compared across commits; scaling
+regressions show up as alerts/s dropping with stream size. The analyzer is
+configured with the same options as main.py (`--similarity`, `--max-history`,
+`--max-age`, `--decay-half-life`, `--vectorizer`), so large streams can be
+measured with a bounded configuration:
+
+    python -m secops.benchmark --sizes 1000000 --similarity cluster --max-history 5000
+
+`--startup` instead times short-lived CLI invocations, each in a fresh
+interpreter, and lists the heavy packages each one imported:
+
+    python -m secops.benchmark --startup --output startup.json
+
+`--normalizer` times message normalization per call: the original three
+`re.sub` passes (with and without tokenizing) against `AlertNormalizer`
+uncached and cached:
+
+    python -m secops.benchmark --normalizer --output normalizer.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# With the default (unbounded, exact) analyzer every alert is compared with
+# the whole history, so cost grows with the square of the stream size: 100k
+# alerts take minutes per mix, 1M would not finish. Pass larger sizes
+# explicitly with --sizes, together with a retention limit or another backend.
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Alert mixes: generate_batch arguments for each workload
+MIXES = {
+    'similar-heavy': {'include_similar': True, 'similar_ratio': 0.8},
+    'unique-heavy': {'include_similar': False},
+}
+
+# CLI invocations timed by --startup (arguments to the Python interpreter)
+STARTUP_COMMANDS = {
+    'help': ['main.py', '--help'],
+    'explain': ['main.py', '--mode', 'explain'],
+    'batch-1': ['main.py', '--count', '1'],
+    'import-analyzer': ['-c', 'import secops.syslog_vectorization'],
+}
+
+# Packages that dominate import time; a light command should load none of them
+HEAVY_MODULES = ('numpy', 'scipy', 'sklearn', 'pandas')
+
+# Metrics where a higher value is better (everything else: lower is better)
+HIGHER_IS_BETTER = {'alerts_per_second', 'batch_alerts_per_second'}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _generate(size: int, mix: str, seed: int) -> List[Dict]:
+    from secops.alert_simulator import HIPSAlertSimulator
+
+    random.seed(seed)
+    return HIPSAlertSimulator().generate_batch(size, **MIXES[mix])
+
+
+def run_case(size: int, mix: str, seed: int = 42, analyzer_kwargs: Optional[Dict] = None,
+             batch: bool = False) -> Dict:
+    """Run one benchmark case in the current process and return its metrics"""
+    from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+    alerts = _generate(size, mix, seed)
+    rss_before = _peak_rss_mb()
+
+    analyzer = SyslogAlertAnalyzer(**(analyzer_kwargs or {}))
+    latencies = np.empty(size, dtype=np.int64)
+    clock = time.perf_counter_ns
+    start = clock()
+    for i, alert in enumerate(alerts):
+        t0 = clock()
+        analyzer.analyze_alert(alert)
+        latencies[i] = clock() - t0
+    elapsed = (clock() - start) / 1e9
+
+    result = {
+        'size': size,
+        'mix': mix,
+        'alerts_per_second': size / elapsed if elapsed else 0.0,
+        'latency_p50_us': float(np.percentile(latencies, 50)) / 1000,
+        'latency_p99_us': float(np.percentile(latencies, 99)) / 1000,
+        'latency_max_us': float(latencies.max()) / 1000,
+        'peak_rss_mb': _peak_rss_mb(),
+        'input_rss_mb': rss_before,
+        'analyzer_memory_mb': analyzer.get_statistics()['memory_bytes'] / (1024 * 1024),
+    }
+
+    if batch:
+        batch_analyzer = SyslogAlertAnalyzer(**(analyzer_kwargs or {}))
+        start = time.perf_counter()
+        batch_analyzer.analyze_alerts(alerts)
+        elapsed = time.perf_counter() - start
+        result['batch_alerts_per_second'] = size / elapsed if elapsed else 0.0
+
+    return result
+
+
+def _run_case_child(queue, *args) -> None:
+    queue.put(run_case(*args))
+
+
+def run_isolated(size: int, mix: str, seed: int, analyzer_kwargs: Optional[Dict],
+                 batch: bool) -> Dict:
+    """Run a case in a fresh spawned process (clean peak RSS)"""
+    context = mp.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_case_child,
+                              args=(queue, size, mix, seed, analyzer_kwargs, batch))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes=DEFAULT_SIZES, mixes=tuple(MIXES), seed: int = 42,
+              analyzer_kwargs: Optional[Dict] = None, batch: bool = False,
+              isolate: bool = True, verbose: bool = True) -> Dict:
+    """Run every (size, mix) case and return a JSON-serializable report"""
+    import sklearn
+    import scipy
+
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'seed': seed,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'sklearn': sklearn.__version__,
+            'machine': platform.machine(),
+            'analyzer_kwargs': {k: repr(v) for k, v in (analyzer_kwargs or {}).items()},
+        },
+        'results': []
+    }
+    for mix in mixes:
+        for size in sizes:
+            runner = run_isolated if isolate else run_case
+            result = runner(size, mix, seed, analyzer_kwargs, batch)
+            report['results'].append(result)
+            if verbose:
+                print(f"{mix:>14} {size:>9}: {result['alerts_per_second']:>9.0f} alerts/s  "
+                      f"p50 {result['latency_p50_us']:>8.1f} us  "
+                      f"p99 {result['latency_p99_us']:>8.1f} us  "
+                      f"peak RSS {result['peak_rss_mb']:>7.1f} MB", flush=True)
+    return report
+
+
+def _legacy_preprocess(message: str) -> str:
+    # Message preprocessing before AlertNormalizer: one re.sub per mask, then lower()
+    message = _LEGACY_PATTERNS[0].sub('IP_ADDR', message)
+    message = _LEGACY_PATTERNS[1].sub('TIMESTAMP', message)
+    message = _LEGACY_PATTERNS[2].sub('PID: XXX', message)
+    return message.lower()
+
+
+_LEGACY_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\b(?:\d{1,3}\.){3}\d{1,3}\b', r'\b\d{2}:\d{2}:\d{2}\b', r'PID: \d+'))
+
+
+def _per_call_us(function, messages, repeats: int) -> float:
+    """Best-of-`repeats` mean microseconds per call over `messages`"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for message in messages:
+            function(message)
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / len(messages)
+
+
+def run_normalizer(n_messages: int = 2000, seed: int = 42, repeats: int = 5,
+                   verbose: bool = True) -> Dict:
+    """Per-call cost of message normalization, original passes vs `AlertNormalizer`"""
+    from secops.normalizer import AlertNormalizer
+
+    messages = [alert['raw_message'] for alert in _generate(n_messages, 'unique-heavy', seed)]
+    token_pattern = re.compile(r'\b\w+\b')
+    normalizer = AlertNormalizer(cache_size=n_messages)
+    for message in messages:
+        normalizer.normalize(message)
+
+    timings = {
+        'legacy_preprocess_us': _per_call_us(_legacy_preprocess, messages, repeats),
+        'legacy_preprocess_tokens_us': _per_call_us(
+            lambda message: token_pattern.findall(_legacy_preprocess(message)), messages, repeats),
+        # _normalize bypasses the LRU cache: the cost of a first-seen message
+        'normalize_uncached_us': _per_call_us(normalizer._normalize, messages, repeats),
+        'normalize_cached_us': _per_call_us(normalizer.normalize, messages, repeats),
+    }
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'seed': seed,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'messages': n_messages,
+        },
+        'results': [{'command': 'normalizer', **timings}]
+    }
+    if verbose:
+        for name, value in timings.items():
+            print(f"{name:>28}: {value:>7.2f} us", flush=True)
+        # Uncached normalize also tokenizes, so it is slower than the masking
+        # passes alone; compare it with the tokenizing variant
+        print(f"{'uncached vs legacy':>28}: {timings['normalize_uncached_us'] / timings['legacy_preprocess_us']:.2f}x "
+              f"(masking only), {timings['normalize_uncached_us'] / timings['legacy_preprocess_tokens_us']:.2f}x "
+              f"(masking + tokens)", flush=True)
+    return report
+
+
+def _repo_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _heavy_imports(argv: List[str]) -> List[str]:
+    """Heavy packages a command imports, from the interpreter's -X importtime log"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', *argv], cwd=_repo_root(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    loaded = set()
+    for line in completed.stderr.splitlines():
+        if line.startswith('import time:'):
+            package = line.rsplit('|', 1)[-1].strip().split('.')[0]
+            if package in HEAVY_MODULES:
+                loaded.add(package)
+    return [package for package in HEAVY_MODULES if package in loaded]
+
+
+def run_startup(commands: Optional[Dict[str, List[str]]] = None, repeats: int = 5,
+                verbose: bool = True) -> Dict:
+    """Wall time of each command in a fresh interpreter, and the heavy packages it loads"""
+    commands = commands or STARTUP_COMMANDS
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeats': repeats,
+        },
+        'results': []
+    }
+    for name, argv in commands.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *argv], cwd=_repo_root(), check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+        result = {
+            'command': name,
+            'argv': argv,
+            'seconds_min': min(timings),
+            'seconds_median': float(np.median(timings)),
+            'heavy_modules': _heavy_imports(argv),
+        }
+        report['results'].append(result)
+        if verbose:
+            print(f"{name:>16}: median {result['seconds_median']:>6.3f} s  "
+                  f"min {result['seconds_min']:>6.3f} s  "
+                  f"imports {', '.join(result['heavy_modules']) or '-'}", flush=True)
+    return report
+
+
+def _case(result: Dict) -> tuple:
+    # Suite results are keyed by (mix, size), startup results by command
+    if 'command' in result:
+        return (result['command'],)
+    return result['mix'], result['size']
+
+
+def compare_reports(baseline: Dict, current: Dict, tolerance: float = 0.10) -> List[Dict]:
+    """Per-metric ratios current/baseline; flags changes worse than `tolerance`"""
+    previous = {_case(r): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        case = _case(result)
+        before = previous.get(case)
+        if before is None:
+            continue
+        for metric, value in result.items():
+            if (not isinstance(value, (int, float)) or metric == 'size'
+                    or metric not in before or not before[metric]):
+                continue
+            ratio = value / before[metric]
+            worse = ratio < 1 - tolerance if metric in HIGHER_IS_BETTER else ratio > 1 + tolerance
+            rows.append({
+                'case': ' '.join(str(part) for part in case),
+                'metric': metric,
+                'baseline': before[metric],
+                'current': value,
+                'ratio': ratio,
+                'regression': worse
+            })
+    return rows
+
+
+def _analyzer_kwargs(args) -> Dict:
+    """Analyzer settings from the command line (defaults are left out of the report)"""
+    from secops.retention import RetentionPolicy
+    from secops.similarity import get_backend
+
+    kwargs = {}
+    retention = RetentionPolicy(max_rows=args.max_history, max_age=args.max_age,
+                                decay_half_life=args.decay_half_life)
+    if retention.is_bounded:
+        kwargs['retention'] = retention
+    if args.similarity == 'lsh':
+        kwargs['similarity_backend'] = get_backend('lsh', n_bits=args.lsh_bits,
+                                                   n_tables=args.lsh_tables)
+    elif args.similarity == 'cluster':
+        kwargs['similarity_backend'] = get_backend('cluster')
+    if args.vectorizer != 'tfidf':
+        kwargs['vectorizer_mode'] = args.vectorizer
+    return kwargs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='HIPS analyzer benchmark suite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Stream sizes to run')
+    parser.add_argument('--mixes', nargs='+', choices=list(MIXES), default=list(MIXES),
+                        help='Alert mixes to run')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for alert generation')
+    parser.add_argument('--batch', action='store_true',
+                        help='Also measure the batch analyze_alerts API')
+    parser.add_argument('--no-isolate', action='store_true',
+                        help='Run cases in-process (faster, but peak RSS is cumulative)')
+    parser.add_argument('--startup', action='store_true',
+                        help='Time CLI start-up (fresh interpreter per run) instead of the suite')
+    parser.add_argument('--normalizer', action='store_true',
+                        help='Time message normalization per call instead of the suite')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='Runs per command with --startup (timing passes with --normalizer)')
+    parser.add_argument('--output', default='bench_output.json', help='JSON report path')
+    parser.add_argument('--compare', help='Baseline JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative change treated as a regression when comparing')
+    parser.add_argument('--similarity', choices=['exact', 'lsh', 'cluster'], default='exact',
+                        help='Similarity backend of the benchmarked analyzer')
+    parser.add_argument('--lsh-bits', type=int, default=12, help='Hyperplanes per LSH table')
+    parser.add_argument('--lsh-tables', type=int, default=8, help='Number of LSH tables')
+    parser.add_argument('--max-history', type=int, help='Keep at most this many alerts per type')
+    parser.add_argument('--max-age', type=float,
+                        help='Evict alerts older than this many seconds per type')
+    parser.add_argument('--decay-half-life', type=float,
+                        help='Half-life (seconds) for exponential decay of pattern frequencies')
+    parser.add_argument('--vectorizer', choices=['tfidf', 'hashing'], default='tfidf',
+                        help='tfidf (fitted vocabulary) or hashing (streaming online IDF)')
+    args = parser.parse_args()
+
+    if args.startup:
+        report = run_startup(repeats=args.repeats)
+    elif args.normalizer:
+        report = run_normalizer(seed=args.seed, repeats=args.repeats)
+    else:
+        try:
+            analyzer_kwargs = _analyzer_kwargs(args)
+        except ValueError as exc:
+            parser.error(str(exc))
+        report = run_suite(args.sizes, args.mixes, args.seed, analyzer_kwargs, batch=args.batch,
+                           isolate=not args.no_isolate)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_reports(baseline, report, args.tolerance)
+        regressions = [row for row in rows if row['regression']]
+        for row in rows:
+            flag = "REGRESSION" if row['regression'] else ""
+            print(f"{row['case']:>24} {row['metric']:<24} "
+                  f"{row['baseline']:>12.2f} -> {row['current']:>12.2f} ({row['ratio']:.2f}x) {flag}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
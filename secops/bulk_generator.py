@@ -0,0 +1,371 @@
+"""Vectorized bulk alert generation for load testing.
+
+`BulkAlertGenerator` draws every random field of a chunk of alerts with one
+NumPy call per field and formats messages from per-combination format
+strings, so producing a multi-million alert corpus takes seconds rather
+than minutes. Alerts use the same catalog and message templates as
+`HIPSAlertSimulator`.
+
+    python -m secops.bulk_generator --count 10000000 --output corpus.jsonl --seed 1
+
+Timestamps advance at `rate` alerts per second from `start_time`, so
+corpora are in arrival order (useful for replay and time-based retention).
+Seeded generators start at the fixed `SEEDED_START_TIME` unless given a
+`start_time`, so the same seed gives byte-identical corpora on any day.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from secops.alert_simulator import ALERT_TEMPLATES, HIPSAlertSimulator
+from secops.records import AlertRecord, AlertVocabulary
+
+_EPOCH = datetime(1970, 1, 1)
+
+# First timestamp of seeded corpora that do not set a start time
+SEEDED_START_TIME = datetime(2024, 1, 1)
+
+# RFC 5424 severity of each alert severity, as in syslog_server.format_rfc5424
+_SYSLOG_SEVERITY = {"Critical": 2, "High": 3, "Medium": 4, "Low": 5}
+
+# Categorical fields copied from the base alert by a duplicate
+_CATEGORICAL = ('type', 'pattern', 'process', 'severity', 'template')
+
+
+def _normalized(weights, names, label):
+    p = np.array([float(weights.get(name, 0.0)) for name in names])
+    if np.any(p < 0) or p.sum() <= 0:
+        raise ValueError(f"{label} weights must be non-negative with a positive sum")
+    return p / p.sum()
+
+
+class BulkAlertGenerator:
+    """Seeded, chunked alert generator.
+
+    Args:
+        seed: Seed for the NumPy generator (same seed and settings, same corpus)
+        type_weights: Relative frequency per alert type (default: uniform over the catalog)
+        severity_weights: Relative frequency per severity; each type draws only
+            from its own severity range (default: uniform within the range)
+        duplicate_ratio: Fraction of alerts that repeat an earlier alert's
+            type, pattern, process, severity and template with a fresh
+            timestamp, IP and PID (the simulator's "similar" alerts)
+        rate: Alerts per second of simulated time
+        start_time: Timestamp of the first alert (default: `SEEDED_START_TIME`
+            with a seed, now without one)
+        pool_size: Recent distinct alerts that duplicates are drawn from
+    """
+
+    def __init__(self, seed: Optional[int] = None, type_weights: Optional[Dict[str, float]] = None,
+                 severity_weights: Optional[Dict[str, float]] = None,
+                 duplicate_ratio: float = 0.3, rate: float = 1000.0,
+                 start_time: Optional[datetime] = None, pool_size: int = 65536):
+        if not 0 <= duplicate_ratio < 1:
+            raise ValueError("duplicate_ratio must be in [0, 1)")
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        catalog = HIPSAlertSimulator._get_alert_types()
+        self.types = list(type_weights) if type_weights else list(catalog)
+        unknown = [name for name in self.types if name not in catalog]
+        if unknown:
+            raise ValueError(f"Unknown alert types: {unknown}")
+        self.type_p = _normalized(type_weights or dict.fromkeys(self.types, 1.0), self.types, "Type")
+
+        self.patterns = [catalog[name]["patterns"] for name in self.types]
+        self.processes = [catalog[name]["typical_processes"] for name in self.types]
+        self.severities = [catalog[name]["severity_range"] for name in self.types]
+        if severity_weights:
+            known = {level for entry in catalog.values() for level in entry["severity_range"]}
+            unknown = [name for name in severity_weights if name not in known]
+            if unknown:
+                raise ValueError(f"Unknown severities: {unknown} (catalog: {sorted(known)})")
+            for name, levels in zip(self.types, self.severities):
+                if not any(severity_weights.get(level, 0) > 0 for level in levels):
+                    raise ValueError(f"Severity weights leave {name} nothing to draw: "
+                                     f"it only produces {', '.join(levels)}")
+        self.severity_p = [
+            _normalized(severity_weights, levels, "Severity") if severity_weights
+            else np.full(len(levels), 1.0 / len(levels))
+            for levels in self.severities
+        ]
+
+        # Catalog strings are spliced into format strings and JSON unescaped
+        for text in [*self.types, *sum(self.patterns + self.processes + self.severities, [])]:
+            if any(char in text for char in '{}"\\'):
+                raise ValueError(f"Unsupported character in catalog string: {text!r}")
+
+        self.duplicate_ratio = duplicate_ratio
+        self.rate = rate
+        if start_time is None:
+            start_time = SEEDED_START_TIME if seed is not None else datetime.now().replace(microsecond=0)
+        self.start_seconds = int((start_time - _EPOCH).total_seconds())
+        self.pool_size = pool_size
+        self.rng = np.random.default_rng(seed)
+
+        self._generated = 0
+        self._pool = {field: np.empty(0, dtype=np.int64) for field in _CATEGORICAL}
+        self._formats = {}
+        self._radixes = (len(self.types), max(map(len, self.patterns)),
+                         max(map(len, self.processes)), max(map(len, self.severities)),
+                         len(ALERT_TEMPLATES))
+
+    # -- drawing -----------------------------------------------------------
+
+    def _draw_fresh(self, n):
+        rng = self.rng
+        fields = {'type': rng.choice(len(self.types), size=n, p=self.type_p)}
+        uniform = rng.random((3, n))
+        pattern = np.empty(n, dtype=np.int64)
+        process = np.empty(n, dtype=np.int64)
+        severity = np.empty(n, dtype=np.int64)
+        for t in range(len(self.types)):
+            rows = np.flatnonzero(fields['type'] == t)
+            pattern[rows] = uniform[0, rows] * len(self.patterns[t])
+            process[rows] = uniform[1, rows] * len(self.processes[t])
+            cumulative = np.cumsum(self.severity_p[t])
+            severity[rows] = np.minimum(np.searchsorted(cumulative, uniform[2, rows], side='right'),
+                                        len(cumulative) - 1)
+        fields.update(pattern=pattern, process=process, severity=severity,
+                      template=rng.integers(0, len(ALERT_TEMPLATES), size=n))
+        return fields
+
+    def draw(self, n: int) -> Dict[str, np.ndarray]:
+        """Index/value arrays for the next `n` alerts (the vectorized core)"""
+        rng = self.rng
+        fields = self._draw_fresh(n)
+
+        # Duplicates copy the categorical fields of an earlier fresh alert,
+        # drawn uniformly from the carried pool and this chunk's earlier fresh rows
+        n_pool = len(self._pool['type'])
+        duplicate = rng.random(n) < self.duplicate_ratio
+        if n and n_pool == 0:
+            duplicate[0] = False
+        fresh = ~duplicate
+        fresh_rows = np.flatnonzero(fresh)
+        fresh_before = np.cumsum(fresh) - fresh
+        pick = (rng.random(n) * (n_pool + fresh_before)).astype(np.int64)
+        dup_rows = np.flatnonzero(duplicate)
+        if len(dup_rows):
+            pick = pick[dup_rows]
+            from_pool = pick < n_pool
+            # (every pick is from the pool when the chunk has no fresh rows yet)
+            candidates = fresh_rows if len(fresh_rows) else np.zeros(1, dtype=np.int64)
+            sources = candidates[np.clip(pick - n_pool, 0, len(candidates) - 1)]
+            for field in _CATEGORICAL:
+                values = fields[field]
+                copied = values[sources]
+                if n_pool:
+                    copied = np.where(from_pool, self._pool[field][np.minimum(pick, n_pool - 1)],
+                                      copied)
+                values[dup_rows] = copied
+
+        for field in _CATEGORICAL:
+            self._pool[field] = np.concatenate(
+                [self._pool[field], fields[field][fresh_rows]]
+            )[-self.pool_size:]
+
+        index = self._generated + np.arange(n, dtype=np.int64)
+        fields['timestamp'] = self.start_seconds + (index / self.rate).astype(np.int64)
+        fields['pid'] = rng.integers(1000, 65001, size=n)
+        fields['source_ip'] = rng.integers(0, 2 ** 32, size=n, dtype=np.uint64)
+        fields['duplicate'] = duplicate
+        self._generated += n
+        return fields
+
+    # -- formatting --------------------------------------------------------
+    #
+    # Every distinct (template, type, pattern, process, severity) combination
+    # gets format strings with the static fields filled in, leaving
+    # {0}=timestamp, {1}=pid, {2}-{5}=IP octets and {6}=ISO timestamp. Rows
+    # are then rendered with one C-level str.format call each via map().
+
+    def _formats_for(self, combo):
+        formats = self._formats.get(combo)
+        if formats is None:
+            t, pattern, process, severity, template = combo
+            names = {
+                'alert_type': self.types[t],
+                'pattern': self.patterns[t][pattern],
+                'process': self.processes[t][process],
+                'severity': self.severities[t][severity]
+            }
+            message = ALERT_TEMPLATES[template].format(
+                timestamp='{0}', pid='{1}', source_ip='{2}.{3}.{4}.{5}', **names)
+            pri = 4 * 8 + _SYSLOG_SEVERITY.get(names['severity'], 5)
+            formats = self._formats[combo] = {
+                'message': message,
+                'jsonl': (f'{{{{"raw_message": "{message}", "type": "{names["alert_type"]}", '
+                          f'"pattern": "{names["pattern"]}", "severity": "{names["severity"]}", '
+                          f'"process": "{names["process"]}", "pid": {{1}}, '
+                          f'"source_ip": "{{2}}.{{3}}.{{4}}.{{5}}", "timestamp": "{{0}}"}}}}\n'),
+                'syslog': f"<{pri}>1 {{6}} {{hostname}} {names['process']} {{1}} HIPS - {message}\n"
+            }
+        return formats
+
+    def _render_args(self, fields, kind, hostname="hips-agent"):
+        """(per-row format strings, format arguments) for one kind of output"""
+        # Mixed-radix code of each row's combination (a 1-d unique is much cheaper)
+        code = np.zeros(len(fields['type']), dtype=np.int64)
+        for name, radix in zip(_CATEGORICAL, self._radixes):
+            code = code * radix + fields[name]
+        unique, inverse = np.unique(code, return_inverse=True)
+        formats = []
+        for value in unique.tolist():
+            combo = []
+            for radix in reversed(self._radixes):
+                value, digit = divmod(value, radix)
+                combo.append(digit)
+            fmt = self._formats_for(tuple(reversed(combo)))[kind]
+            if kind == 'syslog':
+                fmt = fmt.replace('{hostname}', hostname)
+            formats.append(fmt)
+        row_formats = np.array(formats, dtype=object)[inverse.ravel()].tolist()
+
+        seconds, second_index = np.unique(fields['timestamp'], return_inverse=True)
+        stamps = [(_EPOCH + timedelta(seconds=int(s))).strftime("%Y-%m-%d %H:%M:%S")
+                  for s in seconds.tolist()]
+        timestamps = np.array(stamps, dtype=object)[second_index.ravel()].tolist()
+
+        ips = fields['source_ip']
+        args = [timestamps, fields['pid'].tolist(), (ips >> 24).tolist(),
+                ((ips >> 16) & 255).tolist(), ((ips >> 8) & 255).tolist(), (ips & 255).tolist()]
+        if kind == 'syslog':
+            iso = np.array([stamp.replace(' ', 'T') for stamp in stamps], dtype=object)
+            args.append(iso[second_index.ravel()].tolist())
+        return row_formats, args
+
+    def generate(self, n: int) -> List[Dict]:
+        """The next `n` alerts as dicts (same shape as `HIPSAlertSimulator`)"""
+        fields = self.draw(n)
+        row_formats, args = self._render_args(fields, 'message')
+        timestamps, pids = args[0], args[1]
+        messages = map(str.format, row_formats, *args)
+        ips = map('{}.{}.{}.{}'.format, *args[2:6])
+        names = zip(fields['type'].tolist(), fields['pattern'].tolist(),
+                    fields['process'].tolist(), fields['severity'].tolist())
+        return [
+            {"raw_message": message, "type": self.types[t], "pattern": self.patterns[t][pattern],
+             "severity": self.severities[t][severity], "process": self.processes[t][process],
+             "pid": pid, "source_ip": ip, "timestamp": timestamp}
+            for message, (t, pattern, process, severity), pid, ip, timestamp
+            in zip(messages, names, pids, ips, timestamps)
+        ]
+
+    def generate_records(self, n: int, vocabulary: AlertVocabulary) -> List[AlertRecord]:
+        """The next `n` alerts as compact records interned in `vocabulary`"""
+        fields = self.draw(n)
+        row_formats, args = self._render_args(fields, 'message')
+        type_ids = [vocabulary.types.intern(name) for name in self.types]
+        pattern_ids = [[vocabulary.patterns.intern(p) for p in patterns] for patterns in self.patterns]
+        process_ids = [[vocabulary.processes.intern(p) for p in procs] for procs in self.processes]
+        severity_ids = [[vocabulary.severities.intern(s) for s in levels] for levels in self.severities]
+        columns = zip(map(str.format, row_formats, *args), fields['type'].tolist(),
+                      fields['pattern'].tolist(), fields['process'].tolist(),
+                      fields['severity'].tolist(), args[1], fields['source_ip'].tolist(),
+                      fields['timestamp'].tolist())
+        return [
+            AlertRecord(vocabulary, message, type_ids[t], severity_ids[t][severity],
+                        process_ids[t][process], pattern_ids[t][pattern], pid, ip, seconds)
+            for message, t, pattern, process, severity, pid, ip, seconds in columns
+        ]
+
+    def iter_alerts(self, total: int, chunk_size: int = 65536,
+                    vocabulary: Optional[AlertVocabulary] = None) -> Iterator:
+        """Lazily yield `total` alerts (records if a vocabulary is given)"""
+        for chunk in self.iter_chunks(total, chunk_size, vocabulary):
+            yield from chunk
+
+    def iter_chunks(self, total: int, chunk_size: int = 65536,
+                    vocabulary: Optional[AlertVocabulary] = None) -> Iterator[List]:
+        """Yield `total` alerts as lists of at most `chunk_size` (for analyze_alerts)"""
+        remaining = total
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            yield self.generate_records(n, vocabulary) if vocabulary else self.generate(n)
+            remaining -= n
+
+    # -- files -------------------------------------------------------------
+
+    def write(self, path: str, total: int, fmt: str = 'jsonl', chunk_size: int = 65536,
+              hostname: str = "hips-agent") -> int:
+        """Write `total` alerts to `path` as JSONL or RFC 5424 syslog lines ('-' for stdout)"""
+        if fmt not in ('jsonl', 'syslog'):
+            raise ValueError(f"Unknown output format: {fmt}")
+
+        out = sys.stdout if path == '-' else open(path, 'w', buffering=1 << 20)
+        try:
+            remaining = total
+            while remaining > 0:
+                n = min(chunk_size, remaining)
+                row_formats, args = self._render_args(self.draw(n), fmt, hostname)
+                out.writelines(map(str.format, row_formats, *args))
+                remaining -= n
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return total
+
+
+def _parse_weights(text: Optional[str]) -> Optional[Dict[str, float]]:
+    """'A=2,B=1' -> {'A': 2.0, 'B': 1.0}"""
+    if not text:
+        return None
+    weights = {}
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        try:
+            weights[name.strip()] = float(value) if value else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight {item!r}, expected NAME=NUMBER")
+    return weights
+
+
+def _parse_start_time(text: str) -> datetime:
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected 'YYYY-MM-DD HH:MM:SS', got {text!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Bulk HIPS alert corpus generator')
+    parser.add_argument('--count', type=int, default=1000000, help='Number of alerts')
+    parser.add_argument('--output', default='-', help="Output file ('-' for stdout)")
+    parser.add_argument('--format', choices=['jsonl', 'syslog'], default='jsonl',
+                        help='JSON lines (alert dicts) or RFC 5424 syslog lines')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.3,
+                        help='Fraction of alerts repeating an earlier alert template')
+    parser.add_argument('--type-weights', help='e.g. MEMORY_ATTACK=3,ACCESS_VIOLATION=1')
+    parser.add_argument('--severity-weights', help='e.g. Critical=1,High=2,Medium=4')
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help='Alerts per second of simulated time (spacing of timestamps)')
+    parser.add_argument('--start-time', type=_parse_start_time,
+                        help="Timestamp of the first alert, e.g. '2024-01-01 00:00:00' "
+                             f"(default: {SEEDED_START_TIME})")
+    args = parser.parse_args()
+
+    try:
+        generator = BulkAlertGenerator(
+            seed=args.seed,
+            type_weights=_parse_weights(args.type_weights),
+            severity_weights=_parse_weights(args.severity_weights),
+            duplicate_ratio=args.duplicate_ratio,
+            rate=args.rate,
+            start_time=args.start_time
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+    start = time.perf_counter()
+    generator.write(args.output, args.count, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.count} alerts in {elapsed:.1f}s ({args.count / elapsed:,.0f} alerts/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
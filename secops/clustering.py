@@ -0,0 +1,325 @@
+"""Online centroid clustering of alerts into incident groups.
+
+`CentroidClustering` is a similarity backend (see `secops.similarity`):
+instead of scanning every stored vector of a type, each alert is compared
+with the centroids of the type's live clusters. An alert joins the most
+similar cluster if the cosine similarity reaches the threshold (the
+analyzer's `similarity_threshold` unless given), and otherwise leads a new
+cluster. Lookups cost O(clusters x non-zeros of the alert) rather than
+O(history), and every alert gets a cluster ID (`cluster` in the analyzer's
+results) that groups near-duplicate alerts into one incident.
+
+Centroids are kept sparse, as the sum of the member vectors stored in one
+posting list per feature (the clusters having the feature and its summed
+value in each), so memory grows with the centroids' non-zeros rather than
+clusters x features seen. A join, and the subtraction of a member when
+retention evicts it, touches only the alert's non-zeros; a lookup reads
+only the posting lists of the alert's features. A cluster with no live
+members is retired; IDs are never reused.
+"""
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from secops.similarity import _top_k
+
+# Join threshold of an index built without one (the analyzer's default)
+DEFAULT_THRESHOLD = 0.85
+
+
+class CentroidClustering:
+    """Leader/centroid clustering backend.
+
+    Args:
+        threshold: Cosine similarity needed to join a cluster (None: the
+            analyzer's `similarity_threshold`)
+    """
+
+    name = "cluster"
+
+    def __init__(self, threshold: Optional[float] = None):
+        self.threshold = threshold
+
+    def create_index(self, store):
+        return CentroidIndex(store, self.threshold)
+
+    def __repr__(self):
+        return f"CentroidClustering(threshold={self.threshold})"
+
+
+class _Posting:
+    """Cluster slots whose centroid has one feature, and the feature's summed value in each"""
+
+    __slots__ = ('slots', 'values', 'size')
+
+    def __init__(self):
+        self.slots = np.empty(4, dtype=np.int64)
+        self.values = np.zeros(4)
+        self.size = 0
+
+    def append(self, slot, value=0.0):
+        """Add a slot; returns its position"""
+        if self.size == len(self.slots):
+            self.slots = np.concatenate([self.slots, np.empty(self.size, dtype=np.int64)])
+            self.values = np.concatenate([self.values, np.zeros(self.size)])
+        position = self.size
+        self.slots[position] = slot
+        self.values[position] = value
+        self.size += 1
+        return position
+
+
+class CentroidIndex:
+    """Live clusters of one alert type; rows of `store` map to cluster IDs"""
+
+    def __init__(self, store, threshold: Optional[float] = None):
+        self.store = store
+        self.threshold = threshold
+        # Feature index -> posting list; per slot, feature -> (posting, position)
+        # of the centroid's non-zeros (retired slots keep zeroed postings until
+        # the next compaction)
+        self._postings = {}
+        self._entries = []
+        # Per cluster slot: squared norm of the summed member vectors, live members, cluster ID
+        self._norms_sq = np.zeros(16)
+        self._members = np.zeros(16, dtype=np.int64)
+        self._ids = np.zeros(16, dtype=np.int64)
+        self._n_slots = 0
+        self._slot_of = {}
+        # Cluster ID of every live store row, oldest first
+        self._row_clusters = deque()
+        self.next_cluster = 0
+        self.n_live = 0
+        self.last_cluster = -1
+        self.exemplars = {}
+        self._query = (None, -1, 0.0)
+
+    # -- lookups -----------------------------------------------------------
+
+    @staticmethod
+    def _row(vector):
+        if not isinstance(vector, csr_matrix) or not vector.has_canonical_format:
+            vector = csr_matrix(vector, copy=True)
+            vector.sum_duplicates()
+        return vector.indices, vector.data
+
+    def _similarities(self, features, values):
+        """Cosine similarity of one vector to every cluster slot"""
+        n = self._n_slots
+        norm = float(np.sqrt(values @ values))
+        if n == 0 or norm == 0:
+            return np.zeros(n)
+        postings = self._postings
+        known = [(postings[f], v) for f, v in zip(features.tolist(), values.tolist()) if f in postings]
+        if not known:
+            return np.zeros(n)
+        slots = np.concatenate([posting.slots[:posting.size] for posting, _ in known])
+        weights = np.concatenate([posting.values[:posting.size] * v for posting, v in known])
+        dots = np.bincount(slots, weights=weights, minlength=n)
+        denominators = np.sqrt(self._norms_sq[:n]) * norm
+        # Retired slots have a zero norm and never match
+        return np.divide(dots, denominators, out=np.zeros(n), where=denominators > 0)
+
+    def _best(self, vector):
+        """(slot, similarity) of the closest cluster, (-1, 0.0) when there is none"""
+        if self._query[0] is vector:
+            return self._query[1], self._query[2]
+        similarities = self._similarities(*self._row(vector))
+        if not len(similarities):
+            return -1, 0.0
+        slot = int(similarities.argmax())
+        best = (slot, float(similarities[slot]))
+        self._query = (vector, *best)
+        return best
+
+    def max_similarity(self, vector):
+        return self._best(vector)[1]
+
+    def nearest(self, vector, k=1):
+        """(cluster IDs, similarities) of the k closest live clusters"""
+        similarities = self._similarities(*self._row(vector))
+        live = np.flatnonzero(self._members[:self._n_slots] > 0)
+        slots, similarities = _top_k(live, similarities[live], k)
+        return self._ids[slots], similarities
+
+    # -- updates -----------------------------------------------------------
+
+    def _grow(self, slots):
+        old_slots = len(self._norms_sq)
+        if slots <= old_slots:
+            return
+        slots = max(slots, 2 * old_slots)
+        for name in ('_norms_sq', '_members', '_ids'):
+            values = getattr(self, name)
+            grown = np.zeros(slots, dtype=values.dtype)
+            grown[:old_slots] = values
+            setattr(self, name, grown)
+
+    def _add_entry(self, slot, feature, value=0.0):
+        posting = self._postings.get(feature)
+        if posting is None:
+            posting = self._postings[feature] = _Posting()
+        entry = self._entries[slot][feature] = (posting, posting.append(slot, value))
+        return entry
+
+    def _accumulate(self, slot, features, values, sign):
+        entries = self._entries[slot]
+        norm_sq = float(self._norms_sq[slot])
+        for feature, value in zip(features.tolist(), (sign * values).tolist()):
+            entry = entries.get(feature)
+            if entry is None:
+                entry = self._add_entry(slot, feature)
+            posting, position = entry
+            old = float(posting.values[position])
+            new = old + value
+            posting.values[position] = new
+            norm_sq += new * new - old * old
+        # Rounding can leave a tiny negative once members are subtracted
+        self._norms_sq[slot] = max(norm_sq, 0.0)
+
+    def _retire(self, slot):
+        for posting, position in self._entries[slot].values():
+            posting.values[position] = 0.0
+        self._entries[slot] = {}
+        self._norms_sq[slot] = 0
+
+    def _open(self):
+        """New cluster slot, compacting retired slots once they outnumber live ones"""
+        retired = self._n_slots - self.n_live
+        if retired > 64 and retired > self.n_live:
+            self._compact()
+        slot = self._n_slots
+        self._grow(slot + 1)
+        self._entries.append({})
+        self._n_slots += 1
+        cluster = self.next_cluster
+        self.next_cluster += 1
+        self._ids[slot] = cluster
+        self._slot_of[cluster] = slot
+        self.n_live += 1
+        return slot, cluster
+
+    def _compact(self):
+        keep = np.flatnonzero(self._members[:self._n_slots] > 0)
+        n = len(keep)
+        # Rebuild the postings over the surviving slots, dropping retired entries
+        kept = [self._entries[slot] for slot in keep.tolist()]
+        self._postings = {}
+        self._entries = [{} for _ in range(n)]
+        for slot, entries in enumerate(kept):
+            for feature, (posting, position) in entries.items():
+                self._add_entry(slot, feature, posting.values[position])
+        for name in ('_norms_sq', '_members', '_ids'):
+            values = getattr(self, name)
+            values[:n] = values[keep]
+            values[n:self._n_slots] = 0
+        self._n_slots = n
+        self._slot_of = {int(cluster): slot for slot, cluster in enumerate(self._ids[:n].tolist())}
+        self._query = (None, -1, 0.0)
+
+    def add(self, vector):
+        """Assign each row to a cluster (the last assignment is `last_cluster`)"""
+        n_rows = vector.shape[0]
+        if n_rows > 1:
+            vector = csr_matrix(vector)
+        threshold = self.threshold if self.threshold is not None else DEFAULT_THRESHOLD
+        for i in range(n_rows):
+            row = vector if n_rows == 1 else vector[i]
+            slot, similarity = self._best(row)
+            features, values = self._row(row)
+            if slot < 0 or similarity < threshold:
+                slot, cluster = self._open()
+            else:
+                cluster = int(self._ids[slot])
+            self._accumulate(slot, features, values, 1.0)
+            self._members[slot] += 1
+            self._row_clusters.append(cluster)
+            self.last_cluster = cluster
+            self._query = (None, -1, 0.0)
+
+    def evict(self, n_rows):
+        # Called before the store drops the rows, so their vectors can be subtracted
+        for i in range(n_rows):
+            cluster = self._row_clusters.popleft()
+            slot = self._slot_of[cluster]
+            self._members[slot] -= 1
+            if self._members[slot] == 0:
+                self._retire(slot)
+                del self._slot_of[cluster]
+                self.exemplars.pop(cluster, None)
+                self.n_live -= 1
+            else:
+                self._accumulate(slot, *self.store.row(i), -1.0)
+        self._query = (None, -1, 0.0)
+
+    def label(self, cluster: int, text: str) -> None:
+        """Remember the message that opened a cluster"""
+        if cluster not in self.exemplars and cluster in self._slot_of:
+            self.exemplars[cluster] = text
+
+    # -- reporting ---------------------------------------------------------
+
+    def clusters(self, n: int = 10) -> List[Dict]:
+        """Largest live clusters: ID, live members and the opening message"""
+        n_slots = self._n_slots
+        members = self._members[:n_slots].copy()
+        ids = self._ids[:n_slots].copy()
+        live = np.flatnonzero(members > 0)
+        top = live[np.argsort(-members[live], kind='stable')[:n]]
+        return [{'cluster': int(ids[slot]), 'members': int(members[slot]),
+                 'exemplar': self.exemplars.get(int(ids[slot]))} for slot in top.tolist()]
+
+    def export_state(self):
+        """Centroids as CSR arrays (slot rows of feature indices and summed values)"""
+        n = self._n_slots
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        features, values = [], []
+        for slot, entries in enumerate(self._entries[:n]):
+            for feature, (posting, position) in entries.items():
+                features.append(feature)
+                values.append(posting.values[position])
+            indptr[slot + 1] = len(features)
+        return {'indptr': indptr, 'features': np.array(features, dtype=np.int64),
+                'values': np.array(values, dtype=np.float64),
+                'norms_sq': self._norms_sq[:n].copy(), 'members': self._members[:n].copy(),
+                'ids': self._ids[:n].copy(),
+                'row_clusters': np.fromiter(self._row_clusters, dtype=np.int64,
+                                            count=len(self._row_clusters)),
+                'next_cluster': self.next_cluster, 'exemplars': dict(self.exemplars)}
+
+    def restore_state(self, state):
+        if (state is None or 'row_clusters' not in state
+                or len(state['row_clusters']) != len(self.store)):
+            return False
+        indptr, features, values = state['indptr'], state['features'], state['values']
+        n = len(indptr) - 1
+        self._grow(max(n, 1))
+        self._postings = {}
+        self._entries = [{} for _ in range(n)]
+        bounds = indptr.tolist()
+        features, values = features.tolist(), values.tolist()
+        for slot in range(n):
+            for i in range(bounds[slot], bounds[slot + 1]):
+                self._add_entry(slot, features[i], values[i])
+        self._norms_sq[:n] = state['norms_sq']
+        self._members[:n] = state['members']
+        self._ids[:n] = state['ids']
+        self._n_slots = n
+        self._slot_of = {int(c): slot for slot, c in enumerate(state['ids'].tolist())
+                         if state['members'][slot] > 0}
+        self._row_clusters = deque(state['row_clusters'].tolist())
+        self.next_cluster = state['next_cluster']
+        self.n_live = len(self._slot_of)
+        self.exemplars = dict(state['exemplars'])
+        if self._row_clusters:
+            self.last_cluster = self._row_clusters[-1]
+        return True
+
+    @property
+    def nbytes(self):
+        postings = sum(posting.slots.nbytes + posting.values.nbytes
+                       for posting in self._postings.values())
+        return (postings + self._norms_sq.nbytes + self._members.nbytes +
+                self._ids.nbytes + 8 * len(self._row_clusters))
@@ -0,0 +1,340 @@
+"""Sliding-window alert correlation and burst detection.
+
+`BurstDetector` counts alerts per key over a short sliding window of alert
+time, for three key dimensions: the alert type, (type, source IP) and
+(type, process). Counts live in count-min sketches, so memory is fixed by
+the sketch width no matter how many distinct IPs pass through, and each
+alert costs a constant number of cell updates:
+
+    window     ring of `n_buckets` sketches, one per `window / n_buckets`
+               seconds; a running total sketch holds their sum
+    baseline   exponentially weighted per-bucket rate of every cell
+               (half-life `baseline_half_life`), folded in on each rotation
+
+A key's burst factor compares its windowed count `c` with what its baseline
+predicts for a window (`e`), allowing `sigmas` standard deviations of
+Poisson noise and never less than `min_count`:
+
+    burst = max(0, 1 - max(e + sigmas * sqrt(e), min_count) / c)
+
+so 500 alerts from a normally quiet IP within the window score 0.96, and a
+key that is always that busy scores 0. The alert's burst is the largest
+over its dimensions, and raises its score by `weight * burst * (1 - score)`.
+
+A small Space-Saving style candidate set per dimension tracks the heaviest
+keys of the window for reporting (`heavy_hitters`).
+"""
+import math
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from secops.records import alert_time
+from secops.similarity import _splitmix64
+
+DIMENSIONS = ('type', 'source_ip', 'process')
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64_int(value: int) -> int:
+    """Scalar twin of `similarity._splitmix64` (same results, no array overhead)"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _key(dimension: str, alert_type: str, alert) -> str:
+    if dimension == 'type':
+        return alert_type
+    return f"{alert_type}|{alert.get(dimension) or ''}"
+
+
+class BurstDetector:
+    """Count-min sketch sliding-window counters with per-key baselines.
+
+    Args:
+        window: Sliding window length (seconds of alert time)
+        n_buckets: Sub-windows the window slides by
+        width: Counters per sketch row (per dimension); estimation error is
+            about e / width times the alerts in the window
+        depth: Sketch rows (independent hashes) per dimension
+        min_count: Windowed count below which nothing is a burst
+        sigmas: Noise allowance above the baseline, in Poisson standard deviations
+        baseline_half_life: Half-life (seconds) of the per-key baseline rate
+        weight: How much a full burst (1.0) raises the score towards 1
+        top_k: Heavy-hitter candidates kept per dimension
+        dimensions: Subset of DIMENSIONS to correlate on
+    """
+
+    def __init__(self, window: float = 10.0, n_buckets: int = 10, width: int = 16384,
+                 depth: int = 4, min_count: int = 20, sigmas: float = 3.0,
+                 baseline_half_life: float = 600.0,
+                 weight: float = 0.5, top_k: int = 32, dimensions: Sequence[str] = DIMENSIONS):
+        if window <= 0 or n_buckets < 1:
+            raise ValueError("window and n_buckets must be positive")
+        unknown = [d for d in dimensions if d not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown correlation dimensions: {unknown}")
+        self.window = window
+        self.n_buckets = n_buckets
+        self.bucket_seconds = window / n_buckets
+        self.width = width
+        self.depth = depth
+        self.min_count = min_count
+        self.sigmas = sigmas
+        self.baseline_half_life = baseline_half_life
+        self.weight = weight
+        self.top_k = top_k
+        self.dimensions = tuple(dimensions)
+
+        n_cells = len(self.dimensions) * depth * width
+        self._ring = np.zeros((n_buckets, n_cells), dtype=np.int32)
+        self._total = np.zeros(n_cells, dtype=np.int64)
+        self._baseline = np.zeros(n_cells, dtype=np.float32)
+        # Baseline EWMA weight of one bucket, and how many buckets were folded in
+        self._alpha = 1.0 - 0.5 ** (self.bucket_seconds / baseline_half_life)
+        self._folded = 0
+        self._slot = 0
+        self._bucket = None
+        self._now = None
+        # Row offsets of each (dimension, sketch row) in the flat cell arrays
+        self._offsets = (np.arange(len(self.dimensions) * depth, dtype=np.int64) * width)
+        self._candidates = {dimension: {} for dimension in self.dimensions}
+        self.alerts = 0
+        self.bursts = 0
+
+    # -- sketch ------------------------------------------------------------
+
+    def _hashes(self, keys: List[str]) -> np.ndarray:
+        """(len(keys), 2) uint64 hash pairs for double hashing"""
+        raw = np.fromiter((zlib.crc32(key.encode()) for key in keys), dtype=np.uint64,
+                          count=len(keys))
+        h1 = _splitmix64(raw)
+        return np.stack([h1, _splitmix64(h1) | np.uint64(1)], axis=1)
+
+    def _cells(self, hashes: np.ndarray) -> np.ndarray:
+        """Flat cell indices, shape (n_alerts, n_dimensions * depth)"""
+        n, n_dims = hashes.shape[0], hashes.shape[1]
+        rows = np.arange(self.depth, dtype=np.uint64)
+        # hashes: (n, n_dims, 2) -> (n, n_dims, depth)
+        cells = (hashes[:, :, :1] + rows * hashes[:, :, 1:]) % np.uint64(self.width)
+        return cells.astype(np.int64).reshape(n, n_dims * self.depth) + self._offsets
+
+    def _cells_one(self, keys: List[str]) -> List[int]:
+        """`_cells` for a single alert, in plain integer arithmetic"""
+        cells = []
+        width = self.width
+        for j, key in enumerate(keys):
+            h1 = _splitmix64_int(zlib.crc32(key.encode()))
+            h2 = _splitmix64_int(h1) | 1
+            offset = j * self.depth
+            cells.extend((offset + r) * width + ((h1 + r * h2) & _MASK64) % width
+                         for r in range(self.depth))
+        return cells
+
+    def _advance(self, bucket: int) -> None:
+        """Slide the window forward to `bucket` (buckets never move backwards)"""
+        if self._bucket is None:
+            self._bucket = bucket
+            return
+        steps = bucket - self._bucket
+        if steps <= 0:
+            return
+        # The bucket just completed enters the baseline; empty buckets after it decay it
+        self._baseline *= 1.0 - self._alpha
+        self._baseline += self._alpha * self._ring[self._slot]
+        if steps > 1:
+            self._baseline *= (1.0 - self._alpha) ** (steps - 1)
+        self._folded += steps
+
+        if steps >= self.n_buckets:
+            self._ring[:] = 0
+            self._total[:] = 0
+        else:
+            for _ in range(steps):
+                self._slot = (self._slot + 1) % self.n_buckets
+                self._total -= self._ring[self._slot]
+                self._ring[self._slot] = 0
+        self._bucket = bucket
+        self._prune_candidates()
+
+    def _prune_candidates(self) -> None:
+        """Re-count heavy-hitter candidates, dropping keys that left the window.
+
+        Runs on the counting thread; the pruned dict replaces the old one, so
+        `heavy_hitters` can read candidates from another thread without a lock.
+        """
+        n_dims = len(self.dimensions)
+        for j, dimension in enumerate(self.dimensions):
+            keys = list(self._candidates[dimension])
+            if not keys:
+                continue
+            hashes = np.zeros((len(keys), n_dims, 2), dtype=np.uint64)
+            hashes[:, j] = self._hashes(keys)
+            cells = self._cells(hashes)[:, j * self.depth:(j + 1) * self.depth]
+            counts = self._total[cells].min(axis=1).tolist()
+            self._candidates[dimension] = {key: count for key, count in zip(keys, counts)
+                                           if count >= self.min_count}
+
+    def _expected(self, baseline: np.ndarray) -> np.ndarray:
+        """Bias-corrected expected count per window from baseline cell values"""
+        if not self._folded:
+            return np.zeros(np.shape(baseline))
+        correction = 1.0 - (1.0 - self._alpha) ** self._folded
+        return baseline * (self.n_buckets / correction)
+
+    def _burst(self, counts: np.ndarray, expected: np.ndarray) -> np.ndarray:
+        if self._folded < self.n_buckets:
+            # No baseline until one full window has been observed
+            return np.zeros(counts.shape)
+        floor = np.maximum(expected + self.sigmas * np.sqrt(expected), self.min_count)
+        return np.maximum(0.0, 1.0 - floor / np.maximum(counts, 1))
+
+    # -- streaming ---------------------------------------------------------
+
+    def observe(self, alerts: Sequence) -> Dict[str, np.ndarray]:
+        """Count a batch of alerts in arrival order.
+
+        Returns per-alert arrays: 'burst' (largest burst factor over the
+        dimensions), 'dimension' (index into `self.dimensions`, -1 if no
+        burst) and 'count' (windowed count of that dimension's key). Values
+        are the same whether alerts arrive one at a time or in batches.
+        """
+        n = len(alerts)
+        n_dims = len(self.dimensions)
+        if n == 0:
+            return {'burst': np.zeros(0), 'dimension': np.zeros(0, dtype=np.int64),
+                    'count': np.zeros(0, dtype=np.int64)}
+
+        keys = []
+        buckets = np.empty(n, dtype=np.int64)
+        now = self._now
+        for i, alert in enumerate(alerts):
+            alert_type = alert['type']
+            keys.extend(_key(dimension, alert_type, alert) for dimension in self.dimensions)
+            # Late or untimed alerts count in the newest bucket seen
+            t = alert_time(alert)
+            if t is not None and (now is None or t > now):
+                now = t
+            buckets[i] = math.floor(now / self.bucket_seconds) if now is not None else 0
+        self._now = now
+
+        if n == 1:
+            counts, expected = self._count_one(keys, int(buckets[0]))
+        else:
+            counts, expected = self._count_batch(keys, buckets)
+
+        bursts = self._burst(counts, expected)
+        best = bursts.argmax(axis=1)
+        rows = np.arange(n)
+        burst = bursts[rows, best]
+        result = {'burst': burst, 'dimension': np.where(burst > 0, best, -1),
+                  'count': counts[rows, best]}
+        self.alerts += n
+        self.bursts += int(np.count_nonzero(burst))
+
+        # Heavy-hitter candidates: only keys already past min_count qualify
+        for i, j in zip(*np.nonzero(counts >= self.min_count)):
+            self._offer(self.dimensions[j], keys[i * n_dims + j], int(counts[i, j]))
+        return result
+
+    def _count_one(self, keys, bucket):
+        """(windowed counts, expected counts) of one alert's keys, after counting it"""
+        n_dims = len(self.dimensions)
+        self._advance(bucket)
+        # The cells of one alert are distinct, so plain fancy-index adds are exact
+        cells = np.array(self._cells_one(keys))
+        self._total[cells] += 1
+        self._ring[self._slot, cells] += 1
+        counts = self._total[cells].reshape(1, n_dims, self.depth).min(axis=2)
+        expected = self._expected(self._baseline[cells].reshape(1, n_dims, self.depth).min(axis=2))
+        return counts, expected
+
+    def _count_batch(self, keys, buckets):
+        """`_count_one` for many alerts, vectorized per bucket"""
+        n, n_dims = len(buckets), len(self.dimensions)
+        cells = self._cells(self._hashes(keys).reshape(n, n_dims, 2))
+        counts = np.empty((n, n_dims), dtype=np.int64)
+        expected = np.empty((n, n_dims))
+        # Segments of alerts falling into the same bucket
+        bounds = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1], True])
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            self._advance(int(buckets[lo]))
+            segment = cells[lo:hi]
+            # Each alert sees the cell counts including every earlier alert of
+            # the segment (its rank among equal cells) and itself
+            flat = segment.T.ravel()
+            order = np.argsort(flat, kind='stable')
+            sorted_cells = flat[order]
+            run_starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+            run_lengths = np.diff(np.r_[run_starts, len(flat)])
+            rank = np.empty(len(flat), dtype=np.int64)
+            rank[order] = np.arange(len(flat)) - np.repeat(run_starts, run_lengths)
+            estimates = self._total[segment] + rank.reshape(segment.shape[1], -1).T + 1
+            counts[lo:hi] = estimates.reshape(hi - lo, n_dims, self.depth).min(axis=2)
+            expected[lo:hi] = self._expected(
+                self._baseline[segment].reshape(hi - lo, n_dims, self.depth).min(axis=2))
+
+            unique_cells = sorted_cells[run_starts]
+            self._total[unique_cells] += run_lengths
+            self._ring[self._slot, unique_cells] += run_lengths.astype(np.int32)
+        return counts, expected
+
+    def boost(self, scores, bursts):
+        """Scores raised towards 1 by their burst factors"""
+        return scores + self.weight * bursts * (1 - scores)
+
+    # -- heavy hitters -----------------------------------------------------
+
+    def _offer(self, dimension: str, key: str, count: int) -> None:
+        candidates = self._candidates[dimension]
+        if key in candidates or len(candidates) < self.top_k:
+            candidates[key] = count
+            return
+        # Replace the weakest candidate (top_k is small, so the scan is O(1))
+        weakest = min(candidates, key=candidates.get)
+        if count > candidates[weakest]:
+            del candidates[weakest]
+            candidates[key] = count
+
+    def estimate(self, dimension: str, key: str) -> Dict:
+        """Current windowed count, expected count and burst factor of one key"""
+        j = self.dimensions.index(dimension)
+        hashes = np.zeros((1, len(self.dimensions), 2), dtype=np.uint64)
+        hashes[0, j] = self._hashes([key])[0]
+        cells = self._cells(hashes)[0, j * self.depth:(j + 1) * self.depth]
+        count = int(self._total[cells].min())
+        expected = float(self._expected(self._baseline[cells].min()))
+        burst = float(self._burst(np.array([count]), np.array([expected]))[0])
+        return {'count': count, 'expected': expected, 'burst': burst}
+
+    def heavy_hitters(self, dimension: Optional[str] = None, n: int = 10) -> List[Dict]:
+        """Heaviest keys of the current window, re-estimated now, heaviest first"""
+        hitters = []
+        for dim in ([dimension] if dimension else self.dimensions):
+            for key in list(self._candidates[dim]):
+                estimate = self.estimate(dim, key)
+                if estimate['count'] < self.min_count:
+                    # Left the window (dropped at the next bucket boundary)
+                    continue
+                alert_type, _, value = key.partition('|')
+                hitters.append({'dimension': dim, 'alert_type': alert_type,
+                                'value': value or alert_type, **estimate})
+        hitters.sort(key=lambda hitter: (-hitter['burst'], -hitter['count']))
+        return hitters[:n]
+
+    @property
+    def nbytes(self) -> int:
+        return self._ring.nbytes + self._total.nbytes + self._baseline.nbytes
+
+    def stats(self) -> Dict:
+        return {'alerts': self.alerts, 'bursts': self.bursts,
+                'burst_rate': self.bursts / self.alerts if self.alerts else 0.0,
+                'memory_bytes': self.nbytes}
+
+    def __repr__(self):
+        return (f"BurstDetector(window={self.window}, n_buckets={self.n_buckets}, "
+                f"width={self.width}, depth={self.depth}, min_count={self.min_count})")
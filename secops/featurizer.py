@@ -0,0 +1,83 @@
+import re
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.utils import murmurhash3_32
+
+from secops.normalizer import word_ngrams
+
+
+class StreamingTfidfVectorizer:
+    """Feature-hashing TF-IDF with online document frequencies.
+
+    Tokens are hashed straight into a fixed `n_features` space, so there is
+    no fitted vocabulary: tokens and alert types never seen before get
+    weighted from their first message on. Document frequencies are kept in a
+    fixed-size array and updated as documents are transformed, using the same
+    smoothed IDF and L2 normalization as `TfidfVectorizer`.
+
+    Memory is constant (`n_features` counters). IDF weights drift as the
+    stream evolves; vectors already stored keep the weights they were
+    created with.
+    """
+
+    is_streaming = True
+
+    def __init__(self, n_features=2 ** 20, token_pattern=r'\b\w+\b', ngram_range=(1, 2)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.token_pattern = re.compile(token_pattern)
+        self.document_frequency = np.zeros(n_features, dtype=np.int32)
+        self.n_documents = 0
+
+    def _observe_indices(self, indices):
+        self.document_frequency[indices] += 1
+        self.n_documents += 1
+
+    def observe(self, vector):
+        """Count a document whose vector is already known (e.g. a cached repeat)"""
+        self._observe_indices(csr_matrix(vector).indices)
+
+    def transform(self, documents, update=True):
+        """Tokenize, hash and weight lowercased documents (see transform_tokens)"""
+        return self.transform_tokens(
+            [self.token_pattern.findall(document.lower()) for document in documents],
+            update=update
+        )
+
+    def transform_tokens(self, token_lists, update=True):
+        """Hash and weight pre-tokenized documents in order.
+
+        With `update=True` each document counts towards the IDF used for
+        itself and every later document, matching per-message streaming.
+        """
+        data, indices, indptr = [], [], [0]
+        n_features = self.n_features
+        for tokens in token_lists:
+            counts = {}
+            for feature in word_ngrams(tokens, self.ngram_range):
+                index = murmurhash3_32(feature, positive=True) % n_features
+                counts[index] = counts.get(index, 0) + 1
+
+            row_indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+            if update:
+                self._observe_indices(row_indices)
+            if len(row_indices):
+                tf = np.fromiter((counts[i] for i in row_indices.tolist()),
+                                 dtype=np.float64, count=len(row_indices))
+                idf = np.log((1 + self.n_documents) / (1 + self.document_frequency[row_indices])) + 1
+                weights = tf * idf
+                data.append(weights / np.sqrt(np.dot(weights, weights)))
+                indices.append(row_indices)
+            indptr.append(indptr[-1] + len(row_indices))
+
+        return csr_matrix(
+            (np.concatenate(data) if data else np.empty(0),
+             np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, n_features)
+        )
+
+    @property
+    def nbytes(self):
+        return self.document_frequency.nbytes
@@ -0,0 +1,328 @@
+"""Hot-path instrumentation for `SyslogAlertAnalyzer`.
+
+`AnalyzerMetrics` collects per-stage latency histograms and counters from
+`analyze_alert` / `analyze_alerts`. An analyzer without metrics attached
+pays one no-op clock call per stage boundary and a `None` check per alert.
+
+Export paths:
+    - `render_prometheus` / `MetricsServer`: Prometheus text format over HTTP
+    - `JsonMetricsDumper`: periodic JSON snapshot written atomically to a file
+    - `AnalyzerMetrics.start_capture`: cProfile or tracemalloc for the next N alerts
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# Stages of analyze_alert, in execution order
+STAGES = ('normalize', 'vectorize', 'similarity', 'uniqueness', 'state_update', 'scoring')
+
+# Histogram upper bounds in nanoseconds (1 us .. 1 s, roughly 1-2.5-5 spaced)
+LATENCY_BUCKETS_NS = tuple(
+    int(base * scale) for scale in (1e3, 1e4, 1e5, 1e6, 1e7, 1e8) for base in (1, 2.5, 5)
+) + (int(1e9),)
+
+
+def disabled_clock() -> int:
+    """Stand-in for `time.perf_counter_ns` while instrumentation is off"""
+    return 0
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus-style cumulative export)"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_NS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0
+
+    def observe(self, value: int) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding quantile `q` (inf if past the last bound)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return float('inf')
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum_ns': self.total,
+            'mean_ns': self.mean,
+            'p50_ns': self.quantile(0.5),
+            'p99_ns': self.quantile(0.99),
+            'buckets': dict(zip([str(b) for b in self.bounds] + ['+Inf'], self.counts))
+        }
+
+
+class AnalyzerMetrics:
+    """Per-stage timers, counters and histograms for one analyzer"""
+
+    def __init__(self):
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.latency = Histogram()
+        self.batch_latency = Histogram(tuple(b * 1000 for b in LATENCY_BUCKETS_NS))
+        self.alerts_by_type = {}
+        self.counters = {'alerts': 0, 'first_alerts': 0, 'template_hits': 0,
+                         'batches': 0, 'batch_alerts': 0}
+        self.started_at = time.time()
+
+        self._capture = None
+        self._capture_remaining = 0
+        self.last_capture = None
+
+    def observe_alert(self, alert_type: str, marks, template_hit: bool = False,
+                      first: bool = False) -> None:
+        """Record one analyze_alert call from its stage boundary timestamps.
+
+        `marks` holds len(STAGES) + 1 perf_counter_ns readings; stage i took
+        marks[i + 1] - marks[i].
+        """
+        for i, stage in enumerate(STAGES):
+            self.stages[stage].observe(marks[i + 1] - marks[i])
+        self.latency.observe(marks[-1] - marks[0])
+        self.alerts_by_type[alert_type] = self.alerts_by_type.get(alert_type, 0) + 1
+        self.counters['alerts'] += 1
+        if template_hit:
+            self.counters['template_hits'] += 1
+        if first:
+            self.counters['first_alerts'] += 1
+        if self._capture is not None:
+            self._advance_capture(1)
+
+    def observe_batch(self, n_alerts: int, elapsed_ns: int) -> None:
+        """Record one analyze_alerts call (alerts scored on the vectorized path)"""
+        self.batch_latency.observe(elapsed_ns)
+        self.counters['batches'] += 1
+        self.counters['batch_alerts'] += n_alerts
+        if self._capture is not None:
+            self._advance_capture(n_alerts)
+
+    def start_capture(self, n_alerts: int, mode: str = 'cprofile',
+                      output: Optional[str] = None) -> None:
+        """Profile (cprofile) or trace allocations (tracemalloc) for the next N alerts.
+
+        The report lands in `last_capture` (and in `output`, if given: a
+        pstats dump for cprofile, a text report for tracemalloc).
+        """
+        if mode not in ('cprofile', 'tracemalloc'):
+            raise ValueError(f"Unknown capture mode: {mode}")
+        if self._capture is not None:
+            raise RuntimeError("A capture is already running")
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = None
+            tracemalloc.start()
+        self._capture = (mode, profiler, output)
+        self._capture_remaining = n_alerts
+
+    @property
+    def capturing(self) -> bool:
+        return self._capture is not None
+
+    def _advance_capture(self, n_alerts: int) -> None:
+        self._capture_remaining -= n_alerts
+        if self._capture_remaining <= 0:
+            self.stop_capture()
+
+    def stop_capture(self) -> Optional[str]:
+        """End a running capture early (or on schedule) and return its report"""
+        if self._capture is None:
+            return None
+        mode, profiler, output = self._capture
+        self._capture = None
+        report = io.StringIO()
+        if mode == 'cprofile':
+            profiler.disable()
+            stats = pstats.Stats(profiler, stream=report)
+            stats.sort_stats('cumulative').print_stats(30)
+            if output:
+                stats.dump_stats(output)
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report.write(f"traced memory: current {current} B, peak {peak} B\n")
+            for stat in snapshot.statistics('lineno')[:30]:
+                report.write(f"{stat}\n")
+            if output:
+                with open(output, 'w') as f:
+                    f.write(report.getvalue())
+        self.last_capture = report.getvalue()
+        return self.last_capture
+
+    def to_dict(self) -> Dict:
+        return {
+            'uptime_seconds': time.time() - self.started_at,
+            'counters': dict(self.counters),
+            'alerts_by_type': dict(self.alerts_by_type),
+            'latency': self.latency.to_dict(),
+            'stages': {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+            'batch_latency': self.batch_latency.to_dict()
+        }
+
+
+def _prometheus_histogram(lines: List[str], name: str, histogram: Histogram,
+                          labels: str = '') -> None:
+    cumulative = 0
+    separator = ',' if labels else ''
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}{separator}le="{bound / 1e9:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {histogram.count}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {histogram.total / 1e9:.9f}')
+    lines.append(f'{name}_count{suffix} {histogram.count}')
+
+
+def render_prometheus(metrics: AnalyzerMetrics, statistics: Optional[Dict] = None) -> str:
+    """Prometheus text exposition of the metrics (plus analyzer gauges, if given)"""
+    lines = []
+    lines.append('# HELP hips_analyze_seconds analyze_alert latency per stage')
+    lines.append('# TYPE hips_analyze_seconds histogram')
+    for stage, histogram in metrics.stages.items():
+        _prometheus_histogram(lines, 'hips_analyze_seconds', histogram, f'stage="{stage}"')
+    _prometheus_histogram(lines, 'hips_analyze_seconds', metrics.latency, 'stage="total"')
+
+    lines.append('# HELP hips_batch_seconds analyze_alerts latency per call')
+    lines.append('# TYPE hips_batch_seconds histogram')
+    _prometheus_histogram(lines, 'hips_batch_seconds', metrics.batch_latency)
+
+    lines.append('# HELP hips_alerts_total Alerts scored one at a time, by type')
+    lines.append('# TYPE hips_alerts_total counter')
+    for alert_type, count in sorted(metrics.alerts_by_type.items()):
+        lines.append(f'hips_alerts_total{{type="{alert_type}"}} {count}')
+    for name in ('first_alerts', 'template_hits', 'batches', 'batch_alerts'):
+        lines.append(f'# TYPE hips_{name}_total counter')
+        lines.append(f'hips_{name}_total {metrics.counters[name]}')
+
+    if statistics is not None:
+        gauges = {
+            'hips_live_alerts': statistics['live_alerts'],
+            'hips_evicted_alerts': statistics['evicted_alerts'],
+            'hips_memory_bytes': statistics['memory_bytes'],
+            'hips_template_cache_entries': statistics['template_cache']['entries'],
+            'hips_template_cache_hit_rate': statistics['template_cache']['hit_rate']
+        }
+        for name, value in gauges.items():
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+
+        scores = statistics['scores']
+        lines.append('# HELP hips_score Final alert scores (streaming quantiles)')
+        lines.append('# TYPE hips_score summary')
+        for quantile, key in (('0.5', 'p50'), ('0.9', 'p90'), ('0.99', 'p99')):
+            lines.append(f'hips_score{{quantile="{quantile}"}} {scores[key]}')
+        lines.append(f'hips_score_sum {scores["mean"] * scores["count"]}')
+        lines.append(f'hips_score_count {scores["count"]}')
+        lines.append('# TYPE hips_alerts_by_severity_total counter')
+        for severity, entry in sorted(statistics['severities'].items()):
+            lines.append(f'hips_alerts_by_severity_total{{severity="{severity}"}} {entry["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_snapshot(analyzer) -> Dict:
+    """JSON-serializable metrics and statistics of an instrumented analyzer"""
+    return {
+        'timestamp': time.time(),
+        'metrics': analyzer.metrics.to_dict(),
+        'statistics': analyzer.get_statistics()
+    }
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /metrics.json from a daemon thread.
+
+    Reads are not synchronized with the analyzer; a scrape taken mid-update
+    can be off by the alert in flight.
+    """
+
+    def __init__(self, analyzer, host: str = "127.0.0.1", port: int = 9108):
+        analyzer_ref = analyzer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = render_prometheus(analyzer_ref.metrics, analyzer_ref.get_statistics())
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(metrics_snapshot(analyzer_ref))
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                payload = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self) -> 'MetricsServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class JsonMetricsDumper:
+    """Writes `metrics_snapshot` to `path` every `interval` seconds"""
+
+    def __init__(self, analyzer, path: str, interval: float = 10.0):
+        self.analyzer = analyzer
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def dump(self) -> None:
+        # Write-then-rename so readers never see a partial file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(metrics_snapshot(self.analyzer), f)
+        os.replace(tmp_path, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def start(self) -> 'JsonMetricsDumper':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.dump()
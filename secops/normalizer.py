@@ -0,0 +1,47 @@
+import re
+from functools import lru_cache
+
+# Variable fields masked before comparison, in priority order
+_MASKS = (
+    ('ip', r'\b(?:\d{1,3}\.){3}\d{1,3}\b', 'IP_ADDR'),
+    ('timestamp', r'\b\d{2}:\d{2}:\d{2}\b', 'TIMESTAMP'),
+    ('pid', r'PID: \d+', 'PID: XXX'),
+)
+
+
+class AlertNormalizer:
+    """Single-pass alert normalization with an LRU cache on raw messages.
+
+    One combined regex masks IPs, clock times and PIDs, the result is
+    lowercased, and the word tokens the vectorizers need are extracted in
+    the same call. Recurring raw messages are served from the cache.
+    """
+
+    def __init__(self, cache_size=65536, token_pattern=r'\b\w+\b'):
+        # The lookahead lets the scanner skip positions no mask can start at
+        alternatives = '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in _MASKS)
+        self.mask_pattern = re.compile(rf'(?=[\dP])(?:{alternatives})')
+        self.token_pattern = re.compile(token_pattern)
+        self._replacements = {name: replacement for name, _, replacement in _MASKS}
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _mask(self, match):
+        return self._replacements[match.lastgroup]
+
+    def _normalize(self, raw_message):
+        """Return (canonical message, word tokens) for a raw message"""
+        text = self.mask_pattern.sub(self._mask, raw_message).lower()
+        return text, tuple(self.token_pattern.findall(text))
+
+    def cache_info(self):
+        return self.normalize.cache_info()
+
+
+def word_ngrams(tokens, ngram_range=(1, 2)):
+    """Unigram..n-gram features, in the order sklearn's word analyzer emits them"""
+    min_n, max_n = ngram_range
+    features = list(tokens) if min_n == 1 else []
+    n_tokens = len(tokens)
+    for n in range(max(min_n, 2), min(max_n, n_tokens) + 1):
+        features.extend(' '.join(tokens[i:i + n]) for i in range(n_tokens - n + 1))
+    return features
@@ -0,0 +1,346 @@
+"""Compact alert records and the analyzer's columnar per-type history.
+
+Alert dicts carry eight string/int fields; at millions of alerts the dict
+and string overhead dominates memory. `AlertRecord` stores the categorical
+fields (type, severity, process, pattern) as ids interned in an
+`AlertVocabulary`, the source IP as a 32-bit integer and the timestamp as
+epoch seconds, and still answers the dict-style reads (`alert['type']`,
+`alert.get('timestamp')`) the analyzer and the printers use.
+
+`AlertHistory` keeps one type's analyzed alerts as growable NumPy columns
+(12 bytes per row) instead of a deque of dicts: only what scoring and
+retention read, the canonical message key and the arrival time.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from secops.retention import parse_timestamp
+
+# Timestamp column value for alerts without a parseable timestamp
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def ip_to_int(ip):
+    """Dotted-quad IPv4 address -> uint32 value (0 if missing or not IPv4)"""
+    if not ip:
+        return 0
+    parts = ip.split('.')
+    if len(parts) != 4:
+        return 0
+    try:
+        a, b, c, d = (int(part) for part in parts)
+    except ValueError:
+        return 0
+    if not (0 <= a < 256 and 0 <= b < 256 and 0 <= c < 256 and 0 <= d < 256):
+        return 0
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+def int_to_ip(value):
+    return f"{value >> 24 & 255}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+def timestamp_to_int(value):
+    """Alert timestamp -> whole epoch seconds (NO_TIMESTAMP if unparseable)"""
+    seconds = parse_timestamp(value)
+    return NO_TIMESTAMP if seconds is None else int(seconds)
+
+
+def format_timestamp(value):
+    """Inverse of `timestamp_to_int` ('YYYY-MM-DD HH:MM:SS', None if missing)"""
+    if value == NO_TIMESTAMP:
+        return None
+    return (_EPOCH + timedelta(seconds=int(value))).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class Interner:
+    """Dense str <-> int mapping; ids are assigned in first-seen order"""
+
+    __slots__ = ('_ids', 'values')
+
+    def __init__(self, values=()):
+        self._ids = {}
+        self.values = []
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value):
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __len__(self):
+        return len(self.values)
+
+    def copy(self):
+        interner = Interner.__new__(Interner)
+        interner._ids = dict(self._ids)
+        interner.values = list(self.values)
+        return interner
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, values):
+        self.__init__(values)
+
+
+class AlertVocabulary:
+    """Interners for the categorical alert fields"""
+
+    def __init__(self):
+        self.types = Interner()
+        self.severities = Interner()
+        self.processes = Interner()
+        self.patterns = Interner()
+
+    def copy(self):
+        """Independent copy, e.g. to serialize while the original keeps interning"""
+        vocabulary = AlertVocabulary.__new__(AlertVocabulary)
+        vocabulary.__dict__.update({name: interner.copy() for name, interner in self.__dict__.items()})
+        return vocabulary
+
+    def severity_id(self, alert):
+        if isinstance(alert, AlertRecord) and alert.vocabulary is self:
+            return alert.severity_id
+        return self.severities.intern(alert['severity'])
+
+    def encode(self, alert):
+        """(severity_id, process_id, pattern_id, pid, source_ip, timestamp) of an alert"""
+        if isinstance(alert, AlertRecord) and alert.vocabulary is self:
+            return (alert.severity_id, alert.process_id, alert.pattern_id,
+                    alert.pid, alert.source_ip, alert.timestamp)
+        return (
+            self.severities.intern(alert['severity']),
+            self.processes.intern(alert.get('process') or ''),
+            self.patterns.intern(alert.get('pattern') or ''),
+            int(alert.get('pid') or 0),
+            ip_to_int(alert.get('source_ip')),
+            timestamp_to_int(alert.get('timestamp'))
+        )
+
+
+class AlertRecord:
+    """One alert in compact form, readable like the alert dict it came from"""
+
+    __slots__ = ('vocabulary', 'raw_message', 'type_id', 'severity_id', 'process_id',
+                 'pattern_id', 'pid', 'source_ip', 'timestamp')
+
+    FIELDS = ('raw_message', 'type', 'pattern', 'severity', 'process', 'pid',
+              'source_ip', 'timestamp')
+
+    def __init__(self, vocabulary, raw_message, type_id, severity_id, process_id, pattern_id,
+                 pid, source_ip, timestamp):
+        self.vocabulary = vocabulary
+        self.raw_message = raw_message
+        self.type_id = type_id
+        self.severity_id = severity_id
+        self.process_id = process_id
+        self.pattern_id = pattern_id
+        self.pid = pid
+        self.source_ip = source_ip
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, alert, vocabulary):
+        return cls(vocabulary, alert['raw_message'], vocabulary.types.intern(alert['type']),
+                   *vocabulary.encode(alert))
+
+    def __getitem__(self, key):
+        vocabulary = self.vocabulary
+        if key == 'raw_message':
+            return self.raw_message
+        if key == 'type':
+            return vocabulary.types[self.type_id]
+        if key == 'severity':
+            return vocabulary.severities[self.severity_id]
+        if key == 'process':
+            return vocabulary.processes[self.process_id]
+        if key == 'pattern':
+            return vocabulary.patterns[self.pattern_id]
+        if key == 'pid':
+            return self.pid
+        if key == 'source_ip':
+            return int_to_ip(self.source_ip)
+        if key == 'timestamp':
+            return format_timestamp(self.timestamp)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self):
+        return {field: self[field] for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"AlertRecord({self.to_dict()!r})"
+
+
+def alert_time(alert):
+    """Alert timestamp in epoch seconds (None if missing), for dicts and records"""
+    if isinstance(alert, AlertRecord):
+        return None if alert.timestamp == NO_TIMESTAMP else float(alert.timestamp)
+    return parse_timestamp(alert.get('timestamp'))
+
+
+class AlertHistory:
+    """Sliding window of one type's analyzed alerts, stored column-wise.
+
+    Rows are appended at the tail and evicted from the head; capacity
+    doubles on growth and the live window is compacted to the front first
+    once the evicted prefix is at least as large as it, as in
+    `SparseVectorStore`. Each row keeps its canonical message `key` (shared
+    with the pattern counts) and `time`, the type's reference clock when it
+    arrived (NaN when unused).
+
+    Keys are interned: the `key` column holds integer ids into a key table
+    that only lists the keys of live rows (an id is reused once its last
+    row is evicted), so every column is a plain numeric array.
+    """
+
+    COLUMNS = (
+        ('time', np.float64),
+        ('key', np.int32)
+    )
+
+    def __init__(self, capacity=64):
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+        self._start = 0
+        self._stop = 0
+        self._set_key_table([])
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def _set_key_table(self, key_values, key_ids=None):
+        """Install a key table (id -> key, None for free ids) and recount its live rows"""
+        self._key_values = key_values
+        self._key_ids = {key: i for i, key in enumerate(key_values) if key is not None}
+        if key_ids is None:
+            key_ids = self.column('key')
+        self._key_refs = np.bincount(key_ids, minlength=len(key_values)).tolist()
+        self._free_ids = [i for i, key in enumerate(key_values) if key is None]
+
+    def _intern_key(self, key):
+        index = self._key_ids.get(key)
+        if index is None:
+            if self._free_ids:
+                index = self._free_ids.pop()
+                self._key_values[index] = key
+            else:
+                index = len(self._key_values)
+                self._key_values.append(key)
+                self._key_refs.append(0)
+            self._key_ids[key] = index
+        self._key_refs[index] += 1
+        return index
+
+    def _reserve(self, extra_rows):
+        capacity = len(self._columns['key'])
+        if self._stop + extra_rows <= capacity:
+            return
+        if self._start >= len(self):
+            n_live = len(self)
+            for values in self._columns.values():
+                values[:n_live] = values[self._start:self._stop]
+            self._start, self._stop = 0, n_live
+            if self._stop + extra_rows <= capacity:
+                return
+        capacity = max(self._stop + extra_rows, 2 * capacity)
+        for name, values in self._columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self._stop] = values[:self._stop]
+            self._columns[name] = grown
+
+    def append(self, key, time=None):
+        """Append one row"""
+        self._reserve(1)
+        i = self._stop
+        self._columns['time'][i] = np.nan if time is None else time
+        self._columns['key'][i] = self._intern_key(key)
+        self._stop += 1
+
+    def extend(self, keys, times=None):
+        """Append many rows"""
+        n = len(keys)
+        if n == 0:
+            return
+        self._reserve(n)
+        lo, hi = self._stop, self._stop + n
+        self._columns['time'][lo:hi] = np.nan if times is None else times
+        self._columns['key'][lo:hi] = [self._intern_key(key) for key in keys]
+        self._stop = hi
+
+    def popleft(self, n_rows=1):
+        """Evict the `n_rows` oldest rows and return their keys"""
+        n_rows = min(n_rows, len(self))
+        lo, hi = self._start, self._start + n_rows
+        keys = []
+        for index in self._columns['key'][lo:hi].tolist():
+            key = self._key_values[index]
+            keys.append(key)
+            self._key_refs[index] -= 1
+            if not self._key_refs[index]:
+                del self._key_ids[key]
+                self._key_values[index] = None
+                self._free_ids.append(index)
+        self._start = hi
+        if self._start == self._stop:
+            self._start = self._stop = 0
+        return keys
+
+    def time_at(self, position):
+        """Reference time of a live row (None if it had none)"""
+        value = self._columns['time'][self._start + position]
+        return None if value != value else float(value)
+
+    def column(self, name):
+        """Live rows of one column (a view)"""
+        return self._columns[name][self._start:self._stop]
+
+    def keys(self):
+        """Keys of the live rows, oldest first"""
+        key_values = self._key_values
+        return [key_values[index] for index in self.column('key').tolist()]
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self._columns.values())
+
+    def export_state(self, copy=False):
+        """({column: live rows}, key table); copies if the analyzer keeps running"""
+        columns = {name: self.column(name) for name, _ in self.COLUMNS}
+        if copy:
+            return {name: values.copy() for name, values in columns.items()}, list(self._key_values)
+        return columns, self._key_values
+
+    @classmethod
+    def from_state(cls, columns, key_values):
+        """Inverse of `export_state`; `columns` may be memory-mapped"""
+        history = cls.__new__(cls)
+        history._columns = dict(columns)
+        history._start = 0
+        history._stop = len(columns['key'])
+        history._set_key_table(list(key_values))
+        return history
+
+    def __getstate__(self):
+        return self.export_state(copy=True)
+
+    def __setstate__(self, state):
+        self.__dict__.update(AlertHistory.from_state(*state).__dict__)
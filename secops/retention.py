@@ -0,0 +1,80 @@
+import math
+from datetime import datetime
+from typing import Optional, Union
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def parse_timestamp(value: Union[str, int, float, None]) -> Optional[float]:
+    """Convert an alert timestamp to seconds since the epoch (naive/local clock)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return (datetime.fromisoformat(value) - _EPOCH).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+
+class RetentionPolicy:
+    """Per-type retention limits for analyzer history.
+
+    Args:
+        max_rows: Keep at most this many alerts per type (oldest evicted first)
+        max_age: Evict alerts older than this many seconds, measured against
+            the newest alert `timestamp` seen for the type
+        decay_half_life: If set, pattern frequencies decay exponentially with
+            this half-life (seconds of alert time) instead of counting hits
+        decay_epsilon: With decay, alerts whose weight `0.5 ** (age / half_life)`
+            fell below this are evicted (default: about ten half-lives), so a
+            decay-only policy bounds memory too
+
+    All limits are optional and may be combined; the default policy keeps
+    everything, matching the unbounded behaviour.
+    """
+
+    def __init__(self, max_rows: Optional[int] = None, max_age: Optional[float] = None,
+                 decay_half_life: Optional[float] = None, decay_epsilon: float = 1e-3):
+        if max_rows is not None and max_rows < 1:
+            raise ValueError("max_rows must be at least 1")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be positive")
+        if decay_half_life is not None and decay_half_life <= 0:
+            raise ValueError("decay_half_life must be positive")
+        if not 0 < decay_epsilon < 1:
+            raise ValueError("decay_epsilon must be between 0 and 1")
+
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.decay_half_life = decay_half_life
+        self.decay_epsilon = decay_epsilon
+
+    @property
+    def uses_time(self) -> bool:
+        """Whether alert timestamps need to be tracked for this policy"""
+        return self.max_age is not None or self.decay_half_life is not None
+
+    @property
+    def horizon(self) -> Optional[float]:
+        """Age (seconds) beyond which alerts are evicted: `max_age` or the decay cut-off"""
+        ages = []
+        if self.max_age is not None:
+            ages.append(self.max_age)
+        if self.decay_half_life is not None:
+            ages.append(self.decay_half_life * math.log2(1 / self.decay_epsilon))
+        return min(ages) if ages else None
+
+    @property
+    def is_bounded(self) -> bool:
+        return self.max_rows is not None or self.horizon is not None
+
+    def decay_factor(self, elapsed: float) -> float:
+        """Multiplier applied to a frequency count after `elapsed` seconds"""
+        if self.decay_half_life is None or elapsed <= 0:
+            return 1.0
+        return 0.5 ** (elapsed / self.decay_half_life)
+
+    def __repr__(self):
+        return (f"RetentionPolicy(max_rows={self.max_rows}, max_age={self.max_age}, "
+                f"decay_half_life={self.decay_half_life}, decay_epsilon={self.decay_epsilon})")
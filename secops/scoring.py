@@ -0,0 +1,220 @@
+"""Scoring configuration: label weights, score mix and priority thresholds.
+
+A `ScoringConfig` holds everything that turns an alert's labels and its
+uniqueness into a final score and a priority level:
+
+    score = type_weight * mix['type'] + severity_weight * mix['severity']
+            + uniqueness * mix['uniqueness']
+
+Types and severities missing from the weight tables get the config's
+`default_type_weight` / `default_severity_weight` instead of failing.
+Configs are read from JSON files; every key is optional and weights given
+in a file override the defaults one label at a time:
+
+    {"name": "tuned",
+     "type_weights": {"MEMORY_ATTACK": 0.95, "RANSOMWARE": 1.0},
+     "mix": {"type": 0.25, "severity": 0.25, "uniqueness": 0.5},
+     "thresholds": {"high": 0.75, "medium": 0.45}}
+
+`ScoringConfigWatcher` reloads a config file while the monitor runs. This
+module is kept free of NumPy/scikit-learn so configs can be read (for
+example by `main.py --mode explain`) without the analysis stack's imports;
+the analyzer compiles them into lookup arrays (`secops.scoring_tables`).
+"""
+import json
+import os
+import time
+from typing import Dict, Optional
+
+DEFAULT_TYPE_WEIGHTS = {
+    "MEMORY_ATTACK": 0.9,
+    "PRIVILEGE_ESCALATION": 0.85,
+    "SYSTEM_TAMPERING": 0.75,
+    "ACCESS_VIOLATION": 0.7,
+    "SUSPICIOUS_EXECUTION": 0.65
+}
+
+DEFAULT_SEVERITY_WEIGHTS = {
+    "Critical": 1.0,
+    "High": 0.8,
+    "Medium": 0.6,
+    "Low": 0.3
+}
+
+# Share of the final score taken by each component
+DEFAULT_MIX = {'type': 0.3, 'severity': 0.3, 'uniqueness': 0.4}
+
+# A score above `high` is HIGH priority, above `medium` MEDIUM, otherwise LOW
+DEFAULT_THRESHOLDS = {'high': 0.7, 'medium': 0.4}
+
+# Weight of a type or severity the config does not list
+DEFAULT_UNKNOWN_WEIGHT = 0.5
+
+CONFIG_KEYS = ('name', 'type_weights', 'severity_weights', 'default_type_weight',
+               'default_severity_weight', 'mix', 'thresholds')
+
+
+def _weight(name: str, value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1:
+        raise ValueError(f"{name} must be a number between 0 and 1, got {value!r}")
+    return float(value)
+
+
+def _weights(name: str, weights) -> Dict[str, float]:
+    if not isinstance(weights, dict):
+        raise ValueError(f"{name} must map labels to weights")
+    return {str(label): _weight(f"{name}[{label!r}]", value) for label, value in weights.items()}
+
+
+def _components(name: str, values, keys) -> Dict[str, float]:
+    if not isinstance(values, dict) or set(values) != set(keys):
+        raise ValueError(f"{name} needs exactly the keys {', '.join(keys)}")
+    return {key: _weight(f"{name}[{key!r}]", values[key]) for key in keys}
+
+
+class ScoringConfig:
+    """Weights, score mix and priority thresholds; never modified once built.
+
+    Args:
+        type_weights: Weight per alert type (default: `DEFAULT_TYPE_WEIGHTS`)
+        severity_weights: Weight per severity (default: `DEFAULT_SEVERITY_WEIGHTS`)
+        mix: Shares of the type, severity and uniqueness scores (sum to 1)
+        thresholds: 'high' and 'medium' priority cut-offs
+        default_type_weight: Weight of types missing from `type_weights`
+        default_severity_weight: Weight of severities missing from `severity_weights`
+        name: Label used in reports and A/B comparisons
+    """
+
+    def __init__(self, type_weights: Optional[Dict[str, float]] = None,
+                 severity_weights: Optional[Dict[str, float]] = None,
+                 mix: Optional[Dict[str, float]] = None,
+                 thresholds: Optional[Dict[str, float]] = None,
+                 default_type_weight: float = DEFAULT_UNKNOWN_WEIGHT,
+                 default_severity_weight: float = DEFAULT_UNKNOWN_WEIGHT,
+                 name: str = 'default'):
+        self.name = str(name)
+        self.type_weights = _weights(
+            'type_weights', DEFAULT_TYPE_WEIGHTS if type_weights is None else type_weights)
+        self.severity_weights = _weights(
+            'severity_weights', DEFAULT_SEVERITY_WEIGHTS if severity_weights is None
+            else severity_weights)
+        self.default_type_weight = _weight('default_type_weight', default_type_weight)
+        self.default_severity_weight = _weight('default_severity_weight', default_severity_weight)
+        self.mix = _components('mix', DEFAULT_MIX if mix is None else mix, tuple(DEFAULT_MIX))
+        if abs(sum(self.mix.values()) - 1) > 1e-9:
+            raise ValueError(f"mix shares must sum to 1, got {sum(self.mix.values())}")
+        self.thresholds = _components('thresholds', DEFAULT_THRESHOLDS if thresholds is None
+                                      else thresholds, tuple(DEFAULT_THRESHOLDS))
+        if self.thresholds['medium'] > self.thresholds['high']:
+            raise ValueError("thresholds: 'medium' must not exceed 'high'")
+
+    def type_weight(self, alert_type: str) -> float:
+        return self.type_weights.get(alert_type, self.default_type_weight)
+
+    def severity_weight(self, severity: str) -> float:
+        return self.severity_weights.get(severity, self.default_severity_weight)
+
+    def priority_of(self, score: float) -> str:
+        """Priority level of a final score"""
+        if score > self.thresholds['high']:
+            return "HIGH"
+        elif score > self.thresholds['medium']:
+            return "MEDIUM"
+        return "LOW"
+
+    @classmethod
+    def from_dict(cls, data: Dict, name: Optional[str] = None) -> 'ScoringConfig':
+        """Config from a parsed file: listed weights override the defaults"""
+        if not isinstance(data, dict):
+            raise ValueError("A scoring config must be a JSON object")
+        unknown = set(data) - set(CONFIG_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown scoring config keys: {', '.join(sorted(unknown))}")
+        return cls(
+            type_weights={**DEFAULT_TYPE_WEIGHTS, **data.get('type_weights', {})},
+            severity_weights={**DEFAULT_SEVERITY_WEIGHTS, **data.get('severity_weights', {})},
+            mix=data.get('mix'),
+            thresholds=data.get('thresholds'),
+            default_type_weight=data.get('default_type_weight', DEFAULT_UNKNOWN_WEIGHT),
+            default_severity_weight=data.get('default_severity_weight', DEFAULT_UNKNOWN_WEIGHT),
+            name=data.get('name', name or 'default')
+        )
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in CONFIG_KEYS}
+
+    def __repr__(self):
+        return f"ScoringConfig(name={self.name!r})"
+
+
+DEFAULT_SCORING = ScoringConfig()
+
+
+def load_scoring_config(path: str) -> ScoringConfig:
+    """Parse and validate a JSON scoring config (named after the file unless it says otherwise)"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return ScoringConfig.from_dict(data, name=os.path.splitext(os.path.basename(path))[0])
+
+
+class ScoringConfigWatcher:
+    """Reloads a scoring config file into `target` when the file changes.
+
+    Call `maybe_reload()` from the thread that drives the analyzer (after
+    each alert or batch), as with `SnapshotScheduler.maybe_snapshot`. The
+    file is checked at most once per `interval` seconds; a changed file is
+    parsed and validated in full before `target.set_scoring(config)` swaps
+    it in, and the analyzer swaps configs with a single assignment, so each
+    alert and each batch is scored under one config, never a mix. A file
+    that fails to load is counted in `errors` (see `last_error`) and the
+    running config stays. Replace the file atomically (write a temporary
+    file, then rename it over the old one) so a half-written file is never
+    read.
+
+    Args:
+        target: Object with a `set_scoring(config)` method (analyzer or monitor)
+        path: JSON config file
+        interval: Minimum seconds between checks of the file
+    """
+
+    def __init__(self, target, path: str, interval: float = 1.0):
+        self.target = target
+        self.path = path
+        self.interval = interval
+        self.reloads = 0
+        self.errors = 0
+        self.last_error = None
+        self._stamp = self._stat()
+        self._last_check = time.monotonic()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def maybe_reload(self) -> bool:
+        """Reload if the file changed since the last check; returns True if a config was swapped in"""
+        now = time.monotonic()
+        if now - self._last_check < self.interval:
+            return False
+        self._last_check = now
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Load the file now; on failure keep the running config"""
+        try:
+            config = load_scoring_config(self.path)
+        except (OSError, ValueError) as exc:
+            # json.JSONDecodeError is a ValueError
+            self.errors += 1
+            self.last_error = exc
+            return False
+        self.target.set_scoring(config)
+        self.reloads += 1
+        return True
@@ -0,0 +1,206 @@
+"""Scoring configs compiled into NumPy lookup tables, and A/B re-scoring.
+
+`ScoringTables` compiles a `ScoringConfig` into weight arrays indexed by the
+type and severity IDs of an `AlertVocabulary`, so the label scores of a
+batch are two gathers instead of a dict lookup per alert. The tables follow
+the vocabulary: labels interned after compilation are filled in (with the
+config's default weight if it does not list them) the first time one of
+their IDs is looked up.
+
+`score_variants` re-scores analyzed alerts under several configs at once.
+Uniqueness does not depend on the weights, so a capture is analyzed once
+and each candidate config is one row of stacked lookup tables:
+
+    python -m secops.scoring_tables --replay-file capture.jsonl.gz \\
+        --configs current.json candidate.json
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from secops.records import AlertVocabulary
+from secops.scoring import ScoringConfig
+
+# Priority levels, indexed by how many thresholds a score exceeds
+PRIORITIES = ('LOW', 'MEDIUM', 'HIGH')
+
+
+def _extend(table, labels, weight_of):
+    """`table` grown to cover every interned label"""
+    n = len(table)
+    if len(labels) <= n:
+        return table
+    added = np.fromiter((weight_of(label) for label in labels[n:]), dtype=float,
+                        count=len(labels) - n)
+    return np.concatenate([table, added])
+
+
+class ScoringTables:
+    """One config compiled against one vocabulary.
+
+    Args:
+        config: Weights, mix and thresholds to compile
+        vocabulary: Vocabulary whose type and severity IDs index the tables
+    """
+
+    def __init__(self, config: ScoringConfig, vocabulary: AlertVocabulary):
+        self.config = config
+        self.vocabulary = vocabulary
+        # Shares as Python floats: the per-alert and batch paths multiply by
+        # the same values, so both give bit-identical scores
+        self.shares = (config.mix['type'], config.mix['severity'], config.mix['uniqueness'])
+        self.type_weights = np.empty(0)
+        self.severity_weights = np.empty(0)
+        self.sync()
+
+    def sync(self) -> None:
+        """Cover the labels interned since the tables were last extended"""
+        self.type_weights = _extend(self.type_weights, self.vocabulary.types.values,
+                                    self.config.type_weight)
+        self.severity_weights = _extend(self.severity_weights, self.vocabulary.severities.values,
+                                        self.config.severity_weight)
+
+    def label_scores(self, type_ids, severity_ids):
+        """(type weights, severity weights) of arrays of interned IDs"""
+        type_ids = np.asarray(type_ids, dtype=np.int64)
+        severity_ids = np.asarray(severity_ids, dtype=np.int64)
+        if ((type_ids.size and type_ids.max() >= len(self.type_weights)) or
+                (severity_ids.size and severity_ids.max() >= len(self.severity_weights))):
+            self.sync()
+        return self.type_weights[type_ids], self.severity_weights[severity_ids]
+
+    def scores(self, type_scores, severity_scores, uniqueness):
+        """Final scores from label scores and uniqueness (arrays or floats)"""
+        w_type, w_severity, w_uniqueness = self.shares
+        return type_scores * w_type + severity_scores * w_severity + uniqueness * w_uniqueness
+
+
+def score_variants(results, configs: Sequence[ScoringConfig], correlation=None):
+    """Scores and priorities of analyzed alerts under each of `configs`.
+
+    Args:
+        results: `analyze_alerts` frame (or frames concatenated in order)
+        configs: Configs to compare; their names label the output columns
+        correlation: The burst detector the alerts were analyzed with, if
+            any; its boost is applied to every variant as the analyzer does
+
+    Returns a frame with `score_<name>` and `priority_<name>` columns, on
+    the index of `results`. The variant of the config the alerts were
+    analyzed with reproduces their scores exactly.
+    """
+    import pandas as pd
+
+    names = [config.name for config in configs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Scoring config names must be unique, got {names}")
+    vocabulary = AlertVocabulary()
+    n = len(results)
+    type_ids = np.fromiter((vocabulary.types.intern(t) for t in results['alert_type'].tolist()),
+                           dtype=np.int64, count=n)
+    severity_ids = np.fromiter((vocabulary.severities.intern(s)
+                                for s in results['severity'].tolist()), dtype=np.int64, count=n)
+    tables = [ScoringTables(config, vocabulary) for config in configs]
+
+    # One row per config: (configs x alerts) label scores in two gathers
+    type_scores = np.stack([t.type_weights for t in tables])[:, type_ids]
+    severity_scores = np.stack([t.severity_weights for t in tables])[:, severity_ids]
+    shares = np.array([t.shares for t in tables])
+    uniqueness = results['uniqueness'].to_numpy(dtype=float)
+    scores = (type_scores * shares[:, :1] + severity_scores * shares[:, 1:2] +
+              uniqueness * shares[:, 2:])
+    # The first alert of a type scores its type weight alone (no similarity yet)
+    first = np.isnan(results['similarity'].to_numpy(dtype=float))
+    scores[:, first] = type_scores[:, first]
+    if correlation is not None and 'burst' in results:
+        scores = correlation.boost(scores, results['burst'].to_numpy(dtype=float))
+
+    medium = np.array([[config.thresholds['medium']] for config in configs])
+    high = np.array([[config.thresholds['high']] for config in configs])
+    levels = (scores > medium).astype(np.int64) + (scores > high)
+    labels = np.array(PRIORITIES, dtype=object)
+    columns = {}
+    for j, name in enumerate(names):
+        columns[f'score_{name}'] = scores[j]
+        columns[f'priority_{name}'] = labels[levels[j]]
+    return pd.DataFrame(columns, index=results.index)
+
+
+def compare_variants(variants, names: List[str]) -> Dict[str, Dict]:
+    """Priority counts per config, and priority changes against the first (baseline) config"""
+    rank = {priority: level for level, priority in enumerate(PRIORITIES)}
+    baseline = variants[f'priority_{names[0]}'].map(rank).to_numpy()
+    summary = {}
+    for name in names:
+        levels = variants[f'priority_{name}'].map(rank).to_numpy()
+        summary[name] = {
+            'mean_score': float(variants[f'score_{name}'].mean()) if len(variants) else 0.0,
+            **{priority: int(np.count_nonzero(levels == level))
+               for level, priority in enumerate(PRIORITIES)},
+            'promoted': int(np.count_nonzero(levels > baseline)),
+            'demoted': int(np.count_nonzero(levels < baseline))
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import random
+
+    import pandas as pd
+
+    from secops.scoring import load_scoring_config
+    from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+    parser = argparse.ArgumentParser(description='Compare scoring configs on the same alerts')
+    parser.add_argument('--configs', nargs='+', required=True, metavar='PATH',
+                        help="JSON scoring configs ('default': built-in weights); the first "
+                             "is the baseline and is used for the analysis")
+    parser.add_argument('--replay-file',
+                        help='Recorded alerts (JSONL or syslog lines, .gz ok); '
+                             'simulated alerts when omitted')
+    parser.add_argument('--replay-format', choices=['auto', 'jsonl', 'syslog'], default='auto')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='Simulated alerts when no --replay-file is given')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--vectorizer', choices=['tfidf', 'hashing'], default='tfidf')
+    parser.add_argument('--batch-size', type=int, default=4096,
+                        help='Alerts per analyze_alerts call')
+    parser.add_argument('--output', help='Write per-alert scores and priorities to this CSV file')
+    args = parser.parse_args()
+
+    configs = [ScoringConfig() if path == 'default' else load_scoring_config(path)
+               for path in args.configs]
+    if args.replay_file:
+        from secops.replay import read_alerts
+        alerts = read_alerts(args.replay_file, args.replay_format)
+    else:
+        from secops.alert_simulator import HIPSAlertSimulator
+        random.seed(args.seed)
+        alerts = iter(HIPSAlertSimulator().generate_batch(args.count, include_similar=True))
+
+    analyzer = SyslogAlertAnalyzer(vectorizer_mode=args.vectorizer, scoring=configs[0])
+    frames = []
+    batch = []
+    for alert in alerts:
+        batch.append(alert)
+        if len(batch) == args.batch_size:
+            frames.append(analyzer.analyze_alerts(batch))
+            batch = []
+    if batch or not frames:
+        frames.append(analyzer.analyze_alerts(batch))
+    results = pd.concat(frames, ignore_index=True)
+
+    variants = score_variants(results, configs)
+    names = [config.name for config in configs]
+    summary = compare_variants(variants, names)
+    print(f"{len(results)} alerts; baseline: {names[0]}")
+    print(f"  {'config':<20}{'mean':>8}{'HIGH':>8}{'MEDIUM':>8}{'LOW':>8}{'promoted':>10}{'demoted':>9}")
+    for name, row in summary.items():
+        print(f"  {name:<20}{row['mean_score']:>8.3f}{row['HIGH']:>8}{row['MEDIUM']:>8}"
+              f"{row['LOW']:>8}{row['promoted']:>10}{row['demoted']:>9}")
+    if args.output:
+        pd.concat([results[['alert_type', 'severity', 'uniqueness']], variants],
+                  axis=1).to_csv(args.output, index=False)
+        print(f"Wrote {args.output}")
+    print(json.dumps(summary, indent=2))
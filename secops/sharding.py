@@ -0,0 +1,212 @@
+"""Multi-process analyzer sharded by alert type.
+
+Every piece of analyzer state is keyed by alert type, so types can be scored
+independently. `ShardedAnalyzer` runs a pool of worker processes; each worker
+owns one `SyslogAlertAnalyzer` per alert type it is responsible for, and a
+type is always routed to the same worker (stable hash bucket), so per-type
+arrival order is preserved.
+
+Because every type gets its own analyzer (and therefore its own fitted
+vectorizer), results do not depend on the number of workers. They do differ
+from a single `SyslogAlertAnalyzer` fed every type: that one fits one TF-IDF
+vocabulary (on the first alert) for all types, so similarities, and with
+them scores, are not the same as with per-type vectorizers.
+"""
+import copy
+import math
+import multiprocessing as mp
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from secops.aggregates import merge_summaries
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+
+def shard_for(alert_type: str, n_shards: int) -> int:
+    """Stable (process-independent) shard index for an alert type"""
+    return zlib.crc32(alert_type.encode('utf-8')) % n_shards
+
+
+def type_analyzer(analyzer_kwargs: Dict) -> SyslogAlertAnalyzer:
+    """Fresh analyzer for a single alert type"""
+    kwargs = dict(analyzer_kwargs)
+    if kwargs.get('correlation') is not None:
+        # Burst keys are type-scoped, so each type gets its own detector
+        kwargs['correlation'] = copy.deepcopy(kwargs['correlation'])
+    return SyslogAlertAnalyzer(**kwargs)
+
+
+def _shard_worker(conn, analyzer_kwargs: Dict) -> None:
+    """Worker loop: one analyzer per alert type, commands arrive over a pipe"""
+    analyzers = {}
+
+    def analyzer_for(alert_type):
+        if alert_type not in analyzers:
+            analyzers[alert_type] = type_analyzer(analyzer_kwargs)
+        return analyzers[alert_type]
+
+    while True:
+        command, payload = conn.recv()
+        if command == 'stop':
+            conn.close()
+            return
+        try:
+            if command == 'analyze':
+                by_type = {}
+                for i, alert in enumerate(payload):
+                    by_type.setdefault(alert['type'], []).append(i)
+                frames = []
+                for alert_type, positions in by_type.items():
+                    frame = analyzer_for(alert_type).analyze_alerts([payload[i] for i in positions])
+                    frame.index = positions
+                    frames.append(frame)
+                conn.send(pd.concat(frames).sort_index())
+            elif command == 'stats':
+                conn.send([analyzer.get_statistics() for analyzer in analyzers.values()])
+        except Exception as exc:
+            # Hand the error back to the dispatcher instead of dying silently
+            conn.send(exc)
+
+
+def merge_statistics(stats_list: List[Dict]) -> Dict:
+    """Combine `get_statistics` outputs of analyzers holding disjoint types"""
+    hits = sum(stats['template_cache']['hits'] for stats in stats_list)
+    lookups = sum(stats['template_cache']['lookups'] for stats in stats_list)
+    alerts_by_type = {}
+    type_distribution = []
+    for stats in stats_list:
+        alerts_by_type.update(stats['alerts_by_type'])
+        type_distribution.extend(stats['type_distribution'])
+
+    merged = {
+        'total_alerts': sum(stats['total_alerts'] for stats in stats_list),
+        'template_cache': {
+            'hits': hits,
+            'lookups': lookups,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'entries': sum(stats['template_cache']['entries'] for stats in stats_list)
+        },
+        'live_alerts': sum(stats['live_alerts'] for stats in stats_list),
+        'evicted_alerts': sum(stats['evicted_alerts'] for stats in stats_list),
+        'memory_bytes': sum(stats['memory_bytes'] for stats in stats_list),
+        'alerts_by_type': alerts_by_type,
+        'type_distribution': type_distribution,
+        **merge_summaries(stats_list)
+    }
+    if any('clusters' in stats for stats in stats_list):
+        clusters = [cluster for stats in stats_list for cluster in stats.get('clusters', [])]
+        clusters.sort(key=lambda cluster: -cluster['members'])
+        merged['clusters'] = clusters[:10]
+    correlations = [stats['correlation'] for stats in stats_list if 'correlation' in stats]
+    if correlations:
+        alerts = sum(c['alerts'] for c in correlations)
+        bursts = sum(c['bursts'] for c in correlations)
+        hitters = [hitter for c in correlations for hitter in c['heavy_hitters']]
+        hitters.sort(key=lambda hitter: (-hitter['burst'], -hitter['count']))
+        merged['correlation'] = {
+            'alerts': alerts,
+            'bursts': bursts,
+            'burst_rate': bursts / alerts if alerts else 0.0,
+            'memory_bytes': sum(c['memory_bytes'] for c in correlations),
+            'heavy_hitters': hitters[:10]
+        }
+    return merged
+
+
+class ShardedAnalyzer:
+    """Dispatches alerts to per-type analyzers living in worker processes.
+
+    Args:
+        n_workers: Number of worker processes (defaults to the CPU count)
+        analyzer_kwargs: Keyword arguments for each `SyslogAlertAnalyzer`
+        mp_context: Optional multiprocessing context (e.g. 'spawn')
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, analyzer_kwargs: Optional[Dict] = None,
+                 mp_context: Optional[str] = None):
+        self.n_workers = n_workers or mp.cpu_count()
+        self.analyzer_kwargs = dict(analyzer_kwargs or {})
+        context = mp.get_context(mp_context)
+
+        self._connections = []
+        self._processes = []
+        for _ in range(self.n_workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(child_conn, self.analyzer_kwargs),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def analyze_alerts(self, alerts: List[Dict]) -> pd.DataFrame:
+        """Score a batch across all shards; rows come back in input order"""
+        buckets = [[] for _ in range(self.n_workers)]
+        for i, alert in enumerate(alerts):
+            buckets[shard_for(alert['type'], self.n_workers)].append(i)
+
+        # Fan out first so all shards work concurrently, then gather
+        busy = []
+        for shard, positions in enumerate(buckets):
+            if positions:
+                self._connections[shard].send(('analyze', [alerts[i] for i in positions]))
+                busy.append(shard)
+
+        frames = []
+        for shard, frame in zip(busy, self._receive_all(busy)):
+            frame.index = np.asarray(buckets[shard])[frame.index.to_numpy()]
+            frames.append(frame)
+
+        if not frames:
+            return SyslogAlertAnalyzer().analyze_alerts([])
+        return pd.concat(frames).sort_index()
+
+    def analyze_alert(self, alert: Dict) -> Dict:
+        """Score a single alert on its shard (round trip per call)"""
+        record = self.analyze_alerts([alert]).iloc[0].to_dict()
+        if math.isnan(record['similarity']):
+            del record['similarity']
+        return record
+
+    def get_statistics(self) -> Dict:
+        """Statistics merged across every per-type analyzer of every shard"""
+        for conn in self._connections:
+            conn.send(('stats', None))
+        stats_list = []
+        for shard_stats in self._receive_all(range(self.n_workers)):
+            stats_list.extend(shard_stats)
+        return merge_statistics(stats_list)
+
+    def _receive_all(self, shards):
+        """Replies of `shards`, in order; every reply is read before an error is raised"""
+        results = [self._connections[shard].recv() for shard in shards]
+        for result in results:
+            if isinstance(result, Exception):
+                # The other shards' replies are consumed, so the pipes stay in step
+                raise result
+        return results
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        for conn, process in zip(self._connections, self._processes):
+            if process.is_alive():
+                try:
+                    conn.send(('stop', None))
+                except (BrokenPipeError, OSError):
+                    pass
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=5)
+        self._connections, self._processes = [], []
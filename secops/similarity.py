@@ -0,0 +1,322 @@
+"""Pluggable similarity backends for per-type nearest-neighbour lookups.
+
+A backend is a factory: `create_index(store)` returns an index bound to one
+type's `SparseVectorStore`. The analyzer notifies the index of every row it
+appends (`add`) and evicts (`evict`), and queries it with `max_similarity`.
+Snapshots persist whatever `export_state` returns and hand it back to
+`restore_state` (which returns False to have the index rebuilt with `add`).
+"""
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class ExactSimilarity:
+    """Brute-force cosine similarity against every stored row (default)"""
+
+    name = "exact"
+
+    def create_index(self, store):
+        return ExactIndex(store)
+
+    def __repr__(self):
+        return "ExactSimilarity()"
+
+
+class ExactIndex:
+    """Linear scan over the store; no state beyond the store itself"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, vector):
+        pass
+
+    def evict(self, n_rows):
+        pass
+
+    def nearest(self, vector, k=1):
+        """Return (row_positions, similarities) of the k most similar live rows"""
+        if len(self.store) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        similarities = (self.store.matrix() @ csr_matrix(vector).T).toarray().ravel()
+        return _top_k(np.arange(len(similarities)), similarities, k)
+
+    def max_similarity(self, vector):
+        return self.store.max_similarity(vector)
+
+    def export_state(self):
+        return None
+
+    def restore_state(self, state):
+        return False
+
+    @property
+    def nbytes(self):
+        return 0
+
+
+def _splitmix64(values):
+    """Vectorized splitmix64 finalizer over uint64 arrays (wraps on overflow)"""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class RandomHyperplaneLSH:
+    """Random-hyperplane (SimHash) LSH for approximate cosine search.
+
+    Hyperplanes have random +/-1 entries derived by hashing (feature, plane),
+    so they cost no memory and only the entries for a vector's non-zero
+    features are ever materialized. This keeps the index cheap even for
+    the 2**20-dimensional hashing vectorizer.
+
+    Args:
+        n_bits: Hyperplanes per table. More bits make buckets smaller and
+            lookups faster, at the cost of recall.
+        n_tables: Independent hash tables. More tables raise recall and
+            the number of candidates that get scored exactly.
+        seed: Seed for the hyperplane draw, for reproducible indexes.
+    """
+
+    name = "lsh"
+
+    def __init__(self, n_bits=12, n_tables=8, seed=0):
+        if not 1 <= n_bits <= 62:
+            raise ValueError("n_bits must be between 1 and 62")
+        if n_tables < 1:
+            raise ValueError("n_tables must be at least 1")
+        self.n_bits = n_bits
+        self.n_tables = n_tables
+        self.seed = seed
+        self._plane_offsets = np.arange(n_bits * n_tables, dtype=np.uint64)
+        self._seed_key = _splitmix64(np.array([seed], dtype=np.uint64))[0]
+
+    def plane_signs(self, features):
+        """+/-1 hyperplane entries for the given feature indices, (n, planes)"""
+        n_planes = np.uint64(len(self._plane_offsets))
+        keys = features.astype(np.uint64)[:, None] * n_planes + self._plane_offsets
+        top_bits = _splitmix64(keys ^ self._seed_key) >> np.uint64(63)
+        return np.where(top_bits == 1, np.float32(1.0), np.float32(-1.0))
+
+    def project(self, vectors):
+        """Projection of each row onto every hyperplane, (n_rows, planes)"""
+        vectors = csr_matrix(vectors)
+        if vectors.shape[0] == 1:
+            # Single row: its indices are already the distinct features
+            vectors.sum_duplicates()
+            projection = vectors.data.astype(np.float32) @ self.plane_signs(vectors.indices)
+            return projection.reshape(1, -1)
+        features = np.unique(vectors.indices)
+        if len(features) == 0:
+            return np.zeros((vectors.shape[0], len(self._plane_offsets)), dtype=np.float32)
+        return np.asarray(vectors[:, features] @ self.plane_signs(features))
+
+    def create_index(self, store):
+        return LSHIndex(store, self)
+
+    def __repr__(self):
+        return f"RandomHyperplaneLSH(n_bits={self.n_bits}, n_tables={self.n_tables}, seed={self.seed})"
+
+
+class LSHIndex:
+    """Bucketed row ids per table; candidates are re-scored exactly"""
+
+    def __init__(self, store, backend):
+        self.store = store
+        self.backend = backend
+        self.n_bits = backend.n_bits
+        self.n_tables = backend.n_tables
+        self._powers = (1 << np.arange(self.n_bits, dtype=np.int64))
+        self._buckets = [defaultdict(deque) for _ in range(self.n_tables)]
+
+        # Rows get monotonically increasing ids; ids below _first_live are evicted
+        self._next_id = 0
+        self._first_live = 0
+        # Bucket codes of every live row, oldest first, so eviction can prune them
+        self._row_codes = deque()
+        # Ids held across all buckets
+        self._stored = 0
+
+    def _codes(self, vectors):
+        """Bucket code of each row in each table, shape (n_rows, n_tables)"""
+        projections = self.backend.project(vectors)
+        bits = (projections > 0).reshape(-1, self.n_tables, self.n_bits)
+        return bits @ self._powers
+
+    def _insert(self, codes):
+        row_id = self._next_id
+        for table, code in zip(self._buckets, codes):
+            table[code].append(row_id)
+        self._row_codes.append(codes)
+        self._next_id += 1
+        self._stored += self.n_tables
+
+    def add(self, vector):
+        for codes in self._codes(vector).tolist():
+            self._insert(codes)
+
+    def evict(self, n_rows):
+        # Rows leave in arrival order, so each is at the head of its buckets
+        for _ in range(n_rows):
+            for table, code in zip(self._buckets, self._row_codes.popleft()):
+                bucket = table[code]
+                bucket.popleft()
+                if not bucket:
+                    del table[code]
+            self._stored -= self.n_tables
+        self._first_live += n_rows
+
+    def _candidates(self, codes):
+        found = set()
+        for table, code in zip(self._buckets, codes.tolist()):
+            bucket = table.get(code)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def nearest(self, vector, k=1):
+        """Approximate (row_positions, similarities) of the k most similar rows"""
+        candidates = self._candidates(self._codes(vector)[0])
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        positions -= self._first_live
+        rows = self.store.matrix()[positions]
+        similarities = (rows @ csr_matrix(vector).T).toarray().ravel()
+        return _top_k(positions, similarities, k)
+
+    def max_similarity(self, vector):
+        _, similarities = self.nearest(vector, k=1)
+        return float(similarities[0]) if len(similarities) else 0.0
+
+    def export_state(self):
+        """Bucket codes of the live rows, (n_live, n_tables), for snapshots"""
+        codes = np.array(self._row_codes, dtype=np.int64).reshape(-1, self.n_tables)
+        return {'n_bits': self.n_bits, 'n_tables': self.n_tables,
+                'seed': self.backend.seed, 'codes': codes}
+
+    def restore_state(self, state):
+        """Rebuild the buckets from `export_state` output; False if it does not apply"""
+        if (state is None or (state['n_bits'], state['n_tables'], state['seed']) !=
+                (self.n_bits, self.n_tables, self.backend.seed)
+                or len(state['codes']) != len(self.store)):
+            return False
+        # Codes are stored rather than re-projected: batched projections may
+        # round differently from the per-row ones the index was built with
+        for codes in state['codes'].tolist():
+            self._insert(codes)
+        return True
+
+    @property
+    def nbytes(self):
+        """Rough footprint of the bucket lists and per-row codes (Python ints)"""
+        return (self._stored + len(self._row_codes) * self.n_tables) * 8
+
+
+def _top_k(positions, similarities, k):
+    if len(similarities) > k:
+        top = np.argpartition(-similarities, k - 1)[:k]
+    else:
+        top = np.arange(len(similarities))
+    top = top[np.argsort(-similarities[top], kind='stable')]
+    return positions[top], similarities[top]
+
+
+def get_backend(name, **options):
+    """Build a similarity backend by name ('exact', 'lsh' or 'cluster')"""
+    if name == "exact":
+        return ExactSimilarity()
+    if name == "lsh":
+        return RandomHyperplaneLSH(**options)
+    if name == "cluster":
+        from secops.clustering import CentroidClustering
+        return CentroidClustering(**options)
+    raise ValueError(f"Unknown similarity backend: {name}")
+
+
+def evaluate_recall(vectors, queries, backend, k=1, threshold=None):
+    """Measure an approximate backend against exact search on the same data.
+
+    Args:
+        vectors: Sparse matrix of L2-normalized rows to index
+        queries: Sparse matrix of L2-normalized query rows
+        backend: Approximate backend, e.g. `RandomHyperplaneLSH(...)`
+        k: Neighbours per query used for recall@k
+        threshold: If given, also report how often the approximate max
+            similarity lands on the same side of it as the exact one
+
+    Returns:
+        Dict with recall@k, max-similarity error and per-query latencies
+    """
+    from secops.vector_store import SparseVectorStore
+
+    store = SparseVectorStore(vectors.shape[1])
+    store.append(vectors)
+    exact = ExactSimilarity().create_index(store)
+    approx = backend.create_index(store)
+    approx.add(vectors)
+
+    queries = csr_matrix(queries)
+    hits, errors, agree = 0, [], 0
+    exact_time = approx_time = 0.0
+    for i in range(queries.shape[0]):
+        query = queries[i]
+
+        start = time.perf_counter()
+        exact_pos, exact_sim = exact.nearest(query, k)
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx_pos, approx_sim = approx.nearest(query, k)
+        approx_time += time.perf_counter() - start
+
+        # Tie-aware: any returned row at least as similar as the exact k-th counts
+        if len(exact_sim):
+            hits += int(np.count_nonzero(approx_sim >= exact_sim[-1] - 1e-9))
+        exact_max = float(exact_sim[0]) if len(exact_sim) else 0.0
+        approx_max = float(approx_sim[0]) if len(approx_sim) else 0.0
+        errors.append(exact_max - approx_max)
+        if threshold is not None:
+            agree += (exact_max >= threshold) == (approx_max >= threshold)
+
+    n_queries = max(queries.shape[0], 1)
+    result = {
+        'recall_at_k': hits / (n_queries * min(k, max(len(store), 1))),
+        'mean_max_similarity_error': float(np.mean(errors)) if errors else 0.0,
+        'max_max_similarity_error': float(np.max(errors)) if errors else 0.0,
+        'exact_ms_per_query': 1000 * exact_time / n_queries,
+        'approx_ms_per_query': 1000 * approx_time / n_queries,
+    }
+    if threshold is not None:
+        result['threshold_agreement'] = agree / n_queries
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from secops.alert_simulator import HIPSAlertSimulator
+    from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+    parser = argparse.ArgumentParser(description='Recall of LSH lookups against exact search')
+    parser.add_argument('--count', type=int, default=5000, help='Alerts to index')
+    parser.add_argument('--queries', type=int, default=500, help='Held-out query alerts')
+    parser.add_argument('--bits', type=int, default=12, help='Hyperplanes per table')
+    parser.add_argument('--tables', type=int, default=8, help='Number of hash tables')
+    parser.add_argument('--k', type=int, default=1, help='Neighbours for recall@k')
+    args = parser.parse_args()
+
+    alerts = HIPSAlertSimulator().generate_batch(args.count + args.queries)
+    analyzer = SyslogAlertAnalyzer()
+    vectors = analyzer.vectorize_alerts(alerts, None)
+    report = evaluate_recall(
+        vectors[:args.count], vectors[args.count:],
+        RandomHyperplaneLSH(args.bits, args.tables), k=args.k,
+        threshold=analyzer.similarity_threshold
+    )
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,282 @@
+"""Output sinks for analyzed alerts, written off the analysis thread.
+
+Formatting and writing an alert report (about twenty console lines per
+alert) is slower than scoring it. `SinkWriter` takes (alerts, results)
+batches from the analysis thread through a bounded queue and a dedicated
+writer thread formats them and writes each batch with one bulk `write` per
+sink, so the analyzer only pays for a queue put.
+
+Sinks:
+    - `ConsoleSink`: the monitor's alert report (`format_alert_details`)
+    - `JsonlSink`: one JSON object per alert (alert fields + analysis)
+    - `CsvSink`: one compact CSV row per alert
+
+Any sink can be limited to HIGH-priority alerts (`high_only=True`); when
+every sink is, lower-priority rows are discarded with one vectorized
+comparison before anything is formatted. Priorities use the thresholds of
+the `ScoringConfig` submitted with each batch (the defaults otherwise).
+"""
+import csv
+import json
+import math
+import queue
+import sys
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from secops.scoring import DEFAULT_SCORING
+
+PRIORITY_EMOJI = {
+    "HIGH": "🔴",
+    "MEDIUM": "🟡",
+    "LOW": "🟢"
+}
+
+
+def priority_of(score: float, config=None) -> str:
+    """Priority level of a final score under `config`'s thresholds"""
+    return (config or DEFAULT_SCORING).priority_of(score)
+
+
+def format_alert_details(alert, analysis: Dict, config=None) -> str:
+    """Console report of one analyzed alert (without the trailing newline)"""
+    priority = priority_of(analysis['score'], config)
+    lines = [
+        "\n" + "="*80,
+        f"{PRIORITY_EMOJI[priority]} PRIORITY: {priority} | Type: {alert['type']}",
+        "-"*80,
+        "📝 Alert Details:",
+        f"  • Pattern: {alert['pattern']}",
+        f"  • Process: {alert['process']} (PID: {alert['pid']})",
+        f"  • Severity: {alert['severity']}",
+        f"  • Source IP: {alert['source_ip']}",
+        f"  • Timestamp: {alert['timestamp']}",
+        "\n📊 Risk Analysis:",
+        f"  • Final Score: {analysis['score']:.3f}",
+        f"  • Type Base Score: {analysis['type_score']:.3f}",
+        f"  • Severity Weight: {analysis['severity_score']:.3f}",
+        f"  • Uniqueness Score: {analysis['uniqueness']:.3f}",
+        f"  • Type Frequency: #{analysis['type_frequency']}"
+    ]
+    if 'similarity' in analysis:
+        lines.append(f"  • Similarity to Previous: {analysis['similarity']:.3f}")
+    if 'cluster' in analysis:
+        lines.append(f"  • Incident Cluster: #{analysis['cluster']}")
+    if analysis.get('burst'):
+        lines.append(f"  • Burst: {analysis['burst']:.3f} (by {analysis['burst_dimension']})")
+    lines.append("="*80)
+    return "\n".join(lines)
+
+
+def _analysis_records(results) -> List[Dict]:
+    """`analyze_alert` dict(s) or an `analyze_alerts` frame -> list of analysis dicts"""
+    if isinstance(results, dict):
+        return [results]
+    if hasattr(results, 'to_dict'):
+        records = results.to_dict('records')
+        for analysis in records:
+            # First alerts of a type carry no similarity (NaN in the frame)
+            if math.isnan(analysis.get('similarity', 0.0)):
+                del analysis['similarity']
+            if 'burst_dimension' in analysis and not isinstance(analysis['burst_dimension'], str):
+                analysis['burst_dimension'] = None
+        return records
+    return list(results)
+
+
+class AlertSink:
+    """Base sink: `write_batch` gets parallel lists of alerts and analysis dicts"""
+
+    def __init__(self, high_only: bool = False):
+        self.high_only = high_only
+
+    def select(self, alerts, analyses, config=None):
+        if not self.high_only:
+            return alerts, analyses
+        high = (config or DEFAULT_SCORING).thresholds['high']
+        keep = [i for i, analysis in enumerate(analyses) if analysis['score'] > high]
+        return [alerts[i] for i in keep], [analyses[i] for i in keep]
+
+    def write_batch(self, alerts: Sequence, analyses: Sequence[Dict], config=None) -> None:
+        """Write a batch; `config` is the scoring config that sets priorities"""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class ConsoleSink(AlertSink):
+    """Alert reports on a text stream (stdout by default)"""
+
+    def __init__(self, stream=None, high_only: bool = False):
+        super().__init__(high_only)
+        self.stream = stream
+
+    def write_batch(self, alerts, analyses, config=None) -> None:
+        if alerts:
+            stream = self.stream or sys.stdout
+            stream.write("".join(format_alert_details(alert, analysis, config) + "\n"
+                                 for alert, analysis in zip(alerts, analyses)))
+
+    def flush(self) -> None:
+        (self.stream or sys.stdout).flush()
+
+
+class _FileSink(AlertSink):
+    def __init__(self, path: str, high_only: bool = False, buffer_size: int = 1 << 20):
+        super().__init__(high_only)
+        self.path = path
+        self._file = open(path, 'w', buffering=buffer_size, newline='')
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _json_default(value):
+    # NumPy scalars from the results frame
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class JsonlSink(_FileSink):
+    """One JSON object per alert: the alert's fields, its analysis and priority"""
+
+    def write_batch(self, alerts, analyses, config=None) -> None:
+        dumps = json.dumps
+        self._file.write("".join(
+            dumps({**dict(alert), **analysis, 'priority': priority_of(analysis['score'], config)},
+                  default=_json_default) + "\n"
+            for alert, analysis in zip(alerts, analyses)
+        ))
+
+
+class CsvSink(_FileSink):
+    """Compact CSV: one row of alert fields and scores per alert"""
+
+    COLUMNS = ('timestamp', 'type', 'severity', 'pattern', 'process', 'pid', 'source_ip',
+               'priority', 'score', 'uniqueness', 'similarity', 'type_frequency', 'burst')
+
+    def __init__(self, path: str, high_only: bool = False, buffer_size: int = 1 << 20):
+        super().__init__(path, high_only, buffer_size)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.COLUMNS)
+
+    def write_batch(self, alerts, analyses, config=None) -> None:
+        self._writer.writerows(
+            (alert['timestamp'], alert['type'], alert['severity'], alert['pattern'],
+             alert['process'], alert['pid'], alert['source_ip'],
+             priority_of(analysis['score'], config),
+             f"{analysis['score']:.4f}", f"{analysis['uniqueness']:.4f}",
+             f"{analysis['similarity']:.4f}" if 'similarity' in analysis else '',
+             analysis['type_frequency'],
+             f"{analysis['burst']:.4f}" if analysis.get('burst') else '')
+            for alert, analysis in zip(alerts, analyses)
+        )
+
+
+def open_sink(path: str, high_only: bool = False) -> AlertSink:
+    """File sink chosen by extension: .csv -> CSV, anything else -> JSON lines"""
+    if path.lower().endswith('.csv'):
+        return CsvSink(path, high_only)
+    return JsonlSink(path, high_only)
+
+
+class SinkWriter:
+    """Bounded queue + writer thread in front of a set of sinks.
+
+    Args:
+        sinks: Sinks receiving every submitted batch
+        queue_size: Max batches waiting to be written
+        block: When the queue is full, wait for the writer (lossless) or,
+            with `block=False`, drop the batch and count it in `dropped`
+
+    `written` counts alerts at least one sink accepted; alerts of a batch
+    every sink failed on are counted in `failed`.
+    """
+
+    _STOP = object()
+
+    def __init__(self, sinks: Sequence[AlertSink], queue_size: int = 256, block: bool = True):
+        self.sinks = list(sinks)
+        self.block = block
+        self.counters = {'submitted': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'errors': 0}
+        self.last_error = None
+        # HIGH cut-off applied before formatting when every sink wants HIGH only
+        self._high_only = bool(self.sinks) and all(s.high_only for s in self.sinks)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="alert-sink-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, alerts: Sequence, results, config=None) -> None:
+        """Queue analyzed alerts: `results` is an `analyze_alerts` frame or an `analyze_alert` dict.
+
+        `config` is the scoring config the alerts were scored under; its
+        thresholds set their priorities (the defaults when omitted).
+        """
+        if not self.sinks:
+            return
+        self.counters['submitted'] += len(alerts)
+        try:
+            self._queue.put((alerts, results, config), block=self.block)
+        except queue.Full:
+            self.counters['dropped'] += len(alerts)
+
+    def _prefilter(self, alerts, results, config):
+        if not self._high_only or not hasattr(results, 'iloc'):
+            return alerts, results
+        high = (config or DEFAULT_SCORING).thresholds['high']
+        keep = np.flatnonzero(results['score'].to_numpy() > high)
+        return [alerts[i] for i in keep], results.iloc[keep]
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                alerts, results, config = item
+                try:
+                    alerts, results = self._prefilter(alerts, results, config)
+                    analyses = _analysis_records(results)
+                except Exception as exc:  # a malformed batch is dropped, the writer keeps going
+                    self.counters['errors'] += 1
+                    self.counters['failed'] += len(item[0])
+                    self.last_error = exc
+                    continue
+                written = False
+                for sink in self.sinks:
+                    try:
+                        sink.write_batch(*sink.select(alerts, analyses, config), config)
+                        written = True
+                    except Exception as exc:  # keep the other sinks (and the writer) going
+                        self.counters['errors'] += 1
+                        self.last_error = exc
+                self.counters['written' if written else 'failed'] += len(item[0])
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until everything submitted so far is written and flushed"""
+        self._queue.join()
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        """Drain the queue, stop the writer thread and close the sinks"""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        for sink in self.sinks:
+            sink.close()
+
+    def stats(self) -> Dict:
+        return {**self.counters, 'queue_depth': self._queue.qsize()}
@@ -0,0 +1,243 @@
+"""Checkpoint/restore of `SyslogAlertAnalyzer` state.
+
+A snapshot is a directory:
+
+    manifest.json        format version, creation time, per-type row counts
+    state.pkl            counters, history key tables, fitted vectorizer, configuration
+    vectors/<i>/         one type's live CSR rows: data.npy, indices.npy, indptr.npy
+    history/<i>/         one type's live history rows, one .npy per column
+
+Vectors and history rows are plain `.npy` arrays (history keys are integer
+ids into a per-type key table), so restoring opens them with `mmap` instead
+of deserializing them: a multi-GB history restores in roughly the time it
+takes to unpickle the (comparatively small) Python state. Mappings are
+copy-on-write; the snapshot files are never modified by the restored
+analyzer.
+
+`SnapshotScheduler` takes periodic snapshots into a directory: the capture
+copies arrays on the analysis thread, pickling and disk writes happen on a
+background thread.
+"""
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from secops.records import AlertHistory
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+from secops.vector_store import SparseVectorStore
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+STATE = 'state.pkl'
+
+
+def capture_snapshot(analyzer: SyslogAlertAnalyzer, copy: bool = False) -> Tuple[Dict, Dict, Dict]:
+    """An analyzer's state, not yet serialized: (state, {type: CSR matrix}, {type: history columns}).
+
+    With `copy=True` everything captured is a private copy, so the capture
+    can be pickled and written out on another thread while the analyzer
+    keeps running.
+    """
+    return analyzer._export_state(copy=copy)
+
+
+def _save_arrays(root: str, directory: str, arrays: Dict) -> None:
+    os.makedirs(os.path.join(root, directory))
+    for name, values in arrays.items():
+        np.save(os.path.join(root, directory, f'{name}.npy'), values)
+
+
+def _load_arrays(root: str, directory: str, names, mmap_mode) -> Dict:
+    return {name: np.load(os.path.join(root, directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in names}
+
+
+def write_snapshot(captured: Tuple[Dict, Dict, Dict], path: str) -> str:
+    """Write a capture to `path`, replacing any snapshot already there"""
+    state, matrices, histories = captured
+    path = os.path.abspath(path)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    types = []
+    for i, (alert_type, matrix) in enumerate(matrices.items()):
+        vector_dir = os.path.join('vectors', str(i))
+        _save_arrays(tmp_path, vector_dir,
+                     {name: getattr(matrix, name) for name in ('data', 'indices', 'indptr')})
+        types.append({
+            'alert_type': alert_type,
+            'path': vector_dir,
+            'rows': matrix.shape[0],
+            'nnz': int(matrix.nnz),
+            'n_features': matrix.shape[1]
+        })
+
+    history_entries = []
+    for i, (alert_type, columns) in enumerate(histories.items()):
+        history_dir = os.path.join('history', str(i))
+        _save_arrays(tmp_path, history_dir, columns)
+        history_entries.append({
+            'alert_type': alert_type,
+            'path': history_dir,
+            'rows': len(columns['key'])
+        })
+
+    with open(os.path.join(tmp_path, STATE), 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(tmp_path, MANIFEST), 'w') as f:
+        json.dump({
+            'version': FORMAT_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'types': types,
+            'histories': history_entries
+        }, f, indent=2)
+
+    # Swap directories so a crash never leaves a half-written snapshot at `path`
+    old_path = None
+    if os.path.exists(path):
+        old_path = f"{path}.old-{os.getpid()}-{threading.get_ident()}"
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if old_path is not None:
+        shutil.rmtree(old_path)
+    return path
+
+
+def save_snapshot(analyzer: SyslogAlertAnalyzer, path: str) -> str:
+    """Checkpoint an analyzer to a snapshot directory"""
+    return write_snapshot(capture_snapshot(analyzer), path)
+
+
+def _is_snapshot_name(name: str) -> bool:
+    # Excludes the .tmp-/.old- directories of an interrupted write
+    return name.startswith('snapshot-') and '.' not in name
+
+
+def latest_snapshot(directory: str) -> Optional[str]:
+    """Newest snapshot written by a `SnapshotScheduler` into `directory`"""
+    if not os.path.isdir(directory):
+        return None
+    names = sorted(
+        name for name in os.listdir(directory)
+        if _is_snapshot_name(name) and os.path.isfile(os.path.join(directory, name, MANIFEST))
+    )
+    return os.path.join(directory, names[-1]) if names else None
+
+
+def load_snapshot(path: str, mmap: bool = True, **overrides) -> SyslogAlertAnalyzer:
+    """Restore an analyzer from a snapshot (or the newest one in a scheduler directory).
+
+    Args:
+        path: Snapshot directory, or a `SnapshotScheduler` directory
+        mmap: Map the vector files instead of reading them into memory
+        overrides: Constructor arguments replacing the saved ones
+            (e.g. a different `retention` or `similarity_backend`)
+    """
+    if not os.path.isfile(os.path.join(path, MANIFEST)):
+        latest = latest_snapshot(path)
+        if latest is None:
+            raise FileNotFoundError(f"No snapshot found in {path}")
+        path = latest
+
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest['version']}")
+    with open(os.path.join(path, STATE), 'rb') as f:
+        state = pickle.load(f)
+
+    mmap_mode = 'c' if mmap else None
+    stores = {}
+    for entry in manifest['types']:
+        arrays = _load_arrays(path, entry['path'], ('data', 'indices', 'indptr'), mmap_mode)
+        stores[entry['alert_type']] = SparseVectorStore.from_arrays(
+            entry['n_features'], arrays['data'], arrays['indices'], arrays['indptr'])
+    histories = {
+        entry['alert_type']: _load_arrays(path, entry['path'],
+                                          [name for name, _ in AlertHistory.COLUMNS], mmap_mode)
+        for entry in manifest['histories']
+    }
+    return SyslogAlertAnalyzer._from_state(state, stores, histories, **overrides)
+
+
+class SnapshotScheduler:
+    """Periodic snapshots of one analyzer into `directory`.
+
+    Call `maybe_snapshot()` from the thread that drives the analyzer (after
+    each alert or batch). Once `interval` seconds have passed it captures
+    the state right there, between updates, so the capture is consistent
+    without any locking; serializing it to disk happens on a background
+    thread. A capture is skipped while the previous write is still running.
+
+    Args:
+        analyzer: Analyzer to snapshot
+        directory: Directory receiving `snapshot-<time>` subdirectories
+        interval: Minimum seconds between snapshots
+        keep: Number of most recent snapshots to keep
+    """
+
+    def __init__(self, analyzer: SyslogAlertAnalyzer, directory: str, interval: float = 300.0,
+                 keep: int = 2):
+        self.analyzer = analyzer
+        self.directory = directory
+        self.interval = interval
+        self.keep = max(1, keep)
+        self.last_path = None
+        self.last_error = None
+        self.snapshots_written = 0
+        self._last_capture = time.monotonic()
+        self._writer = None
+        os.makedirs(directory, exist_ok=True)
+
+    def maybe_snapshot(self) -> bool:
+        """Take a snapshot if one is due; returns True if a capture was started"""
+        if time.monotonic() - self._last_capture < self.interval:
+            return False
+        if self._writer is not None and self._writer.is_alive():
+            return False
+        self.snapshot()
+        return True
+
+    def snapshot(self, wait: bool = False) -> None:
+        """Capture now and write in the background (or inline with `wait=True`)"""
+        if self._writer is not None:
+            self._writer.join()
+        self._last_capture = time.monotonic()
+        captured = capture_snapshot(self.analyzer, copy=True)
+        name = f"snapshot-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{self.snapshots_written:06d}"
+        path = os.path.join(self.directory, name)
+        self._writer = threading.Thread(target=self._write, args=(captured, path), daemon=True)
+        self._writer.start()
+        if wait:
+            self._writer.join()
+
+    def _write(self, captured, path) -> None:
+        try:
+            write_snapshot(captured, path)
+        except (OSError, pickle.PicklingError) as exc:
+            self.last_error = exc
+            return
+        self.last_path = path
+        self.snapshots_written += 1
+        self._prune()
+
+    def _prune(self) -> None:
+        names = sorted(name for name in os.listdir(self.directory) if _is_snapshot_name(name))
+        for name in names[:-self.keep]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def close(self, final_snapshot: bool = True) -> None:
+        """Wait for pending writes, optionally taking one last snapshot"""
+        if final_snapshot:
+            self.snapshot(wait=True)
+        elif self._writer is not None:
+            self._writer.join()
@@ -0,0 +1,387 @@
+"""Asyncio syslog listener feeding the analyzer in micro-batches.
+
+Frames arrive over UDP and/or TCP (newline-delimited or RFC 6587 octet
+counting), are queued raw in a bounded queue, and a single consumer parses
+them (RFC 5424 or RFC 3164) into the analyzer's alert dict shape and scores
+them with `analyze_alerts` on a worker thread, so the event loop only ever
+does socket I/O.
+
+Backpressure: TCP readers await queue space, which stalls the socket and
+lets TCP flow control slow the sender. UDP has no flow control, so a full
+queue drops the datagram and counts it in `dropped_queue_full`.
+"""
+import asyncio
+import re
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Syslog severity (PRI & 7) -> analyzer severity, used when the message has none
+_SYSLOG_SEVERITY = {
+    0: "Critical", 1: "Critical", 2: "Critical",
+    3: "High", 4: "Medium", 5: "Low", 6: "Low", 7: "Low"
+}
+
+_RFC5424 = re.compile(
+    r'<(?P<pri>\d{1,3})>(?P<version>\d{1,2}) (?P<timestamp>\S+) (?P<hostname>\S+) '
+    r'(?P<app>\S+) (?P<procid>\S+) (?P<msgid>\S+) '
+    r'(?P<sd>-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (?P<msg>.*))?$',
+    re.DOTALL
+)
+_RFC3164 = re.compile(
+    r'<(?P<pri>\d{1,3})>(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) '
+    r'(?P<hostname>\S+) (?P<tag>[^:\[\s]+)(?:\[(?P<procid>\d+)\])?: ?(?P<msg>.*)$',
+    re.DOTALL
+)
+
+# HIPS message fields (the simulator's templates and the agents' formats)
+_ALERT_TYPE = re.compile(r'\[([A-Z][A-Z_]+)\]')
+_SEVERITY = re.compile(r'(?:Severity|Risk Level|Priority): (Critical|High|Medium|Low)')
+_PID = re.compile(r'(?:PID|Process ID): (\d+)')
+_PROCESS = re.compile(r'\b([\w.-]+\.exe)\b')
+_IP = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
+_PATTERN = re.compile(r'\]: (?:(.+?) (?:detected from|involving) |\S+ \(PID: \d+\) triggered (.+?)\. )')
+
+
+def _clean_timestamp(value: str) -> str:
+    """RFC 5424/3164 timestamp -> 'YYYY-MM-DD HH:MM:SS' (as the analyzer expects)"""
+    if value == '-':
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if value[:4].isdigit():
+        return value[:19].replace('T', ' ')
+    try:
+        parsed = datetime.strptime(f"{datetime.now().year} {value}", "%Y %b %d %H:%M:%S")
+    except ValueError:
+        parsed = datetime.now()
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_syslog(frame, peer_ip: Optional[str] = None,
+                 default_type: Optional[str] = None) -> Optional[Dict]:
+    """Parse one RFC 5424 or RFC 3164 frame into an alert dict.
+
+    Returns None if the frame is not syslog or carries no alert type (and no
+    `default_type` is given).
+    """
+    if isinstance(frame, bytes):
+        frame = frame.decode('utf-8', errors='replace')
+    frame = frame.strip('\r\n\x00')
+
+    match = _RFC5424.match(frame)
+    if match:
+        process = match.group('app')
+        procid = match.group('procid')
+        message = match.group('msg') or ''
+        if message.startswith('\ufeff'):
+            message = message[1:]
+    else:
+        match = _RFC3164.match(frame)
+        if not match:
+            return None
+        process = match.group('tag')
+        procid = match.group('procid') or '-'
+        message = match.group('msg')
+
+    alert_type = _ALERT_TYPE.search(message)
+    if alert_type:
+        alert_type = alert_type.group(1)
+    elif default_type:
+        alert_type = default_type
+    else:
+        return None
+
+    severity = _SEVERITY.search(message)
+    pid = _PID.search(message)
+    exe = _PROCESS.search(message)
+    source_ip = _IP.search(message)
+    pattern = _PATTERN.search(message)
+
+    return {
+        "raw_message": message,
+        "type": alert_type,
+        "pattern": (pattern.group(1) or pattern.group(2)) if pattern else "",
+        "severity": (severity.group(1) if severity
+                     else _SYSLOG_SEVERITY[int(match.group('pri')) & 7]),
+        "process": exe.group(1) if exe else process,
+        # isdecimal, not isdigit: int() rejects digits such as '²'
+        "pid": int(pid.group(1)) if pid else (int(procid) if procid.isdecimal() else 0),
+        "source_ip": source_ip.group(0) if source_ip else (peer_ip or ""),
+        "timestamp": _clean_timestamp(match.group('timestamp'))
+    }
+
+
+def format_rfc5424(alert: Dict, hostname: str = "hips-agent", facility: int = 4) -> str:
+    """Wrap an alert dict in an RFC 5424 frame (for senders and tests)"""
+    severity = {"Critical": 2, "High": 3, "Medium": 4, "Low": 5}.get(alert.get("severity"), 5)
+    timestamp = str(alert.get("timestamp", "-")).replace(' ', 'T')
+    return (f"<{facility * 8 + severity}>1 {timestamp} {hostname} "
+            f"{alert.get('process', '-')} {alert.get('pid', '-')} HIPS - {alert['raw_message']}")
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server._enqueue_nowait(data, addr[0])
+
+
+class SyslogIngestServer:
+    """UDP/TCP syslog listener with a bounded queue and micro-batched analysis.
+
+    Args:
+        analyzer: Anything with `analyze_alerts(list) -> DataFrame`
+        host: Interface to bind
+        udp_port / tcp_port: Ports to listen on (None disables; 0 picks a free port)
+        queue_size: Max raw frames waiting for analysis
+        batch_size: Max alerts per `analyze_alerts` call
+        batch_timeout: Max seconds a partial batch waits before being analyzed
+        default_type: Alert type for frames without a `[TYPE]` tag (None drops them)
+        on_results: Optional callback `(alerts, results_frame)` run on the worker thread;
+            alerts of batches it raises on are counted in `callback_errors`
+        udp_rcvbuf: Requested kernel receive buffer for the UDP socket (bytes)
+    """
+
+    def __init__(self, analyzer, host: str = "127.0.0.1", udp_port: Optional[int] = 5514,
+                 tcp_port: Optional[int] = 5514, queue_size: int = 100000,
+                 batch_size: int = 2048, batch_timeout: float = 0.05,
+                 default_type: Optional[str] = None,
+                 on_results: Optional[Callable] = None, udp_rcvbuf: int = 8 * 1024 * 1024,
+                 max_frame_size: int = 64 * 1024):
+        self.analyzer = analyzer
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.default_type = default_type
+        self.on_results = on_results
+        self.udp_rcvbuf = udp_rcvbuf
+        self.max_frame_size = max_frame_size
+
+        self.counters = {
+            'received': 0,
+            'dropped_queue_full': 0,
+            'dropped_oversized': 0,
+            'unparsed': 0,
+            'analyzed': 0,
+            'analysis_errors': 0,
+            'callback_errors': 0,
+            'batches': 0
+        }
+        self._queue = None
+        self._udp_transport = None
+        self._tcp_server = None
+        self._consumer = None
+        # One worker thread: the analyzer is only ever touched from it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="syslog-analyzer")
+        self._started_at = None
+
+    # -- ingestion ---------------------------------------------------------
+
+    def _enqueue_nowait(self, frame: bytes, peer_ip: str) -> None:
+        self.counters['received'] += 1
+        if len(frame) > self.max_frame_size:
+            self.counters['dropped_oversized'] += 1
+            return
+        try:
+            self._queue.put_nowait((frame, peer_ip))
+        except asyncio.QueueFull:
+            self.counters['dropped_queue_full'] += 1
+
+    async def _enqueue(self, frame: bytes, peer_ip: str) -> None:
+        self.counters['received'] += 1
+        if len(frame) > self.max_frame_size:
+            self.counters['dropped_oversized'] += 1
+            return
+        if self._queue.full():
+            # Waiting here stops reading the socket: TCP flow control pushes back
+            await self._queue.put((frame, peer_ip))
+        else:
+            self._queue.put_nowait((frame, peer_ip))
+
+    def _split_frames(self, buffer: bytes) -> Tuple[List[bytes], bytes]:
+        """Cut complete frames off a TCP buffer; returns (frames, remainder)"""
+        frames = []
+        pos = 0
+        size = len(buffer)
+        while pos < size:
+            if buffer[pos:pos + 1] in (b'\r', b'\n'):
+                pos += 1
+            elif buffer[pos:pos + 1].isdigit():
+                # RFC 6587 octet counting: "<length> <frame>"
+                space = buffer.find(b' ', pos, pos + 12)
+                if space < 0:
+                    if size - pos >= 12:
+                        raise ValueError("Malformed octet count")
+                    break
+                end = space + 1 + int(buffer[pos:space])
+                if end > size:
+                    break
+                frames.append(buffer[space + 1:end])
+                pos = end
+            else:
+                newline = buffer.find(b'\n', pos)
+                if newline < 0:
+                    break
+                frames.append(buffer[pos:newline])
+                pos = newline + 1
+        return frames, buffer[pos:]
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer_ip = (writer.get_extra_info('peername') or ("",))[0]
+        buffer = b''
+        try:
+            while True:
+                chunk = await reader.read(256 * 1024)
+                if not chunk:
+                    break
+                frames, buffer = self._split_frames(buffer + chunk)
+                for frame in frames:
+                    await self._enqueue(frame, peer_ip)
+                if len(buffer) > self.max_frame_size + 16:
+                    # Unterminated or oversized frame: give up on this connection
+                    self.counters['received'] += 1
+                    self.counters['dropped_oversized'] += 1
+                    break
+        except (ValueError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # -- analysis ----------------------------------------------------------
+
+    def _analyze_batch(self, frames: List[Tuple[bytes, str]]) -> None:
+        """Parse and score one micro-batch (runs on the worker thread)"""
+        alerts = []
+        for frame, peer_ip in frames:
+            try:
+                alert = parse_syslog(frame, peer_ip, self.default_type)
+            except Exception:
+                # A frame the parser chokes on must not end the consumer task
+                alert = None
+            if alert is None:
+                self.counters['unparsed'] += 1
+            else:
+                alerts.append(alert)
+        if not alerts:
+            return
+        try:
+            results = self.analyzer.analyze_alerts(alerts)
+        except Exception:
+            self.counters['analysis_errors'] += len(alerts)
+            return
+        self.counters['analyzed'] += len(alerts)
+        self.counters['batches'] += 1
+        if self.on_results is not None:
+            try:
+                self.on_results(alerts, results)
+            except Exception:
+                # An exception escaping here would end the consumer task
+                self.counters['callback_errors'] += len(alerts)
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            await loop.run_in_executor(self._executor, self._analyze_batch, batch)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._started_at = time.time()
+
+        if self.udp_port is not None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.udp_rcvbuf)
+            sock.bind((self.host, self.udp_port))
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _UDPProtocol(self), sock=sock
+            )
+            self.udp_port = sock.getsockname()[1]
+
+        if self.tcp_port is not None:
+            self._tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.tcp_port)
+            self.tcp_port = self._tcp_server.sockets[0].getsockname()[1]
+
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def drain(self) -> None:
+        """Wait until every queued frame has been analyzed"""
+        while not self._queue.empty() or self.pending():
+            await asyncio.sleep(0.01)
+
+    def pending(self) -> int:
+        """Frames accepted but not yet parsed and analyzed"""
+        processed = (self.counters['analyzed'] + self.counters['analysis_errors'] +
+                     self.counters['unparsed'])
+        dropped = self.counters['dropped_queue_full'] + self.counters['dropped_oversized']
+        return self.counters['received'] - dropped - processed
+
+    async def stop(self) -> None:
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    def stats(self) -> Dict:
+        """Ingest counters plus current queue depth and throughput"""
+        elapsed = time.time() - self._started_at if self._started_at else 0.0
+        stats = dict(self.counters)
+        stats['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        stats['pending'] = self.pending()
+        stats['alerts_per_second'] = self.counters['analyzed'] / elapsed if elapsed else 0.0
+        return stats
+
+
+def send_messages(messages: Iterable[str], host: str = "127.0.0.1", port: int = 5514,
+                  protocol: str = "udp") -> int:
+    """Send syslog frames to a listener (loopback sender for tests and load checks)"""
+    sent = 0
+    if protocol == "udp":
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for message in messages:
+                sock.sendto(message.encode('utf-8'), (host, port))
+                sent += 1
+    elif protocol == "tcp":
+        with socket.create_connection((host, port)) as sock:
+            for message in messages:
+                payload = message.encode('utf-8')
+                # Octet counting survives newlines inside messages
+                sock.sendall(b"%d %s" % (len(payload), payload))
+                sent += 1
+    else:
+        raise ValueError(f"Unknown protocol: {protocol}")
+    return sent
@@ -1,67 +1,157 @@
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix
 from collections import defaultdict
-import re
-import pandas as pd
+from copy import copy as shallow_copy, deepcopy
+import sys
+import time
+
+from secops.aggregates import AnalyzerAggregates
+from secops.clustering import CentroidClustering
+from secops.instrumentation import AnalyzerMetrics, disabled_clock
+from secops.normalizer import AlertNormalizer, word_ngrams
+from secops.records import AlertHistory, AlertVocabulary, alert_time
+from secops.retention import RetentionPolicy
+from secops.scoring import ScoringConfig
+from secops.scoring_tables import ScoringTables
+from secops.similarity import ExactSimilarity
+from secops.vector_store import SparseVectorStore
 
 class SyslogAlertAnalyzer:
-    def __init__(self):
-        # Compile regex patterns once during initialization
-        self.ip_pattern = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
-        self.timestamp_pattern = re.compile(r'\b\d{2}:\d{2}:\d{2}\b')
-        self.pid_pattern = re.compile(r'PID: \d+')
+    def __init__(self, retention=None, type_retention=None, similarity_backend=None,
+                 template_cache=True, vectorizer_mode='tfidf', n_hash_features=2 ** 20,
+                 normalizer_cache_size=65536, instrument=False, vocabulary=None,
+                 correlation=None, scoring=None):
+        # Masking, lowercasing and tokenization happen in one memoized pass
+        self.normalizer = AlertNormalizer(cache_size=normalizer_cache_size)
         
-        # Use more efficient vectorizer settings with adjusted document frequency parameters
-        self.vectorizer = TfidfVectorizer(
-            analyzer='word',
-            token_pattern=r'\b\w+\b',
-            ngram_range=(1, 2),
-            max_features=10000,
-            min_df=1,  # Changed from 2 to 1 to handle small alert sets
-            max_df=1.0  # Added explicit max_df
-        )
+        # 'tfidf' fits a vocabulary on the first alert; 'hashing' streams with
+        # feature hashing and online IDF, so no fit is ever needed. The vectorizer
+        # modules (scikit-learn) are only imported once an analyzer is built.
+        if vectorizer_mode not in ('tfidf', 'hashing'):
+            raise ValueError(f"Unknown vectorizer mode: {vectorizer_mode}")
+        self.vectorizer_mode = vectorizer_mode
+        self.streaming = vectorizer_mode == 'hashing'
+        if self.streaming:
+            from secops.featurizer import StreamingTfidfVectorizer
+            self.vectorizer = StreamingTfidfVectorizer(
+                n_features=n_hash_features,
+                token_pattern=r'\b\w+\b',
+                ngram_range=(1, 2)
+            )
+            self.is_fitted = True
+        else:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            # Use more efficient vectorizer settings with adjusted document frequency parameters
+            self.vectorizer = TfidfVectorizer(
+                analyzer='word',
+                token_pattern=r'\b\w+\b',
+                ngram_range=(1, 2),
+                max_features=10000,
+                min_df=1,  # Changed from 2 to 1 to handle small alert sets
+                max_df=1.0  # Added explicit max_df
+            )
         
-        # Use more efficient data structures
-        self.alert_history = defaultdict(list)
-        self.alert_vectors = {}  # Regular dict is faster than defaultdict for this use
+        # Retention: a default policy plus optional per-type overrides
+        self.retention = retention or RetentionPolicy()
+        self.type_retention = dict(type_retention or {})
+
+        # History rows are compact columnar records; categoricals are interned
+        # in the vocabulary (pass the one AlertRecords were built with)
+        self.vocabulary = vocabulary or AlertVocabulary()
+        self.alert_history = defaultdict(AlertHistory)
+        self.alert_vectors = {}  # alert_type -> SparseVectorStore, grown one row per alert
         self.alert_counts = defaultdict(lambda: defaultdict(int))
         self.type_counts = defaultdict(int)
+        self.evicted_counts = defaultdict(int)
+
+        # Nearest-neighbour lookups go through a per-type index built by the backend
+        self.similarity_backend = similarity_backend or ExactSimilarity()
+        self.similarity_indexes = {}
+        # The clustering backend also assigns every alert an incident cluster ID
+        self.clustering = isinstance(self.similarity_backend, CentroidClustering)
+
+        # Exact-repeat fast path: preprocessed message -> (vector, self-similarity).
+        # Entries live exactly as long as their pattern has rows in the window.
+        self.template_cache_enabled = template_cache
+        self._template_cache = defaultdict(dict)
+        self.template_cache_hits = 0
+        self.template_cache_lookups = 0
+
+        # Decay mode only: live rows per pattern and time of last count update
+        self._pattern_rows = defaultdict(lambda: defaultdict(int))
+        self._count_stamps = defaultdict(dict)
+        # Newest alert time seen per type, the reference clock for age/decay
+        self._latest_time = {}
+
+        # Optional sliding-window burst detection (secops.correlation.BurstDetector);
+        # adds a burst factor to each alert's score
+        self.correlation = correlation
+
+        # Running score quantiles and severity breakdowns, readable from other threads
+        self.aggregates = AnalyzerAggregates()
+
+        # Per-stage timing; while disabled the clock is a no-op and nothing is recorded
+        self.metrics = None
+        self._clock = disabled_clock
+        if instrument:
+            self.enable_instrumentation()
         
         # Cache constants
         self.similarity_threshold = 0.85
-        self.type_weights = {
-            "MEMORY_ATTACK": 0.9,
-            "PRIVILEGE_ESCALATION": 0.85,
-            "SYSTEM_TAMPERING": 0.75,
-            "ACCESS_VIOLATION": 0.7,
-            "SUSPICIOUS_EXECUTION": 0.65
-        }
-        self.severity_weights = {
-            "Critical": 1.0,
-            "High": 0.8,
-            "Medium": 0.6,
-            "Low": 0.3
-        }
+
+        # Weights, score mix and priority thresholds (secops.scoring), compiled
+        # into lookup arrays over the vocabulary's type and severity IDs
+        self.set_scoring(scoring or ScoringConfig())
+
+    def set_scoring(self, config):
+        """Score subsequent alerts under `config`.
+
+        The compiled tables are swapped in with one assignment and every
+        alert or batch reads them once, so a reload from another thread
+        never leaves an alert or a batch scored under a mix of configs.
+        """
+        self.scoring = ScoringTables(config, self.vocabulary)
+
+    @property
+    def scoring_config(self):
+        return self.scoring.config
+
+    @property
+    def type_weights(self):
+        return self.scoring.config.type_weights
+
+    @property
+    def severity_weights(self):
+        return self.scoring.config.severity_weights
+
+    def enable_instrumentation(self, metrics=None):
+        """Start collecting per-stage timings and counters (see secops.instrumentation)"""
+        self.metrics = metrics or AnalyzerMetrics()
+        self._clock = time.perf_counter_ns
+        return self.metrics
+
+    def disable_instrumentation(self):
+        self.metrics = None
+        self._clock = disabled_clock
 
     def preprocess_alert(self, alert):
-        """Optimized alert preprocessing"""
-        message = alert['raw_message']
-        # Apply compiled regex patterns
-        message = self.ip_pattern.sub('IP_ADDR', message)
-        message = self.timestamp_pattern.sub('TIMESTAMP', message)
-        message = self.pid_pattern.sub('PID: XXX', message)
-        return message.lower()
+        """Canonical (masked, lowercased) message of an alert"""
+        return self.normalizer.normalize(alert['raw_message'])[0]
+
+    def _normalize_alert(self, alert):
+        """(canonical message, tokens) of an alert, computed once per raw message"""
+        return self.normalizer.normalize(alert['raw_message'])
 
     def vectorize_alerts(self, alerts, alert_type):
         """Optimized vectorization with batch processing"""
         if not alerts:
             return None
         
-        processed_alerts = [self.preprocess_alert(alert) for alert in alerts]
+        normalized = [self._normalize_alert(alert) for alert in alerts]
         
         # Only fit the vectorizer once when we first see any alert type
         if not hasattr(self, 'is_fitted'):
+            processed_alerts = [text for text, _ in normalized]
             try:
                 self.vectorizer.fit(processed_alerts)
                 self.is_fitted = True
@@ -72,17 +162,55 @@ class SyslogAlertAnalyzer:
                 self.is_fitted = True
         
         # Always use transform instead of fit_transform after initial fit
-        return self.vectorizer.transform(processed_alerts)
+        return self._vectorize_tokens([tokens for _, tokens in normalized])
+
+    def _vectorize_tokens(self, token_lists, update=True):
+        """Vectorize pre-tokenized messages; streaming mode also updates IDF stats"""
+        if self.streaming:
+            return self.vectorizer.transform_tokens(token_lists, update=update)
+        return self._tfidf_transform_tokens(token_lists)
+
+    def _tfidf_transform_tokens(self, token_lists):
+        """Equivalent of the fitted TfidfVectorizer.transform on token lists.
+
+        Skips sklearn's per-call re-tokenization and validation overhead,
+        which dominates when vectorizing one alert at a time.
+        """
+        vocabulary = self.vectorizer.vocabulary_
+        idf = self.vectorizer.idf_
+        data, indices, indptr = [], [], [0]
+        for tokens in token_lists:
+            counts = {}
+            for feature in word_ngrams(tokens, self.vectorizer.ngram_range):
+                index = vocabulary.get(feature)
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+
+            row_indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+            if len(row_indices):
+                tf = np.fromiter((counts[i] for i in row_indices.tolist()),
+                                 dtype=np.float64, count=len(row_indices))
+                weights = tf * idf[row_indices]
+                data.append(weights / np.sqrt(np.dot(weights, weights)))
+                indices.append(row_indices)
+            indptr.append(indptr[-1] + len(row_indices))
+
+        return csr_matrix(
+            (np.concatenate(data) if data else np.empty(0),
+             np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(idf))
+        )
 
-    def calculate_similarity_score(self, new_alert, alert_type):
-        """Optimized similarity calculation"""
-        if alert_type not in self.alert_vectors or self.alert_vectors[alert_type] is None:
+    def calculate_similarity_score(self, new_alert, alert_type, new_vector=None):
+        """Max similarity of an alert against the stored vectors of its type"""
+        if alert_type not in self.alert_vectors:
             return 0.0
-            
-        new_vector = self.vectorizer.transform([self.preprocess_alert(new_alert)])
-        # Use numpy's optimized operations
-        similarities = cosine_similarity(new_vector, self.alert_vectors[alert_type])
-        return float(np.max(similarities))  # Convert to float for better serialization
+
+        if new_vector is None:
+            _, tokens = self._normalize_alert(new_alert)
+            new_vector = self._vectorize_tokens([tokens], update=False)
+        return self.similarity_indexes[alert_type].max_similarity(new_vector)
 
     def calculate_uniqueness_score(self, similarity_score, frequency):
         """Calculate uniqueness score based on similarity and frequency"""
@@ -90,51 +218,442 @@ class SyslogAlertAnalyzer:
         frequency_factor = 1 / (1 + np.log1p(frequency))
         return (similarity_factor + frequency_factor) / 2
 
+    def get_retention(self, alert_type):
+        """Retention policy in effect for an alert type"""
+        return self.type_retention.get(alert_type, self.retention)
+
+    def _observe_time(self, alert, alert_type, policy):
+        """Advance the type's reference clock and return it (None if unused)"""
+        if not policy.uses_time:
+            return None
+        latest = self._latest_time.get(alert_type)
+        timestamp = alert_time(alert)
+        if timestamp is not None and (latest is None or timestamp > latest):
+            latest = self._latest_time[alert_type] = timestamp
+        return latest
+
+    def _pattern_frequency(self, alert_type, preprocessed_alert, policy, now):
+        """Current (possibly decayed) frequency of a pattern within its type"""
+        count = self.alert_counts[alert_type].get(preprocessed_alert, 0)
+        if count and policy.decay_half_life is not None and now is not None:
+            stamp = self._count_stamps[alert_type].get(preprocessed_alert, now)
+            count *= policy.decay_factor(now - stamp)
+        return count
+
     def analyze_alert(self, alert):
         """Optimized alert analysis"""
+        result = self._score_alert(alert, self.scoring)
+        if self.correlation is not None:
+            self._apply_bursts([alert], result)
+        self.aggregates.observe(result['alert_type'], result['severity'], result['score'])
+        return result
+
+    def _apply_bursts(self, alerts, results):
+        """Feed alerts to the burst detector and boost their scores (one result or columns)"""
+        bursts = self.correlation.observe(alerts)
+        dimensions = self.correlation.dimensions
+        if not isinstance(results['score'], np.ndarray):
+            burst = float(bursts['burst'][0])
+            results['score'] = float(self.correlation.boost(results['score'], burst))
+            results['burst'] = burst
+            results['burst_dimension'] = (dimensions[bursts['dimension'][0]]
+                                          if bursts['dimension'][0] >= 0 else None)
+            return
+        results['score'] = self.correlation.boost(results['score'], bursts['burst'])
+        results['burst'] = bursts['burst']
+        results['burst_dimension'] = np.array(
+            [dimensions[j] if j >= 0 else None for j in bursts['dimension'].tolist()],
+            dtype=object)
+
+    def _score_alert(self, alert, scoring):
+        """Score one alert against (and add it to) the per-type state"""
+        clock = self._clock
+        t_start = clock()
         alert_type = alert['type']
-        preprocessed_alert = self.preprocess_alert(alert)
+        preprocessed_alert, tokens = self._normalize_alert(alert)
+        policy = self.get_retention(alert_type)
+        now = self._observe_time(alert, alert_type, policy)
+        t_normalized = clock()
         
         # Fast path for first alert of type
         if not self.alert_history[alert_type]:
-            result = self._handle_first_alert(alert, alert_type, preprocessed_alert)
+            result = self._handle_first_alert(alert, alert_type, preprocessed_alert, scoring, now)
+            if self.metrics is not None:
+                t_end = clock()
+                self.metrics.observe_alert(
+                    alert_type,
+                    (t_start, t_normalized, t_normalized, t_normalized, t_normalized, t_end, t_end),
+                    first=True
+                )
             return result
         
+        cached = self._lookup_template(alert_type, preprocessed_alert)
+        if cached is not None:
+            # A byte-identical pattern is still in the window, so it is its own
+            # nearest neighbour: skip both TF-IDF and the similarity scan
+            new_vector, similarity_score = cached
+            if self.streaming:
+                # Still a document for the online IDF statistics. The hit reuses
+                # the weights of the pattern's first sighting, as its stored rows do
+                self.vectorizer.observe(new_vector)
+            t_vectorized = t_compared = clock()
+        else:
+            # Vectorize the new alert once and reuse it for scoring and storage
+            new_vector = self._vectorize_tokens([tokens])
+            t_vectorized = clock()
+            similarity_score = self.calculate_similarity_score(alert, alert_type, new_vector)
+            t_compared = clock()
+
         # Calculate scores
-        similarity_score = self.calculate_similarity_score(alert, alert_type)
-        uniqueness_score = self._calculate_uniqueness(similarity_score, 
-                                                    self.alert_counts[alert_type][preprocessed_alert])
+        frequency = self._pattern_frequency(alert_type, preprocessed_alert, policy, now)
+        uniqueness_score = self._calculate_uniqueness(similarity_score, frequency)
+        t_scored = clock()
         
         # Update state
-        self._update_alert_state(alert, alert_type, preprocessed_alert)
+        self._update_alert_state(alert, alert_type, preprocessed_alert, new_vector, now)
+        t_updated = clock()
         
         # Calculate final score
-        return self._calculate_final_scores(alert, alert_type, similarity_score, 
-                                         uniqueness_score)
+        result = self._calculate_final_scores(alert, alert_type, preprocessed_alert,
+                                              similarity_score, uniqueness_score, scoring, now)
+        if self.metrics is not None:
+            self.metrics.observe_alert(
+                alert_type,
+                (t_start, t_normalized, t_vectorized, t_compared, t_scored, t_updated, clock()),
+                template_hit=cached is not None
+            )
+        return result
+
+    # Columns of the frame returned by analyze_alerts, in analyze_alert's key order
+    RESULT_COLUMNS = ('score', 'frequency', 'type_frequency', 'similarity', 'uniqueness',
+                      'type_score', 'severity_score', 'alert_type', 'severity')
+
+    # Upper bound on similarity matrix entries materialized per chunk
+    BATCH_SIMILARITY_BUDGET = 1 << 22
+
+    def analyze_alerts(self, alerts):
+        """Analyze a batch of alerts in arrival order, returning a DataFrame.
+
+        Values are identical to calling `analyze_alert` on each alert in turn
+        (`similarity` is NaN for the first alert of a type; the clustering
+        backend adds `cluster`, and with a burst detector attached, `burst`
+        and `burst_dimension` are appended). Types with an
+        unbounded, non-decaying retention policy and the exact backend are
+        scored with a few sparse products per type; other types (and the
+        streaming vectorizer, whose IDF moves with every alert) fall back to
+        the per-alert path.
+        """
+        n = len(alerts)
+        columns = {
+            'score': np.empty(n),
+            'frequency': np.empty(n),
+            'type_frequency': np.empty(n, dtype=np.int64),
+            'similarity': np.full(n, np.nan),
+            'uniqueness': np.empty(n),
+            'type_score': np.empty(n),
+            'severity_score': np.empty(n),
+            'alert_type': np.empty(n, dtype=object),
+            'severity': np.empty(n, dtype=object)
+        }
+        if self.clustering:
+            columns['cluster'] = np.empty(n, dtype=np.int64)
+        if n == 0:
+            import pandas as pd
+            return pd.DataFrame(columns)
+
+        t_start = self._clock()
+        # One config for the whole batch, even if it is reloaded meanwhile
+        scoring = self.scoring
+        if self.streaming:
+            for i, alert in enumerate(alerts):
+                self._fill_result_row(columns, i, self._score_alert(alert, scoring))
+            if self.correlation is not None:
+                self._apply_bursts(alerts, columns)
+            self.aggregates.observe_batch(columns['alert_type'], columns['severity'],
+                                          columns['score'])
+            if self.metrics is not None:
+                self.metrics.observe_batch(0, self._clock() - t_start)
+            return self._result_frame(columns)
+
+        start = 0
+        if not hasattr(self, 'is_fitted'):
+            # The vectorizer is fitted on the very first alert, as in the sequential path
+            self._fill_result_row(columns, 0, self._score_alert(alerts[0], scoring))
+            start = 1
+
+        normalized = [self._normalize_alert(alert) for alert in alerts]
+        keys = [text for text, _ in normalized]
+        groups = defaultdict(list)
+        for i in range(start, n):
+            groups[alerts[i]['type']].append(i)
+
+        # Only distinct messages go through TF-IDF
+        key_ids = {}
+        unique_tokens = []
+        uids = np.empty(n - start, dtype=np.int64)
+        for j, (text, tokens) in enumerate(normalized[start:]):
+            uid = key_ids.get(text)
+            if uid is None:
+                uid = key_ids[text] = len(unique_tokens)
+                unique_tokens.append(tokens)
+            uids[j] = uid
+        unique_vectors = self._vectorize_tokens(unique_tokens) if unique_tokens else None
+
+        uid_of = np.empty(n, dtype=np.int64)
+        uid_of[start:] = uids
+        n_vectorized = 0
+        for alert_type, positions in groups.items():
+            policy = self.get_retention(alert_type)
+            if (policy.is_bounded or policy.decay_half_life is not None
+                    or not isinstance(self.similarity_backend, ExactSimilarity)):
+                for i in positions:
+                    self._fill_result_row(columns, i, self._score_alert(alerts[i], scoring))
+                continue
+            self._analyze_type_batch(alert_type, alerts, keys, np.asarray(positions),
+                                     uid_of, unique_vectors, columns, scoring)
+            n_vectorized += len(positions)
+
+        if self.correlation is not None:
+            self._apply_bursts(alerts, columns)
+        self.aggregates.observe_batch(columns['alert_type'], columns['severity'], columns['score'])
+        if self.metrics is not None:
+            # Alerts that fell back to analyze_alert were recorded there
+            self.metrics.observe_batch(n_vectorized, self._clock() - t_start)
+        return self._result_frame(columns)
+
+    @staticmethod
+    def _result_frame(columns):
+        # Frequencies are whole counts unless a decaying policy is in play
+        if np.all(np.mod(columns['frequency'], 1) == 0):
+            columns['frequency'] = columns['frequency'].astype(np.int64)
+        import pandas as pd
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def _fill_result_row(columns, i, result):
+        for name, values in columns.items():
+            values[i] = result.get(name, np.nan)
+
+    def _analyze_type_batch(self, alert_type, alerts, keys, positions, uid_of,
+                            unique_vectors, columns, scoring):
+        """Vectorized scoring of one type's alerts within a batch"""
+        m = len(positions)
+        uids = uid_of[positions]
+        batch = unique_vectors[uids]
+        counts = self.alert_counts[alert_type]
+        templates = self._template_cache[alert_type]
+        first_of_type = not self.alert_history[alert_type]
+
+        # Max similarity against stored history and against earlier alerts in
+        # the batch. Products are oriented (rows @ batch.T) exactly like the
+        # per-alert path so every dot product is summed in the same order.
+        similarity = np.zeros(m)
+        n_history = len(self.alert_vectors[alert_type]) if not first_of_type else 0
+        chunk = max(1, self.BATCH_SIMILARITY_BUDGET // max(m, n_history))
+        for lo in range(0, m, chunk):
+            hi = min(lo + chunk, m)
+            targets = batch[lo:hi].T
+            if n_history:
+                history = self.alert_vectors[alert_type].matrix() @ targets
+                similarity[lo:hi] = history.max(axis=0).toarray().ravel()
+            if hi > 1:
+                earlier = (batch[:hi] @ targets).toarray()
+                # Only alerts that arrived before each target count
+                earlier[np.arange(hi)[:, None] >= np.arange(lo, hi)[None, :]] = 0.0
+                np.maximum(similarity[lo:hi], earlier.max(axis=0), out=similarity[lo:hi])
 
-    def _handle_first_alert(self, alert, alert_type, preprocessed_alert):
+        # Occurrences of each pattern before each alert (history + earlier in batch)
+        order = np.argsort(uids, kind='stable')
+        sorted_uids = uids[order]
+        run_starts = np.flatnonzero(np.r_[True, sorted_uids[1:] != sorted_uids[:-1]])
+        run_lengths = np.diff(np.r_[run_starts, m])
+        rank = np.empty(m, dtype=np.int64)
+        rank[order] = np.arange(m) - np.repeat(run_starts, run_lengths)
+
+        run_uids = sorted_uids[run_starts]
+        run_keys = [keys[positions[order[s]]] for s in run_starts]
+        base = np.array([counts.get(key, 0) for key in run_keys], dtype=np.int64)
+        prior = np.empty(m, dtype=np.int64)
+        prior[order] = np.repeat(base, run_lengths)
+        prior += rank
+
+        # Repeats reuse the cached self-similarity, as in the per-alert fast path
+        if self.template_cache_enabled:
+            is_repeat = np.empty(m, dtype=bool)
+            is_repeat[order] = np.repeat([key in templates for key in run_keys], run_lengths)
+            is_repeat |= rank > 0
+            # Summed per pattern exactly as the template cache does (one row at a time)
+            run_vectors = unique_vectors[run_uids]
+            squared = run_vectors.multiply(run_vectors).tocsr()
+            bounds = squared.indptr.tolist()
+            run_self = np.array([squared.data[lo:hi].sum() for lo, hi in zip(bounds[:-1], bounds[1:])])
+            self_similarity = np.empty(m)
+            self_similarity[order] = np.repeat(run_self, run_lengths)
+            similarity = np.where(is_repeat, self_similarity, similarity)
+            # The first alert of a type is never looked up (and never a repeat)
+            self.template_cache_lookups += m - 1 if first_of_type else m
+            self.template_cache_hits += int(np.count_nonzero(is_repeat))
+
+        similarity_factor = np.where(similarity < self.similarity_threshold, 1 - similarity, 0)
+        frequency_factor = 1 / (1 + np.log1p(prior))
+        uniqueness = (similarity_factor + frequency_factor) / 2
+
+        # Label scores are gathered from the compiled tables by interned ID
+        severity_ids = np.fromiter((self.vocabulary.severity_id(alerts[i]) for i in positions),
+                                   dtype=np.int64, count=m)
+        type_ids = np.full(m, self.vocabulary.types.intern(alert_type))
+        type_score, severity_score = scoring.label_scores(type_ids, severity_ids)
+        severity = np.array([alerts[i]['severity'] for i in positions], dtype=object)
+        score = scoring.scores(type_score, severity_score, uniqueness)
+
+        columns['score'][positions] = score
+        columns['frequency'][positions] = prior + 1
+        columns['type_frequency'][positions] = self.type_counts[alert_type] + np.arange(1, m + 1)
+        columns['similarity'][positions] = similarity
+        columns['uniqueness'][positions] = uniqueness
+        columns['type_score'][positions] = type_score
+        columns['severity_score'][positions] = severity_score
+        columns['alert_type'][positions] = alert_type
+        columns['severity'][positions] = severity
+        if first_of_type:
+            i = positions[0]
+            columns['score'][i] = type_score[0]
+            columns['similarity'][i] = np.nan
+            columns['uniqueness'][i] = 1.0
+
+        # Commit the whole group to the per-type state
+        self.alert_history[alert_type].extend([keys[i] for i in positions])
+        self.type_counts[alert_type] += m
+        for key, run_length in zip(run_keys, run_lengths.tolist()):
+            counts[key] += run_length
+
+        if alert_type not in self.alert_vectors:
+            store = SparseVectorStore(batch.shape[1])
+            self.alert_vectors[alert_type] = store
+            self.similarity_indexes[alert_type] = self.similarity_backend.create_index(store)
+        self.alert_vectors[alert_type].append(batch)
+        self.similarity_indexes[alert_type].add(batch)
+
+        if self.template_cache_enabled:
+            for uid, key in zip(run_uids.tolist(), run_keys):
+                if key not in templates:
+                    vector = unique_vectors[uid]
+                    templates[key] = (vector, float(vector.multiply(vector).sum()))
+
+    def _create_index(self, store):
+        """Similarity index for a new type's store"""
+        index = self.similarity_backend.create_index(store)
+        if self.clustering and index.threshold is None:
+            index.threshold = self.similarity_threshold
+        return index
+
+    def _lookup_template(self, alert_type, preprocessed_alert):
+        """Return the cached (vector, similarity) for a repeated pattern, if any"""
+        if not self.template_cache_enabled:
+            return None
+        self.template_cache_lookups += 1
+        cached = self._template_cache[alert_type].get(preprocessed_alert)
+        if cached is not None:
+            self.template_cache_hits += 1
+        return cached
+
+    def _handle_first_alert(self, alert, alert_type, preprocessed_alert, scoring, now=None):
         """Handle first alert of a type efficiently"""
-        self._update_alert_state(alert, alert_type, preprocessed_alert)
+        self._update_alert_state(alert, alert_type, preprocessed_alert, now=now)
+        type_score = scoring.config.type_weight(alert_type)
         return {
-            'score': self.type_weights[alert_type],
+            'score': type_score,
             'frequency': 1,
             'type_frequency': 1,
             'uniqueness': 1.0,
-            'type_score': self.type_weights[alert_type],
-            'severity_score': self.severity_weights[alert['severity']],
+            'type_score': type_score,
+            'severity_score': scoring.config.severity_weight(alert['severity']),
             'alert_type': alert_type,
-            'severity': alert['severity']
+            'severity': alert['severity'],
+            **self._cluster_of_last(alert_type, preprocessed_alert)
         }
 
-    def _update_alert_state(self, alert, alert_type, preprocessed_alert):
+    def _update_alert_state(self, alert, alert_type, preprocessed_alert, new_vector=None,
+                            now=None):
         """Update internal state with new alert data"""
-        self.alert_history[alert_type].append(alert)
-        self.alert_counts[alert_type][preprocessed_alert] += 1
+        policy = self.get_retention(alert_type)
+        self.alert_history[alert_type].append(preprocessed_alert, now)
         self.type_counts[alert_type] += 1
-        self.alert_vectors[alert_type] = self.vectorize_alerts(
-            self.alert_history[alert_type], 
-            alert_type
-        )
+
+        if policy.decay_half_life is not None and now is not None:
+            counts = self.alert_counts[alert_type]
+            counts[preprocessed_alert] = (
+                self._pattern_frequency(alert_type, preprocessed_alert, policy, now) + 1
+            )
+            self._count_stamps[alert_type][preprocessed_alert] = now
+            self._pattern_rows[alert_type][preprocessed_alert] += 1
+        else:
+            self.alert_counts[alert_type][preprocessed_alert] += 1
+
+        # Only the new alert is vectorized; its row is appended to the type's store
+        if new_vector is None:
+            new_vector = self.vectorize_alerts([alert], alert_type)
+        if alert_type not in self.alert_vectors:
+            store = SparseVectorStore(new_vector.shape[1])
+            self.alert_vectors[alert_type] = store
+            self.similarity_indexes[alert_type] = self._create_index(store)
+        self.alert_vectors[alert_type].append(new_vector)
+        self.similarity_indexes[alert_type].add(new_vector)
+
+        templates = self._template_cache[alert_type]
+        if self.template_cache_enabled and preprocessed_alert not in templates:
+            templates[preprocessed_alert] = (new_vector, float(new_vector.multiply(new_vector).sum()))
+
+        if policy.is_bounded:
+            self._enforce_retention(alert_type, policy, now)
+
+    def _enforce_retention(self, alert_type, policy, now):
+        """Evict the oldest alerts of a type until its policy is satisfied"""
+        history = self.alert_history[alert_type]
+
+        n_evict = 0
+        if policy.max_rows is not None:
+            n_evict = max(0, len(history) - policy.max_rows)
+        horizon = policy.horizon
+        if horizon is not None and now is not None:
+            cutoff = now - horizon
+            # Alerts arrive roughly in time order, so age eviction only
+            # inspects the head of the window
+            while n_evict < len(history):
+                stamp = history.time_at(n_evict)
+                if stamp is None or stamp >= cutoff:
+                    break
+                n_evict += 1
+
+        if n_evict:
+            for pattern in history.popleft(n_evict):
+                self._release_pattern(alert_type, pattern, policy)
+
+        if n_evict:
+            # The index goes first: the clustering index still reads the evicted rows
+            self.similarity_indexes[alert_type].evict(n_evict)
+            self.alert_vectors[alert_type].evict(n_evict)
+            self.evicted_counts[alert_type] += n_evict
+
+    def _release_pattern(self, alert_type, pattern, policy):
+        """Drop one evicted row's contribution to its pattern count"""
+        counts = self.alert_counts[alert_type]
+        if policy.decay_half_life is not None:
+            rows = self._pattern_rows[alert_type]
+            rows[pattern] -= 1
+            if rows[pattern] > 0:
+                return
+            # Pattern left the window entirely: forget its decayed weight
+            del rows[pattern]
+            self._count_stamps[alert_type].pop(pattern, None)
+            counts.pop(pattern, None)
+            self._template_cache[alert_type].pop(pattern, None)
+            return
+
+        counts[pattern] -= 1
+        if counts[pattern] <= 0:
+            del counts[pattern]
+            self._template_cache[alert_type].pop(pattern, None)
 
     def _calculate_uniqueness(self, similarity_score, frequency):
         """Calculate uniqueness score efficiently"""
@@ -142,45 +661,241 @@ class SyslogAlertAnalyzer:
         frequency_factor = 1 / (1 + np.log1p(frequency))
         return (similarity_factor + frequency_factor) / 2
 
-    def _calculate_final_scores(self, alert, alert_type, similarity_score, uniqueness_score):
+    def _calculate_final_scores(self, alert, alert_type, preprocessed_alert, similarity_score,
+                                uniqueness_score, scoring, now=None):
         """Calculate all final scores for an alert"""
-        type_score = self.type_weights[alert_type]
-        severity_score = self.severity_weights[alert['severity']]
-        
-        final_score = (
-            type_score * 0.3 +
-            severity_score * 0.3 +
-            uniqueness_score * 0.4
-        )
+        # Same weights and shares as the batch path's lookup tables
+        type_score = scoring.config.type_weight(alert_type)
+        severity_score = scoring.config.severity_weight(alert['severity'])
+        final_score = scoring.scores(type_score, severity_score, uniqueness_score)
         
         return {
             'score': final_score,
-            'frequency': self.alert_counts[alert_type][self.preprocess_alert(alert)],
+            'frequency': self._pattern_frequency(alert_type, preprocessed_alert,
+                                                 self.get_retention(alert_type), now),
             'type_frequency': self.type_counts[alert_type],
             'similarity': similarity_score,
             'uniqueness': uniqueness_score,
             'type_score': type_score,
             'severity_score': severity_score,
             'alert_type': alert_type,
-            'severity': alert['severity']
+            'severity': alert['severity'],
+            **self._cluster_of_last(alert_type, preprocessed_alert)
+        }
+
+    def _cluster_of_last(self, alert_type, preprocessed_alert):
+        """{'cluster': ID} of the alert just added (empty unless clustering)"""
+        if not self.clustering:
+            return {}
+        index = self.similarity_indexes[alert_type]
+        index.label(index.last_cluster, preprocessed_alert)
+        return {'cluster': index.last_cluster}
+
+    def checkpoint(self, path):
+        """Write a restorable snapshot of the analyzer to a directory (see secops.snapshot)"""
+        from secops.snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    @classmethod
+    def restore(cls, path, mmap=True, **overrides):
+        """Rebuild an analyzer from a snapshot directory written by `checkpoint`"""
+        from secops.snapshot import load_snapshot
+        return load_snapshot(path, mmap=mmap, **overrides)
+
+    def _export_state(self, copy=False):
+        """(picklable state, {type: live CSR matrix}, {type: history columns}) sufficient
+        to rebuild the analyzer.
+
+        With `copy=True` nothing returned is shared with the analyzer, so it
+        can be pickled and written out on another thread while the analyzer
+        keeps running.
+        """
+        # Every live row of a cached pattern holds the cached vector, so the
+        # cache is stored as the first live row of each pattern
+        template_rows = {}
+        for alert_type, history in self.alert_history.items():
+            templates = self._template_cache.get(alert_type)
+            if not templates:
+                continue
+            rows = template_rows[alert_type] = {}
+            for position, pattern in enumerate(history.keys()):
+                if pattern in templates and pattern not in rows:
+                    rows[pattern] = position
+
+        histories, history_keys = {}, {}
+        for alert_type, history in self.alert_history.items():
+            histories[alert_type], history_keys[alert_type] = history.export_state(copy=copy)
+
+        state = {
+            'config': {
+                'retention': self.retention,
+                'type_retention': self.type_retention,
+                'similarity_backend': self.similarity_backend,
+                'template_cache': self.template_cache_enabled,
+                'vectorizer_mode': self.vectorizer_mode,
+                'n_hash_features': getattr(self.vectorizer, 'n_features', 2 ** 20),
+                'normalizer_cache_size': self.normalizer.cache_info().maxsize,
+                'correlation': deepcopy(self.correlation) if copy else self.correlation,
+                'scoring': self.scoring.config
+            },
+            'vectorizer': self._vectorizer_copy() if copy else self.vectorizer,
+            'is_fitted': hasattr(self, 'is_fitted'),
+            'vocabulary': self.vocabulary.copy() if copy else self.vocabulary,
+            'history_keys': history_keys,
+            'alert_counts': {t: dict(c) for t, c in self.alert_counts.items()},
+            'type_counts': dict(self.type_counts),
+            'evicted_counts': dict(self.evicted_counts),
+            'pattern_rows': {t: dict(r) for t, r in self._pattern_rows.items()},
+            'count_stamps': {t: dict(s) for t, s in self._count_stamps.items()},
+            'latest_time': dict(self._latest_time),
+            'aggregates': deepcopy(self.aggregates) if copy else self.aggregates,
+            'template_rows': template_rows,
+            'index_states': {t: index.export_state() for t, index in self.similarity_indexes.items()},
+            'template_cache_hits': self.template_cache_hits,
+            'template_cache_lookups': self.template_cache_lookups,
+            'similarity_threshold': self.similarity_threshold
         }
+        matrices = {}
+        for alert_type, store in self.alert_vectors.items():
+            matrix = store.matrix()
+            # The store compacts in place, so a capture outliving this call needs a copy
+            matrices[alert_type] = matrix.copy() if copy else matrix
+        return state, matrices, histories
+
+    def _vectorizer_copy(self):
+        # Online IDF counters change with every alert; a fitted TfidfVectorizer
+        # is never modified afterwards (fitting rebinds its attributes)
+        if self.streaming:
+            return deepcopy(self.vectorizer)
+        return shallow_copy(self.vectorizer)
+
+    # Rows projected per call when rebuilding a similarity index
+    RESTORE_INDEX_CHUNK = 65536
+
+    @classmethod
+    def _from_state(cls, state, stores, histories, **overrides):
+        """Inverse of `_export_state`; `stores` maps type -> SparseVectorStore and
+        `histories` type -> history columns"""
+        config = dict(state['config'])
+        if overrides.get('vectorizer_mode', config['vectorizer_mode']) != config['vectorizer_mode']:
+            raise ValueError("A snapshot cannot be restored with a different vectorizer mode")
+        config.update(overrides)
+        analyzer = cls(**config)
+
+        analyzer.vectorizer = state['vectorizer']
+        if state['is_fitted']:
+            analyzer.is_fitted = True
+        analyzer.vocabulary = state['vocabulary']
+        # Recompile the scoring tables over the restored vocabulary
+        analyzer.set_scoring(analyzer.scoring.config)
+        for alert_type, columns in histories.items():
+            analyzer.alert_history[alert_type] = AlertHistory.from_state(
+                columns, state['history_keys'][alert_type])
+        for alert_type, counts in state['alert_counts'].items():
+            analyzer.alert_counts[alert_type].update(counts)
+        for alert_type, rows in state['pattern_rows'].items():
+            analyzer._pattern_rows[alert_type].update(rows)
+        for alert_type, stamps in state['count_stamps'].items():
+            analyzer._count_stamps[alert_type].update(stamps)
+        analyzer.type_counts.update(state['type_counts'])
+        analyzer.evicted_counts.update(state['evicted_counts'])
+        analyzer._latest_time.update(state['latest_time'])
+        analyzer.aggregates = state['aggregates']
+        analyzer.template_cache_hits = state['template_cache_hits']
+        analyzer.template_cache_lookups = state['template_cache_lookups']
+        analyzer.similarity_threshold = state['similarity_threshold']
+
+        for alert_type, store in stores.items():
+            analyzer.alert_vectors[alert_type] = store
+            index = analyzer._create_index(store)
+            analyzer.similarity_indexes[alert_type] = index
+            matrix = store.matrix()
+            if not index.restore_state(state['index_states'].get(alert_type)):
+                for lo in range(0, matrix.shape[0], cls.RESTORE_INDEX_CHUNK):
+                    index.add(matrix[lo:lo + cls.RESTORE_INDEX_CHUNK])
+
+            if analyzer.template_cache_enabled:
+                templates = analyzer._template_cache[alert_type]
+                for pattern, position in state['template_rows'].get(alert_type, {}).items():
+                    vector = matrix[position]
+                    templates[pattern] = (vector, float(vector.multiply(vector).sum()))
+        return analyzer
+
+    def _type_memory_bytes(self, alert_type):
+        """Approximate memory held for one type (containers and vector buffers)"""
+        history = self.alert_history.get(alert_type)
+        total = (
+            (history.nbytes if history is not None else 0) +
+            sys.getsizeof(self.alert_counts.get(alert_type, {}))
+        )
+        store = self.alert_vectors.get(alert_type)
+        if store is not None:
+            total += store.nbytes
+            total += self.similarity_indexes[alert_type].nbytes
+        return total
 
     def get_statistics(self):
-        """Get enhanced statistics with optimized calculations"""
-        total_alerts = sum(self.type_counts.values())
-        
-        type_distribution = [
-            {
+        """Get enhanced statistics with optimized calculations.
+
+        Every figure is a maintained counter or container size, so the cost
+        is O(types) and independent of the number of alerts. Safe to call
+        from another thread while alerts are being analyzed: nothing here
+        writes analyzer state (types appear once their first alert is scored,
+        and figures may be up to one in-flight batch apart).
+        """
+        type_distribution = []
+        template_entries = 0
+        for alert_type, aggregate in self.aggregates.types():
+            history = self.alert_history.get(alert_type)
+            live = len(history) if history is not None else 0
+            unique = len(self.alert_counts.get(alert_type, ()))
+            template_entries += len(self._template_cache.get(alert_type, ()))
+            type_distribution.append({
                 'alert_type': alert_type,
-                'total_alerts': count,
-                'unique_patterns': len(self.alert_counts[alert_type]),
-                'repetition_ratio': count / len(self.alert_counts[alert_type])
-            }
-            for alert_type, count in self.type_counts.items()
-        ]
-        
-        return {
-            'total_alerts': total_alerts,
-            'alerts_by_type': dict(self.type_counts),
-            'type_distribution': type_distribution
-        }
\ No newline at end of file
+                'total_alerts': self.type_counts.get(alert_type, 0),
+                'live_alerts': live,
+                'evicted_alerts': self.evicted_counts.get(alert_type, 0),
+                'unique_patterns': unique,
+                'repetition_ratio': live / unique if unique else 0.0,
+                'memory_bytes': self._type_memory_bytes(alert_type),
+                **aggregate.snapshot()
+            })
+            if self.clustering:
+                index = self.similarity_indexes.get(alert_type)
+                type_distribution[-1]['clusters'] = index.n_live if index is not None else 0
+
+        lookups = self.template_cache_lookups
+        stats = {
+            'total_alerts': sum(t['total_alerts'] for t in type_distribution),
+            'vectorizer_mode': self.vectorizer_mode,
+            'template_cache': {
+                'hits': self.template_cache_hits,
+                'lookups': lookups,
+                'hit_rate': self.template_cache_hits / lookups if lookups else 0.0,
+                'entries': template_entries
+            },
+            'live_alerts': sum(t['live_alerts'] for t in type_distribution),
+            'evicted_alerts': sum(t['evicted_alerts'] for t in type_distribution),
+            'memory_bytes': (sum(t['memory_bytes'] for t in type_distribution) +
+                             getattr(self.vectorizer, 'nbytes', 0) +
+                             getattr(self.correlation, 'nbytes', 0)),
+            'alerts_by_type': {t['alert_type']: t['total_alerts'] for t in type_distribution},
+            'type_distribution': type_distribution,
+            **self.aggregates.summary()
+        }
+        if self.clustering:
+            stats['clusters'] = self.incident_clusters()
+        if self.correlation is not None:
+            stats['correlation'] = {**self.correlation.stats(),
+                                    'heavy_hitters': self.correlation.heavy_hitters()}
+        return stats
+
+    def incident_clusters(self, n=10):
+        """Largest live incident clusters over all types (clustering backend only)"""
+        clusters = []
+        for alert_type, _ in self.aggregates.types():
+            index = self.similarity_indexes.get(alert_type)
+            if index is not None:
+                clusters.extend({'alert_type': alert_type, **cluster} for cluster in index.clusters(n))
+        clusters.sort(key=lambda cluster: -cluster['members'])
+        return clusters[:n]
\ No newline at end of file
@@ -0,0 +1,149 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class SparseVectorStore:
+    """Sliding-window CSR row store with amortized capacity doubling.
+
+    Rows are appended at the tail and evicted from the head. Evicted space
+    is reclaimed by compacting the live window to the front of the buffers
+    before growing them, so both operations are amortized O(1) and a store
+    with a bounded number of live rows keeps a bounded footprint.
+    """
+
+    def __init__(self, n_features, row_capacity=64, nnz_capacity=1024, dtype=np.float64):
+        self.n_features = n_features
+        self.dtype = np.dtype(dtype)
+
+        # Raw CSR buffers; rows [_start, _stop) are live
+        self._data = np.empty(nnz_capacity, dtype=self.dtype)
+        self._indices = np.empty(nnz_capacity, dtype=np.int32)
+        self._indptr = np.zeros(row_capacity + 1, dtype=np.int64)
+        self._start = 0
+        self._stop = 0
+
+        # Cached matrix view, invalidated on every append/evict
+        self._matrix = None
+
+    @classmethod
+    def from_arrays(cls, n_features, data, indices, indptr):
+        """Adopt existing CSR buffers (e.g. memory-mapped .npy files) without copying.
+
+        `indptr` must start at 0. The buffers are only written in place by
+        compaction; the first append that needs room moves the rows into
+        fresh in-memory buffers, as any growth does.
+        """
+        store = cls(n_features, row_capacity=0, nnz_capacity=0, dtype=data.dtype)
+        store._data, store._indices, store._indptr = data, indices, indptr
+        store._stop = len(indptr) - 1
+        return store
+
+    def __len__(self):
+        return self._stop - self._start
+
+    @property
+    def nnz(self):
+        return int(self._indptr[self._stop] - self._indptr[self._start])
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes + self._indices.nbytes + self._indptr.nbytes
+
+    def _compact(self):
+        """Move the live window to the front of the buffers"""
+        if self._start == 0:
+            return
+        lo, hi = self._indptr[self._start], self._indptr[self._stop]
+        n_live = self._stop - self._start
+        self._data[:hi - lo] = self._data[lo:hi]
+        self._indices[:hi - lo] = self._indices[lo:hi]
+        self._indptr[:n_live + 1] = self._indptr[self._start:self._stop + 1] - lo
+        self._start, self._stop = 0, n_live
+
+    def _reserve(self, extra_rows, extra_nnz):
+        """Make room for new rows, reclaiming evicted space before growing"""
+        end_nnz = int(self._indptr[self._stop])
+        full = (self._stop + extra_rows + 1 > len(self._indptr)
+                or end_nnz + extra_nnz > len(self._data))
+        # Only compact once the dead prefix is at least as large as the live
+        # window, so each O(live) move frees O(live) slots
+        if full and self._start >= len(self):
+            self._compact()
+            end_nnz = int(self._indptr[self._stop])
+
+        needed_rows = self._stop + extra_rows
+        if needed_rows + 1 > len(self._indptr):
+            capacity = max(needed_rows + 1, 2 * len(self._indptr))
+            indptr = np.empty(capacity, dtype=self._indptr.dtype)
+            indptr[:self._stop + 1] = self._indptr[:self._stop + 1]
+            self._indptr = indptr
+
+        needed_nnz = end_nnz + extra_nnz
+        if needed_nnz > len(self._data):
+            capacity = max(needed_nnz, 2 * len(self._data))
+            data = np.empty(capacity, dtype=self.dtype)
+            indices = np.empty(capacity, dtype=self._indices.dtype)
+            data[:end_nnz] = self._data[:end_nnz]
+            indices[:end_nnz] = self._indices[:end_nnz]
+            self._data, self._indices = data, indices
+
+    def append(self, rows):
+        """Append the rows of a sparse matrix (or single row vector)"""
+        rows = csr_matrix(rows)
+        if rows.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected {self.n_features} features, got {rows.shape[1]}"
+            )
+
+        n_new, nnz_new = rows.shape[0], rows.nnz
+        self._reserve(n_new, nnz_new)
+
+        start = int(self._indptr[self._stop])
+        self._data[start:start + nnz_new] = rows.data
+        self._indices[start:start + nnz_new] = rows.indices
+        self._indptr[self._stop + 1:self._stop + n_new + 1] = rows.indptr[1:] + start
+        self._stop += n_new
+        self._matrix = None
+
+    def evict(self, n_rows=1):
+        """Drop the `n_rows` oldest rows"""
+        n_rows = min(n_rows, len(self))
+        self._start += n_rows
+        if self._start == self._stop:
+            # Empty window: rewind for free instead of compacting later
+            self._indptr[0] = 0
+            self._start = self._stop = 0
+        self._matrix = None
+        return n_rows
+
+    def row(self, i):
+        """(indices, data) of live row `i`, as views into the buffers"""
+        lo, hi = self._indptr[self._start + i], self._indptr[self._start + i + 1]
+        return self._indices[lo:hi], self._data[lo:hi]
+
+    def matrix(self):
+        """Return the live rows as a CSR matrix sharing the store's buffers"""
+        if self._matrix is None:
+            lo, hi = self._indptr[self._start], self._indptr[self._stop]
+            indptr = self._indptr[self._start:self._stop + 1]
+            if lo:
+                indptr = indptr - lo
+            self._matrix = csr_matrix(
+                (self._data[lo:hi], self._indices[lo:hi], indptr),
+                shape=(len(self), self.n_features),
+                copy=False
+            )
+        return self._matrix
+
+    def max_similarity(self, vector):
+        """Max cosine similarity between `vector` and any stored row.
+
+        Rows are expected to be L2-normalized (the TF-IDF default), so the
+        cosine reduces to a sparse dot product.
+        """
+        if len(self) == 0:
+            return 0.0
+        similarities = self.matrix() @ csr_matrix(vector).T
+        if similarities.nnz == 0:
+            return 0.0
+        return float(similarities.max())
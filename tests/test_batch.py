@@ -0,0 +1,42 @@
+import random
+
+import pandas as pd
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.retention import RetentionPolicy
+from secops.similarity import get_backend
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+RETENTION = {
+    'unbounded': None,
+    'max_rows': RetentionPolicy(max_rows=80),
+    'max_age': RetentionPolicy(max_age=60),
+    'decay': RetentionPolicy(decay_half_life=20),
+}
+
+
+@pytest.fixture(scope="module")
+def alerts():
+    random.seed(17)
+    return HIPSAlertSimulator().generate_batch(900, include_similar=True)
+
+
+def sequential_frame(analyzer, alerts, like):
+    """`analyze_alert` results as a frame shaped like an `analyze_alerts` frame"""
+    records = [analyzer.analyze_alert(alert) for alert in alerts]
+    return pd.DataFrame(records, columns=like.columns).astype(like.dtypes.to_dict())
+
+
+@pytest.mark.parametrize("retention", list(RETENTION))
+@pytest.mark.parametrize("backend", ["exact", "lsh", "cluster"])
+def test_batch_matches_sequential(alerts, backend, retention):
+    def build():
+        return SyslogAlertAnalyzer(similarity_backend=get_backend(backend),
+                                   retention=RETENTION[retention])
+
+    batched = build()
+    # Several calls, so later batches score against history and evictions
+    frame = pd.concat([batched.analyze_alerts(alerts[lo:lo + 250])
+                       for lo in range(0, len(alerts), 250)], ignore_index=True)
+    pd.testing.assert_frame_equal(frame, sequential_frame(build(), alerts, frame))
@@ -0,0 +1,32 @@
+import sys
+
+import pytest
+
+from secops import bulk_generator
+from secops.bulk_generator import BulkAlertGenerator
+
+
+def run_cli(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, 'argv', ['bulk_generator', '--count', '20', *argv])
+    with pytest.raises(SystemExit) as exit_info:
+        bulk_generator.main()
+    return exit_info.value.code, capsys.readouterr().err
+
+
+def test_severity_weights_follow_type_ranges():
+    generator = BulkAlertGenerator(seed=1, type_weights={'MEMORY_ATTACK': 1},
+                                   severity_weights={'Critical': 1})
+    assert {alert['severity'] for alert in generator.generate(50)} == {'Critical'}
+
+
+@pytest.mark.parametrize("argv,message", [
+    (['--severity-weights', 'Critical=1'], "ACCESS_VIOLATION nothing to draw"),
+    (['--type-weights', 'MEMORY_ATTACK=1', '--severity-weights', 'Medium=1'],
+     "MEMORY_ATTACK nothing to draw"),
+    (['--severity-weights', 'High=1,Low=8'], "Unknown severities: ['Low']"),
+    (['--severity-weights', 'High=lots'], "Invalid weight 'High=lots'"),
+])
+def test_cli_rejects_unusable_severity_weights(monkeypatch, capsys, argv, message):
+    code, err = run_cli(monkeypatch, capsys, *argv)
+    assert code == 2
+    assert message in err
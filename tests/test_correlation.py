@@ -0,0 +1,88 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.correlation import BurstDetector
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+TYPES = ('MEMORY_ATTACK', 'PRIVILEGE_ESCALATION', 'SYSTEM_TAMPERING')
+SPIKE = 150
+
+
+@pytest.fixture(scope="module")
+def stream():
+    """Five minutes of one alert per second over many keys, then a spike from one IP"""
+    rng = random.Random(29)
+    background = [{'type': rng.choice(TYPES), 'source_ip': f"10.0.0.{rng.randrange(50)}",
+                   'process': rng.choice(('svchost.exe', 'explorer.exe')), 'timestamp': float(t)}
+                  for t in range(300)]
+    spike = [{'type': 'MEMORY_ATTACK', 'source_ip': '203.0.113.7', 'process': 'rundll32.exe',
+              'timestamp': 300 + 2 * i / SPIKE} for i in range(SPIKE)]
+    return background, spike
+
+
+def test_spike_is_a_burst(stream):
+    background, spike = stream
+    detector = BurstDetector(window=10, min_count=20)
+    assert not detector.observe(background)['burst'].any()
+
+    result = detector.observe(spike)
+    # Nothing bursts until a key has more than min_count alerts in the window
+    assert not result['burst'][result['count'] <= 20].any()
+    assert result['burst'][result['count'] > 20].all()
+    assert result['burst'][-1] > 0.8
+    assert detector.estimate('source_ip', 'MEMORY_ATTACK|203.0.113.7')['count'] == SPIKE
+    assert detector.bursts == np.count_nonzero(result['burst'])
+
+    hitter = detector.heavy_hitters('source_ip', n=1)[0]
+    assert (hitter['value'], hitter['count']) == ('203.0.113.7', SPIKE)
+
+
+def test_spike_below_min_count_stays_quiet(stream):
+    background, spike = stream
+    detector = BurstDetector(window=10, min_count=2 * SPIKE)
+    detector.observe(background)
+    assert not detector.observe(spike)['burst'].any()
+    assert detector.stats()['bursts'] == 0
+    assert detector.heavy_hitters() == []
+
+
+def test_one_at_a_time_matches_batches(stream):
+    background, spike = stream
+    alerts = background + spike
+    batched = BurstDetector(window=10, min_count=20)
+    single = BurstDetector(window=10, min_count=20)
+    batch_results = [batched.observe(alerts[lo:lo + 64]) for lo in range(0, len(alerts), 64)]
+    single_results = [single.observe([alert]) for alert in alerts]
+    for name in ('burst', 'dimension', 'count'):
+        assert np.array_equal(np.concatenate([r[name] for r in batch_results]),
+                              np.concatenate([r[name] for r in single_results]))
+
+
+@pytest.mark.parametrize("min_count,bursting", [(20, True), (2 * SPIKE, False)])
+def test_analyzer_boosts_bursting_scores(stream, min_count, bursting):
+    # As main.py builds it from --burst-window / --burst-min-count
+    background, spike = stream
+    random.seed(29)
+    simulator = HIPSAlertSimulator()
+    start = datetime(2024, 1, 1)
+    alerts = []
+    for alert in background + spike:
+        full = simulator.generate_alert(alert['type'])
+        full.update(source_ip=alert['source_ip'], process=alert['process'],
+                    timestamp=(start + timedelta(seconds=alert['timestamp'])).isoformat())
+        alerts.append(full)
+
+    plain = SyslogAlertAnalyzer().analyze_alerts(alerts)
+    analyzer = SyslogAlertAnalyzer(correlation=BurstDetector(window=10, min_count=min_count))
+    frame = analyzer.analyze_alerts(alerts)
+    quiet = frame['burst'] == 0
+    assert np.array_equal(frame['score'][quiet], plain['score'][quiet])
+    if bursting:
+        assert frame['burst'].iloc[-1] > 0.8
+        assert (frame['score'][~quiet] > plain['score'][~quiet]).all()
+    else:
+        assert quiet.all()
@@ -0,0 +1,50 @@
+import gzip
+import json
+
+import pytest
+
+import secops.replay as replay
+from secops.replay import read_alerts
+from secops.syslog_server import format_rfc5424
+
+ALERT = {
+    'raw_message': '[2024-01-01 00:00:00] Threat Detected [MEMORY_ATTACK]: Buffer Overflow '
+                   'involving svchost.exe. Process ID: 4242, Source: 10.0.0.7, Priority: High',
+    'type': 'MEMORY_ATTACK', 'pattern': 'Buffer Overflow', 'severity': 'High',
+    'process': 'svchost.exe', 'pid': 4242, 'source_ip': '10.0.0.7',
+    'timestamp': '2024-01-01 00:00:00'
+}
+
+
+@pytest.fixture
+def capture(tmp_path):
+    path = tmp_path / "capture.log.gz"
+    lines = [
+        json.dumps(ALERT),
+        "<13>1 - host app ² - - HIPS Alert [MEMORY_ATTACK]: superscript procid",
+        "not a syslog frame",
+        format_rfc5424(ALERT),
+    ]
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_malformed_lines_are_skipped_and_counted(capture):
+    counters = {}
+    alerts = list(read_alerts(capture, counters=counters))
+    assert counters == {'lines': 4, 'unparsed': 1}
+    assert [alert['type'] for alert in alerts] == ['MEMORY_ATTACK'] * 3
+    assert alerts[1]['pid'] == 0
+    assert alerts[2]['pid'] == 4242
+
+
+def test_parser_errors_do_not_abort_the_replay(capture, monkeypatch):
+    def broken(line, default_type=None):
+        raise ValueError("parser bug")
+
+    monkeypatch.setattr(replay, 'parse_syslog', broken)
+    counters = {}
+    alerts = list(read_alerts(capture, counters=counters))
+    assert counters == {'lines': 4, 'unparsed': 3}
+    assert alerts == [ALERT]
@@ -0,0 +1,90 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.retention import RetentionPolicy
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def alerts():
+    """One alert type, one second apart"""
+    random.seed(19)
+    simulator = HIPSAlertSimulator()
+    batch = [simulator.generate_alert('MEMORY_ATTACK') for _ in range(120)]
+    for i, alert in enumerate(batch):
+        alert['timestamp'] = (START + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+    return batch
+
+
+def live_state(analyzer, alert_type='MEMORY_ATTACK'):
+    """(history rows, vector store rows, history) for a type"""
+    history = analyzer.alert_history[alert_type]
+    return len(history), len(analyzer.alert_vectors[alert_type]), history
+
+
+def test_max_rows_keeps_newest(alerts):
+    analyzer = SyslogAlertAnalyzer(retention=RetentionPolicy(max_rows=25))
+    for alert in alerts:
+        analyzer.analyze_alert(alert)
+
+    rows, vectors, history = live_state(analyzer)
+    assert rows == vectors == 25
+    assert analyzer.evicted_counts['MEMORY_ATTACK'] == len(alerts) - 25
+    assert sum(analyzer.alert_counts['MEMORY_ATTACK'].values()) == 25
+
+    stats = analyzer.get_statistics()
+    assert (stats['total_alerts'], stats['live_alerts'], stats['evicted_alerts']) == \
+        (len(alerts), 25, len(alerts) - 25)
+
+
+def test_max_age_evicts_by_alert_time(alerts):
+    analyzer = SyslogAlertAnalyzer(retention=RetentionPolicy(max_age=30))
+    for alert in alerts:
+        analyzer.analyze_alert(alert)
+
+    rows, vectors, history = live_state(analyzer)
+    newest = history.time_at(rows - 1)
+    # Alerts exactly max_age old are kept
+    assert rows == vectors == 31
+    assert newest - history.time_at(0) == 30
+    assert analyzer.get_statistics()['evicted_alerts'] == len(alerts) - 31
+
+
+def test_type_retention_overrides_default(alerts):
+    analyzer = SyslogAlertAnalyzer(retention=RetentionPolicy(max_rows=100),
+                                   type_retention={'MEMORY_ATTACK': RetentionPolicy(max_rows=10)})
+    for alert in alerts:
+        analyzer.analyze_alert(alert)
+    assert live_state(analyzer)[0] == 10
+
+
+def test_decay_only_policy_is_bounded(alerts):
+    policy = RetentionPolicy(decay_half_life=2, decay_epsilon=1e-2)
+    assert policy.is_bounded
+    assert policy.horizon == pytest.approx(2 * 6.643856, rel=1e-6)
+
+    analyzer = SyslogAlertAnalyzer(retention=policy)
+    for alert in alerts:
+        analyzer.analyze_alert(alert)
+
+    rows, vectors, history = live_state(analyzer)
+    assert rows == vectors == 14
+    assert history.time_at(rows - 1) - history.time_at(0) <= policy.horizon
+    # Patterns whose rows all left the window are forgotten
+    assert set(analyzer.alert_counts['MEMORY_ATTACK']) == set(history.keys())
+
+
+def test_decay_halves_frequency_per_half_life(alerts):
+    analyzer = SyslogAlertAnalyzer(retention=RetentionPolicy(decay_half_life=10))
+    alert = dict(alerts[0])
+    assert analyzer.analyze_alert(alert)['frequency'] == 1
+
+    alert['timestamp'] = (START + timedelta(seconds=10)).strftime("%Y-%m-%d %H:%M:%S")
+    assert analyzer.analyze_alert(alert)['frequency'] == pytest.approx(1.5)
+    alert['timestamp'] = (START + timedelta(seconds=30)).strftime("%Y-%m-%d %H:%M:%S")
+    assert analyzer.analyze_alert(alert)['frequency'] == pytest.approx(1.375)
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.similarity import RandomHyperplaneLSH, evaluate_recall
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+from secops.vector_store import SparseVectorStore
+
+# Floors for the default n_bits / n_tables on the simulated alert mix
+# (measured: recall@1 0.79-0.86, threshold agreement 1.0)
+RECALL_FLOOR = 0.7
+THRESHOLD_AGREEMENT_FLOOR = 0.95
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    random.seed(7)
+    alerts = HIPSAlertSimulator().generate_batch(2400)
+    return SyslogAlertAnalyzer().vectorize_alerts(alerts, None)
+
+
+def test_lsh_recall_against_exact(vectors):
+    analyzer = SyslogAlertAnalyzer()
+    report = evaluate_recall(vectors[:2000], vectors[2000:], RandomHyperplaneLSH(), k=1,
+                             threshold=analyzer.similarity_threshold)
+    assert report['recall_at_k'] >= RECALL_FLOOR
+    assert report['threshold_agreement'] >= THRESHOLD_AGREEMENT_FLOOR
+
+
+def test_lsh_eviction_prunes_buckets(vectors):
+    store = SparseVectorStore(vectors.shape[1])
+    index = RandomHyperplaneLSH().create_index(store)
+    for i in range(vectors.shape[0]):
+        store.append(vectors[i])
+        index.add(vectors[i])
+        if len(store) > 100:
+            index.evict(1)
+            store.evict(1)
+    assert index._stored == len(store) * index.n_tables
+    assert sum(len(bucket) for table in index._buckets for bucket in table.values()) == index._stored
+    positions, _ = index.nearest(vectors[-1])
+    assert 0 <= positions.min() and positions.max() < len(store)
@@ -0,0 +1,61 @@
+import io
+import random
+import threading
+
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.sinks import AlertSink, ConsoleSink, SinkWriter
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+
+class BrokenSink(AlertSink):
+    def write_batch(self, alerts, analyses, config=None):
+        raise OSError("disk full")
+
+
+class StalledSink(AlertSink):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write_batch(self, alerts, analyses, config=None):
+        self.release.wait()
+
+
+@pytest.fixture(scope="module")
+def analyzed():
+    random.seed(31)
+    alerts = HIPSAlertSimulator().generate_batch(40)
+    return alerts, SyslogAlertAnalyzer().analyze_alerts(alerts)
+
+
+def test_written_counts_only_accepted_alerts(analyzed):
+    alerts, results = analyzed
+    writer = SinkWriter([BrokenSink()])
+    writer.submit(alerts, results)
+    writer.close()
+    stats = writer.stats()
+    assert (stats['written'], stats['failed'], stats['errors']) == (0, len(alerts), 1)
+
+    stream = io.StringIO()
+    writer = SinkWriter([BrokenSink(), ConsoleSink(stream)])
+    writer.submit(alerts, results)
+    writer.close()
+    stats = writer.stats()
+    assert (stats['written'], stats['failed'], stats['errors']) == (len(alerts), 0, 1)
+    assert stream.getvalue().count("PRIORITY") == len(alerts)
+
+
+def test_non_blocking_writer_drops_when_full(analyzed):
+    alerts, results = analyzed
+    sink = StalledSink()
+    writer = SinkWriter([sink], queue_size=1, block=False)
+    for _ in range(5):
+        writer.submit(alerts, results)
+    sink.release.set()
+    writer.close()
+    stats = writer.stats()
+    # One batch in the writer, one queued; the rest are dropped without waiting
+    assert stats['dropped'] >= 3 * len(alerts)
+    assert stats['written'] + stats['dropped'] == 5 * len(alerts)
@@ -0,0 +1,35 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.retention import RetentionPolicy
+from secops.similarity import get_backend
+from secops.snapshot import load_snapshot, save_snapshot
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+
+@pytest.fixture(scope="module")
+def alerts():
+    random.seed(21)
+    return HIPSAlertSimulator().generate_batch(2400, include_similar=True)
+
+
+@pytest.mark.parametrize("backend", ["exact", "lsh", "cluster"])
+@pytest.mark.parametrize("vectorizer_mode", ["tfidf", "hashing"])
+def test_restored_analyzer_matches_original(alerts, tmp_path, backend, vectorizer_mode):
+    kwargs = {'vectorizer_mode': vectorizer_mode, 'retention': RetentionPolicy(max_rows=150)}
+    analyzer = SyslogAlertAnalyzer(similarity_backend=get_backend(backend), **kwargs)
+    analyzer.analyze_alerts(alerts[:1200])
+    save_snapshot(analyzer, str(tmp_path / "snapshot"))
+
+    restored = load_snapshot(str(tmp_path / "snapshot"), mmap=True)
+    # History and vectors come back memory-mapped, not read into memory
+    history = next(iter(restored.alert_history.values()))
+    assert isinstance(history.column('key').base, np.memmap)
+    assert restored.get_statistics()['total_alerts'] == 1200
+
+    expected = analyzer.analyze_alerts(alerts[1200:])
+    pd.testing.assert_frame_equal(restored.analyze_alerts(alerts[1200:]), expected)
@@ -0,0 +1,125 @@
+import asyncio
+import random
+
+import pytest
+
+import secops.syslog_server as syslog_server
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.syslog_server import SyslogIngestServer, format_rfc5424, parse_syslog, send_messages
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+FIELDS = ('raw_message', 'type', 'pattern', 'severity', 'process', 'pid', 'source_ip', 'timestamp')
+
+
+@pytest.fixture(scope="module")
+def alerts():
+    random.seed(11)
+    return HIPSAlertSimulator().generate_batch(60, include_similar=True)
+
+
+def format_rfc3164(alert):
+    return f"<35>Jan  5 10:00:00 hips-agent {alert['process']}[{alert['pid']}]: {alert['raw_message']}"
+
+
+def test_parse_rfc5424(alerts):
+    for alert in alerts:
+        parsed = parse_syslog(format_rfc5424(alert).encode('utf-8'))
+        assert {field: parsed[field] for field in FIELDS} == {field: alert[field] for field in FIELDS}
+
+
+def test_parse_rfc3164(alerts):
+    for alert in alerts:
+        parsed = parse_syslog(format_rfc3164(alert))
+        # 3164 timestamps carry no year; the message's own fields are used
+        assert {field: parsed[field] for field in FIELDS if field != 'timestamp'} == \
+            {field: alert[field] for field in FIELDS if field != 'timestamp'}
+        assert parsed['timestamp'].endswith('01-05 10:00:00')
+
+
+def test_parse_rejects_non_alerts():
+    assert parse_syslog("not syslog at all") is None
+    assert parse_syslog("<13>1 2024-01-01T00:00:00 host app - - - no alert type here") is None
+    parsed = parse_syslog("<11>1 2024-01-01T00:00:00 host app 42 - - plain message",
+                          peer_ip="10.0.0.9", default_type="UNKNOWN")
+    assert (parsed['type'], parsed['severity'], parsed['pid'], parsed['source_ip']) == \
+        ("UNKNOWN", "High", 42, "10.0.0.9")
+
+
+def serve(messages_by_protocol, on_results=None, batch_size=16):
+    """Send frames to a loopback server; returns its stats once all are analyzed"""
+    async def run():
+        server = SyslogIngestServer(SyslogAlertAnalyzer(), udp_port=0, tcp_port=0,
+                                    batch_size=batch_size, batch_timeout=0.01,
+                                    on_results=on_results)
+        await server.start()
+        loop = asyncio.get_running_loop()
+        try:
+            for protocol, messages in messages_by_protocol:
+                port = server.udp_port if protocol == "udp" else server.tcp_port
+                await loop.run_in_executor(None, send_messages, messages, "127.0.0.1", port,
+                                           protocol)
+            await asyncio.wait_for(_wait_received(server, sum(
+                len(messages) for _, messages in messages_by_protocol)), 30)
+            await asyncio.wait_for(server.drain(), 30)
+            return server.stats()
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+
+async def _wait_received(server, count):
+    while server.counters['received'] < count:
+        await asyncio.sleep(0.01)
+
+
+def test_udp_and_tcp_loopback(alerts):
+    frames = [format_rfc5424(alert) for alert in alerts]
+    received = []
+    stats = serve([("udp", frames[:30]), ("tcp", frames[30:] + ["garbage frame"])],
+                  on_results=lambda batch, results: received.extend(results['alert_type']))
+    assert stats['received'] == len(frames) + 1
+    assert stats['analyzed'] == len(frames)
+    assert stats['unparsed'] == 1
+    assert stats['pending'] == 0
+    assert sorted(received) == sorted(alert['type'] for alert in alerts)
+
+
+def test_failing_callback_keeps_consumer_running(alerts):
+    calls = []
+
+    def on_results(batch, results):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("sink unavailable")
+
+    frames = [format_rfc5424(alert) for alert in alerts]
+    stats = serve([("tcp", frames)], on_results=on_results, batch_size=8)
+    assert stats['analyzed'] == len(frames)
+    assert stats['callback_errors'] == calls[0]
+    assert len(calls) > 1
+
+
+def test_malformed_frame_does_not_stop_ingestion(alerts):
+    # '²' passes str.isdigit() but int() rejects it
+    bad = "<13>1 - host app ² - - HIPS Alert [MEMORY_ATTACK]: x"
+    assert parse_syslog(bad)['pid'] == 0
+    frames = [format_rfc5424(alert) for alert in alerts]
+    stats = serve([("tcp", [bad] + frames)], batch_size=8)
+    assert stats['analyzed'] == len(frames) + 1
+    assert stats['pending'] == 0
+
+
+def test_parser_errors_count_as_unparsed(alerts, monkeypatch):
+    parse = syslog_server.parse_syslog
+
+    def flaky(frame, *args):
+        if b'explode' in frame:
+            raise ValueError("parser bug")
+        return parse(frame, *args)
+
+    monkeypatch.setattr(syslog_server, 'parse_syslog', flaky)
+    frames = [format_rfc5424(alert) for alert in alerts]
+    stats = serve([("tcp", ["<13>1 - host app 1 - - explode [MEMORY_ATTACK]"] + frames)])
+    assert stats['unparsed'] == 1
+    assert stats['analyzed'] == len(frames)
+    assert stats['pending'] == 0
@@ -0,0 +1,56 @@
+import random
+
+import pandas as pd
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.syslog_vectorization import SyslogAlertAnalyzer
+
+
+@pytest.fixture(scope="module")
+def alerts():
+    random.seed(23)
+    batch = HIPSAlertSimulator().generate_batch(300, include_similar=True)
+    # Exact repeats, so every pattern after its first sighting is a cache hit
+    return batch + batch[:150]
+
+
+def test_cache_hits_match_uncached_results(alerts):
+    cached = SyslogAlertAnalyzer()
+    uncached = SyslogAlertAnalyzer(template_cache=False)
+    with_cache = pd.DataFrame([cached.analyze_alert(alert) for alert in alerts])
+    without_cache = pd.DataFrame([uncached.analyze_alert(alert) for alert in alerts])
+    pd.testing.assert_frame_equal(with_cache, without_cache)
+
+    stats = cached.get_statistics()['template_cache']
+    assert stats['hits'] >= 150
+    assert stats['hits'] <= stats['lookups'] < len(alerts)
+    assert uncached.get_statistics()['template_cache']['lookups'] == 0
+
+
+def test_batch_cache_hits_match_uncached_results(alerts):
+    cached = SyslogAlertAnalyzer()
+    uncached = SyslogAlertAnalyzer(template_cache=False)
+    with_cache = pd.concat([cached.analyze_alerts(alerts[lo:lo + 100])
+                            for lo in range(0, len(alerts), 100)], ignore_index=True)
+    without_cache = pd.concat([uncached.analyze_alerts(alerts[lo:lo + 100])
+                               for lo in range(0, len(alerts), 100)], ignore_index=True)
+    pd.testing.assert_frame_equal(with_cache, without_cache)
+    assert cached.template_cache_hits >= 150
+    assert uncached.template_cache_hits == 0
+
+
+def test_hashing_hits_reuse_first_vector(alerts):
+    # Online IDF drifts, so a hit matches the pattern's first sighting rather
+    # than a fresh vectorization; it still counts towards the IDF statistics
+    analyzer = SyslogAlertAnalyzer(vectorizer_mode='hashing')
+    alert = alerts[0]
+    analyzer.analyze_alert(alert)
+    stored = analyzer.alert_vectors[alert['type']].matrix()[0]
+    result = analyzer.analyze_alert(alert)
+
+    assert analyzer.template_cache_hits == 1
+    assert analyzer.vectorizer.n_documents == 2
+    repeat = analyzer.alert_vectors[alert['type']].matrix()[1]
+    assert (repeat != stored).nnz == 0
+    assert result['similarity'] == pytest.approx(1.0)
@@ -0,0 +1,21 @@
+import random
+
+import pytest
+
+from secops.alert_simulator import HIPSAlertSimulator
+from secops.threadsafe import stress_check
+
+
+@pytest.fixture(scope="module")
+def alerts():
+    random.seed(13)
+    return HIPSAlertSimulator().generate_batch(1600, include_similar=True)
+
+
+@pytest.mark.parametrize("batch_size", [0, 16])
+def test_concurrent_producers_match_single_threaded(alerts, batch_size):
+    report = stress_check(alerts, n_threads=8, batch_size=batch_size)
+    assert report['alerts'] == len(alerts)
+    assert report['ranks_ok']
+    assert report['mismatches'] == 0
+    assert report['counts_match']
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from scipy.sparse import random as sparse_random, vstack
+
+from secops.vector_store import SparseVectorStore
+
+N_FEATURES = 300
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return sparse_random(400, N_FEATURES, density=0.05, format='csr', random_state=3)
+
+
+def test_append_grows_capacity_and_keeps_rows(rows):
+    store = SparseVectorStore(N_FEATURES, row_capacity=4, nnz_capacity=8)
+    for i in range(rows.shape[0]):
+        store.append(rows[i])
+    assert len(store) == rows.shape[0]
+    assert store.nnz == rows.nnz
+    # Capacity doubles, so it stays within 2x of what is needed
+    assert len(store._indptr) <= 2 * (rows.shape[0] + 1)
+    assert len(store._data) <= 2 * rows.nnz
+    assert (store.matrix() != rows).nnz == 0
+
+
+def test_batch_append_matches_row_by_row(rows):
+    store = SparseVectorStore(N_FEATURES)
+    store.append(rows[:150])
+    store.append(rows[150:])
+    assert (store.matrix() != rows).nnz == 0
+
+
+def test_eviction_compacts_instead_of_growing(rows):
+    window = 50
+    store = SparseVectorStore(N_FEATURES, row_capacity=4, nnz_capacity=8)
+    for i in range(rows.shape[0]):
+        store.append(rows[i])
+        if len(store) > window:
+            store.evict(1)
+        lo = max(0, i + 1 - window)
+        assert (store.matrix() != rows[lo:i + 1]).nnz == 0
+    # Space freed by eviction is reused: a bounded window keeps a bounded footprint
+    max_nnz = max(rows[i:i + window].nnz for i in range(rows.shape[0] - window + 1))
+    assert len(store._indptr) <= 4 * (window + 1)
+    assert len(store._data) <= 4 * max_nnz
+    indices, data = store.row(0)
+    expected = rows[rows.shape[0] - window]
+    assert np.array_equal(indices, expected.indices) and np.array_equal(data, expected.data)
+
+
+def test_evicting_everything_rewinds(rows):
+    store = SparseVectorStore(N_FEATURES)
+    store.append(rows[:10])
+    assert store.evict(25) == 10
+    assert len(store) == 0 and store._start == store._stop == 0
+    assert store.max_similarity(rows[0]) == 0.0
+    store.append(rows[10:12])
+    assert (store.matrix() != vstack([rows[10], rows[11]])).nnz == 0
+
+
+def test_max_similarity_is_max_dot_product(rows):
+    store = SparseVectorStore(N_FEATURES)
+    store.append(rows[:100])
+    query = rows[200]
+    assert store.max_similarity(query) == pytest.approx((rows[:100] @ query.T).toarray().max())
+    with pytest.raises(ValueError):
+        store.append(sparse_random(1, N_FEATURES + 1, density=0.5, format='csr'))